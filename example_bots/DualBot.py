@@ -0,0 +1,70 @@
+"""
+file: DualBot.py
+
+description: python port of `DualBot.java`, for in-process games with
+`tools/engine.py`. plays like `ProspectorBot`, but keeps more fleets in flight
+when behind and only attacks enemy planets when ahead in both ships and
+production.
+"""
+
+import math
+
+import planet_wars
+
+# java's `Double.MIN_VALUE`, the smallest positive double
+MIN_VALUE: float = 5e-324
+
+
+def num_ships(pw: planet_wars.PlanetWars, player_id: int) -> int:
+    return sum(p.num_ships() for p in pw.planets() if p.owner() == player_id) + \
+           sum(f.num_ships() for f in pw.fleets() if f.owner() == player_id)
+
+
+def production(pw: planet_wars.PlanetWars, player_id: int) -> int:
+    return sum(p.growth_rate() for p in pw.planets() if p.owner() == player_id)
+
+
+def do_turn(pw: planet_wars.PlanetWars) -> None:
+    attack_mode = False
+    if num_ships(pw, 1) > num_ships(pw, 2):
+        if production(pw, 1) > production(pw, 2):
+            num_fleets = 1
+            attack_mode = True
+        else:
+            num_fleets = 3
+    else:
+        if production(pw, 1) > production(pw, 2):
+            num_fleets = 1
+        else:
+            num_fleets = 5
+
+    # (1) if we currently have more than `num_fleets` fleets in flight, just do
+    # nothing until at least one of the fleets arrives.
+    if pw.num_sent_fleets(1) >= num_fleets:
+        return
+
+    # (2) find my strongest planet.
+    source = None
+    source_score = MIN_VALUE
+    for p in pw.my_planets():
+        score = p.num_ships() / (1 + p.growth_rate())
+        if score > source_score:
+            source_score = score
+            source = p
+
+    # (3) find the weakest enemy or neutral planet.
+    destination = None
+    destination_score = MIN_VALUE
+    for p in pw.enemy_planets() if attack_mode else pw.not_my_planets():
+        score = (1 + p.growth_rate()) / p.num_ships() if p.num_ships() != 0 else math.inf
+        if score > destination_score:
+            destination_score = score
+            destination = p
+
+    # (4) send half the ships from my strongest planet to the weakest planet
+    # that i do not own.
+    if source is not None and destination is not None:
+        pw.issue_raw_order(source.planet_id(), destination.planet_id(), source.num_ships() // 2)
+
+
+do_turn.needs_info = False
@@ -0,0 +1,44 @@
+"""
+file: ExpandBot.py
+
+description: python port of `ExpandBot.java`, for in-process games with
+`tools/engine.py`. `ExpandBot.java` is a copy of `BullyBot.java`, so this
+plays exactly like `BullyBot.py`.
+"""
+
+import planet_wars
+
+# java's `Double.MIN_VALUE`, the smallest positive double
+MIN_VALUE: float = 5e-324
+
+
+def do_turn(pw: planet_wars.PlanetWars) -> None:
+    # (1) if we currently have a fleet in flight, just do nothing.
+    if pw.num_sent_fleets(1) >= 1:
+        return
+
+    # (2) find my strongest planet.
+    source = None
+    source_score = MIN_VALUE
+    for p in pw.my_planets():
+        score = p.num_ships()
+        if score > source_score:
+            source_score = score
+            source = p
+
+    # (3) find the weakest enemy or neutral planet.
+    destination = None
+    destination_score = MIN_VALUE
+    for p in pw.not_my_planets():
+        score = 1 / (1 + p.num_ships())
+        if score > destination_score:
+            destination_score = score
+            destination = p
+
+    # (4) send half the ships from my strongest planet to the weakest planet
+    # that i do not own.
+    if source is not None and destination is not None:
+        pw.issue_raw_order(source.planet_id(), destination.planet_id(), source.num_ships() // 2)
+
+
+do_turn.needs_info = False
@@ -0,0 +1,29 @@
+"""
+file: RageBot.py
+
+description: python port of `RageBot.java`, for in-process games with
+`tools/engine.py`. every planet with at least ten turns of growth sends all of
+its ships to the closest enemy planet.
+"""
+
+import planet_wars
+
+
+def do_turn(pw: planet_wars.PlanetWars) -> None:
+    for source in pw.my_planets():
+        if source.num_ships() < 10 * source.growth_rate():
+            continue
+
+        destination = None
+        best_distance = 999999
+        for p in pw.enemy_planets():
+            distance = pw.distance(source.planet_id(), p.planet_id())
+            if distance < best_distance:
+                best_distance = distance
+                destination = p
+
+        if destination is not None:
+            pw.issue_raw_order(source.planet_id(), destination.planet_id(), source.num_ships())
+
+
+do_turn.needs_info = False
@@ -0,0 +1,37 @@
+"""
+file: RandomBot.py
+
+description: python port of `RandomBot.java`, for in-process games with
+`tools/engine.py`. sends half the ships of a random planet of its own to a
+random planet, one fleet at a time.
+"""
+
+import random
+
+import planet_wars
+
+
+def do_turn(pw: planet_wars.PlanetWars) -> None:
+    # (1) if we currently have a fleet in flight, then do nothing until it
+    # arrives.
+    if pw.num_sent_fleets(1) >= 1:
+        return
+
+    # (2) pick one of my planets at random.
+    source = None
+    planets = pw.my_planets()
+    if len(planets) > 0:
+        source = random.choice(planets)
+
+    # (3) pick a target planet at random.
+    destination = None
+    planets = pw.planets()
+    if len(planets) > 0:
+        destination = random.choice(planets)
+
+    # (4) send half the ships from source to destination.
+    if source is not None and destination is not None:
+        pw.issue_raw_order(source.planet_id(), destination.planet_id(), source.num_ships() // 2)
+
+
+do_turn.needs_info = False
@@ -27,16 +27,23 @@ try:
 except NameError:
     pass
 
+import deadline
+import memo
 import planet_wars
+import profiler
+import replay
 import utils
 
 import math
+import typing
 
 __version__ = "0.8.1-dev"
 
 # game configs
 COMPETITION_MODE = True
 ACCEPT_DRAWS = False
+TURN_TIME_LIMIT = 1.0  # seconds
+TURN_TIME_RESERVE = 0.1  # seconds of `TURN_TIME_LIMIT` kept for writing the orders
 
 # evaluation configs
 STRUCTURAL_FACTOR = 0
@@ -44,7 +51,13 @@ SURROUNDING_FACTOR = 0
 LATENCY_FACTOR = 0
 CENTER_FACTOR = 0
 
+MEMO = memo.Memo()  # caches of the helper functions below, cleared every turn
 HAVOC_PLANET = [None, 0]  # [planet.planet_id(), turns_to_attack]
+MY_PLANETS_CENTER = None
+ENEMY_PLANETS_CENTER = None
+
+# protocol extension (not sent by the official engine): reinitialise all per-game state
+RESET_COMMAND = "reset"
 
 
 def pythag(coord1, coord2):
@@ -68,6 +81,7 @@ def get_raw_score(p: planet_wars.Planet):
     return p.growth_rate()
 
 
+@MEMO.per_turn(lambda pw, p: ())
 def score_planet(pw: planet_wars.PlanetWars, p: planet_wars.Planet):
     """
     Function to give a planet a score based on many factors.
@@ -80,15 +94,12 @@ def score_planet(pw: planet_wars.PlanetWars, p: planet_wars.Planet):
 
     structural_score = 1 - (pythag(MY_PLANETS_CENTER, (p.x(), p.y())) / pw.map_size)
 
-    surrounding_score = 0
-    for planet in filter(lambda _p: _p != p, pw.planets()):
-        temp = (1 - (pw.distance(p.planet_id(), planet.planet_id()) / pw.map_size)) ** 5
-        surrounding_score += get_raw_score(planet) * temp
-    surrounding_score /= pw.total_growth
+    # static, computed once per map (with growth rate as the raw score)
+    surrounding_score = pw.analysis.surrounding_scores[p.planet_id()]
 
     latency_score = p.latency / pw.map_size
 
-    center_score = 1 - (pw.distance(p.planet_id(), 0) / pw.map_size)
+    center_score = pw.analysis.center_scores[p.planet_id()]
 
     score = 0
     score += raw_score
@@ -100,6 +111,7 @@ def score_planet(pw: planet_wars.PlanetWars, p: planet_wars.Planet):
     return score
 
 
+@profiler.phase
 def get_info(pw: planet_wars.PlanetWars):
     """
     Gets basic info about the map. Saves everything in global variables.
@@ -115,9 +127,10 @@ def get_info(pw: planet_wars.PlanetWars):
                            sum(map(lambda p: p.y(), pw.enemy_planets())) / len(pw.enemy_planets())
 
 
+@MEMO.per_turn(lambda pw, planet, owner: ())
 def furthest_meaningful_planet(pw: planet_wars.PlanetWars, planet: planet_wars.Planet, owner: int):
-    planets = tuple(filter(lambda p: p.owner() == owner, pw.planets()))
-    fleets = tuple(filter(lambda f: f.owner() == owner, pw.fleets()))
+    planets = pw.my_planets() if owner == 1 else pw.enemy_planets()
+    fleets = pw.my_fleets() if owner == 1 else pw.enemy_fleets()
 
     furthest_distance = 0
     for other_planet in planets:
@@ -129,6 +142,7 @@ def furthest_meaningful_planet(pw: planet_wars.PlanetWars, planet: planet_wars.P
     return furthest_distance
 
 
+@MEMO.per_turn(lambda pw, my_planet, neutral_planet: (my_planet, neutral_planet))
 def turn_to_take(pw: planet_wars.PlanetWars, my_planet: planet_wars.Planet, neutral_planet: planet_wars.Planet):
     """
     Finds the minimum turns to take `neutral_planet` with `my_planet`.
@@ -143,34 +157,36 @@ def turn_to_take(pw: planet_wars.PlanetWars, my_planet: planet_wars.Planet, neut
         return distance
     else:
         lacking_ships = neutral_planet.num_ships() - my_planet.num_ships() + 1
-        for t in range(pw.map_size):
-            lacking_ships -= my_planet.my_arriving_ships[t] + my_planet.growth_rate()
-            if lacking_ships <= 0:
-                break
-        else:
+        t = utils.first_true(range(pw.map_size), lambda _t: my_planet.my_arriving_ships_sums[_t + 1] +
+                                                            my_planet.growth_rate() * (_t + 1) >= lacking_ships)
+        if t is None:
             return 999999
         return distance + t
 
 
+@MEMO.per_turn(lambda pw, planet: pw.my_planets() + [planet])
 def return_ships(pw: planet_wars.PlanetWars, planet: planet_wars.Planet):
     quickest_planet = min(pw.my_planets(), key=lambda p: turn_to_take(pw, p, planet))
     quickest_turns = turn_to_take(pw, quickest_planet, planet)
     return planet.growth_rate() * (pw.map_size / 2 - quickest_turns)
 
 
+@MEMO.per_turn(lambda pw, planet: pw.my_planets() + [planet])
 def defensible(pw: planet_wars.PlanetWars, planet: planet_wars.Planet):
     quickest_planet = min(pw.my_planets(), key=lambda p: turn_to_take(pw, p, planet))
     quickest_turns = turn_to_take(pw, quickest_planet, planet)
     for t in range(quickest_turns + 1, furthest_meaningful_planet(pw, planet, 2) + 2):
-        my_maximum_ships = max(0, sum(planet.my_maximum_ships[:t - 1]) - planet.num_ships() +
+        my_maximum_ships = max(0, utils.range_sum(planet.my_maximum_ships_sums, 0, t - 1) - planet.num_ships() +
                                planet.growth_rate() * (t - quickest_turns))
-        enemy_maximum_ships = sum(planet.enemy_maximum_ships[:t])
+        enemy_maximum_ships = utils.range_sum(planet.enemy_maximum_ships_sums, 0, t)
         if my_maximum_ships < enemy_maximum_ships:
             return False
     return True
 
 
-def expand(pw: planet_wars.PlanetWars, expand_limit: int = 99, possible_planets=None, reckless: bool = False):
+@profiler.phase
+def expand(pw: planet_wars.PlanetWars, expand_limit: int = 99, possible_planets=None, reckless: bool = False,
+           turn_deadline: typing.Optional[deadline.Deadline] = None):
     """
     Expand to neutral planets with all ships. Designed to come after `defend_possible()` because this doesn't account
     for possible attacks from the opponent.
@@ -178,6 +194,7 @@ def expand(pw: planet_wars.PlanetWars, expand_limit: int = 99, possible_planets=
     :param expand_limit: `int` the maximum number of planets to expand to.
     :param possible_planets: `list` of `Planet` objects, the planets to consider expanding to. None -> all
     :param reckless: `bool` whether to care about the defensibility of the planet
+    :param turn_deadline: `Deadline` object, stops expanding once it has expired
     :return: None
     """
 
@@ -195,6 +212,8 @@ def expand(pw: planet_wars.PlanetWars, expand_limit: int = 99, possible_planets=
     )
 
     for _ in range(expand_limit):
+        if turn_deadline is not None and turn_deadline.expired():
+            break
         for attack_planet in sorted_planets[:expand_limit]:
             if not (attack_planet.latency > 0 and attack_planet.num_ships() < attack_planet.growth_rate()) and \
                     not reckless and not defensible(pw, attack_planet):
@@ -205,9 +224,10 @@ def expand(pw: planet_wars.PlanetWars, expand_limit: int = 99, possible_planets=
             quickest_planet = min(pw.my_planets(), key=lambda p: turn_to_take(pw, p, attack_planet))
 
             closest_distance = pw.map_size
-            for enemy_planet in pw.enemy_planets():
+            closest_enemy_planet = pw.nearest_planet(attack_planet.planet_id(), 2)
+            if closest_enemy_planet is not None:
                 closest_distance = min(closest_distance,
-                                       pw.distance(enemy_planet.planet_id(), attack_planet.planet_id()))
+                                       pw.distance(closest_enemy_planet.planet_id(), attack_planet.planet_id()))
             for enemy_planet in pw.enemy_future_neutrals:
                 closest_distance = min(closest_distance,
                                        pw.distance(enemy_planet.planet_id(), attack_planet.planet_id()) +
@@ -230,6 +250,7 @@ def expand(pw: planet_wars.PlanetWars, expand_limit: int = 99, possible_planets=
                     for t in range(pw.distance(quickest_planet.planet_id(), attack_planet.planet_id()) +
                                    pw.distance(attack_planet.planet_id(), planet.planet_id()), 2 * pw.map_size):
                         planet.my_maximum_ships[t] += attack_planet.growth_rate()
+                    planet.update_sums()
 
                 expand_limit -= 1
                 sorted_planets.remove(attack_planet)
@@ -241,6 +262,7 @@ def expand(pw: planet_wars.PlanetWars, expand_limit: int = 99, possible_planets=
             break
 
 
+@profiler.phase
 def defend(pw):
     """
     Defends against incoming ships ONLY. Doesn't care about any ships that might come.
@@ -250,35 +272,11 @@ def defend(pw):
 
     needs_defending = []
     for planet in pw.my_planets():
-        planet_id = planet.planet_id()
-        arriving_fleets = filter(lambda f: f.destination_planet() == planet_id, pw.fleets())
-        sorted_fleets = sorted(arriving_fleets, key=lambda f: f.turns_remaining())
-
-        first_oof = False
-        minimum_ships_data = [planet.num_ships(), 0]
-        cache_data = [planet.num_ships(), 0]  # (number of ships, turns past)
-        for index, fleet in enumerate(sorted_fleets):
-            cache_data[0] += planet.growth_rate() * (fleet.turns_remaining() - cache_data[1])
-            cache_data[0] += (-2 * fleet.owner() + 3) * fleet.num_ships()
-            cache_data[1] = fleet.turns_remaining()
-
-            try:
-                if cache_data[0] < minimum_ships_data[0] and \
-                        sorted_fleets[index + 1].turns_remaining() != cache_data[1]:
-                    minimum_ships_data = cache_data[:]
-            except IndexError:
-                # Note this is tricky logic. Above is an `and` statement, meaning the second part will only run if the
-                # first part is `True`. The second part is also the only part that can cause an `IndexError` therefore,
-                # we do not need to check if the first condition is `True` again.
-                minimum_ships_data = cache_data[:]
-            finally:
-                if cache_data[0] < 0 and not first_oof:
-                    first_oof = fleet.turns_remaining()
-
-        if minimum_ships_data[0] < 0:
-            needs_defending.append((planet, abs(minimum_ships_data[0]), minimum_ships_data[1], first_oof))
+        minimum_ships, minimum_turn, first_oof = planet.timeline.minimum_held(planet.num_ships())
+        if minimum_ships < 0:
+            needs_defending.append((planet, -minimum_ships, minimum_turn, first_oof))
         else:
-            planet.num_ships(minimum_ships_data[0])
+            planet.num_ships(minimum_ships)
 
     needs_defending_planets = frozenset(map(lambda x: x[0], needs_defending))
     needs_defending = sorted(needs_defending, key=lambda x: score_planet(pw, x[0]) / x[1], reverse=True)
@@ -307,6 +305,7 @@ def defend(pw):
                     defend_planet.remove_ships(defend_planet.num_ships())
 
 
+@profiler.phase
 def redistribute(pw):
     """
     Redistributes ships such that they are more active... well hopefully.
@@ -314,6 +313,7 @@ def redistribute(pw):
     :return: None
     """
 
+    enemy_future_targets = set(pw.enemy_future_neutrals).union(pw.enemy_future_planets)
     for planet in filter(lambda p: p.num_ships() > 0, pw.my_planets()):
         my_other_planets = filter(lambda p: p != planet, pw.my_planets())
         my_future_planets = filter(lambda p: pw.distance(planet.planet_id(), p.planet_id()) >=
@@ -323,8 +323,10 @@ def redistribute(pw):
                                        if pw.distance(planet.planet_id(), p.planet_id()) >= t}
         redistribute_planets = list(my_other_planets) + list(my_future_planets) + list(future_redistribute_planets)
         redistribute_planets = filter(lambda p: p not in pw.enemy_future_planets, redistribute_planets)
-        closest_planet = min(pw.enemy_planets() + list(pw.enemy_future_neutrals) + list(pw.enemy_future_planets),
-                             key=lambda p: pw.distance(p.planet_id(), planet.planet_id(), raw=True))
+        closest_planet = next((p for p in pw.neighbours(planet.planet_id())
+                               if p.owner() == 2 or p in enemy_future_targets), None)
+        if closest_planet is None:
+            return  # nothing of the enemy's to move towards, for any of the planets
         for other_planet in sorted(redistribute_planets, key=lambda p: pw.distance(closest_planet.planet_id(),
                                                                                    p.planet_id(), raw=True)):
             if pw.distance(planet.planet_id(), other_planet.planet_id()) > \
@@ -358,6 +360,7 @@ def redistribute(pw):
                 break
 
 
+@profiler.phase
 def defend_possible(pw):
     """
     defends against a possible all-out attack from the opponent.
@@ -368,11 +371,13 @@ def defend_possible(pw):
     for my_planet in pw.my_planets():
         lowest_ships = my_planet.num_ships()
         for turn in range(2, furthest_meaningful_planet(pw, my_planet, 2) + 1):
-            lowest_ships = min(sum(my_planet.my_maximum_ships[:turn - 1]) - sum(my_planet.enemy_maximum_ships[:turn]),
+            lowest_ships = min(utils.range_sum(my_planet.my_maximum_ships_sums, 0, turn - 1) -
+                               utils.range_sum(my_planet.enemy_maximum_ships_sums, 0, turn),
                                lowest_ships)
         my_planet.num_ships(max(lowest_ships, 0))
 
 
+@profiler.phase
 def attack(pw):
     """
     Attacks the opponent, actually cares about defenses though.
@@ -382,11 +387,10 @@ def attack(pw):
 
     enemy_planets = filter(lambda p: p not in pw.my_future_planets, pw.enemy_planets())
     for enemy_planet in sorted(enemy_planets, key=lambda p: score_planet(pw, p), reverse=True):
-        for my_planet in sorted(pw.my_planets(), key=lambda p: pw.distance(p.planet_id(), enemy_planet.planet_id())):
-            needed_ships = sum(enemy_planet.enemy_maximum_ships[:pw.distance(
-                my_planet.planet_id(), enemy_planet.planet_id())]) - \
-                           sum(enemy_planet.my_arriving_ships[:pw.distance(
-                               my_planet.planet_id(), enemy_planet.planet_id())])
+        for my_planet in pw.nearest_planets(enemy_planet.planet_id(), 1):
+            distance = pw.distance(my_planet.planet_id(), enemy_planet.planet_id())
+            needed_ships = utils.range_sum(enemy_planet.enemy_maximum_ships_sums, 0, distance) - \
+                utils.range_sum(enemy_planet.my_arriving_ships_sums, 0, distance)
             if my_planet.num_ships() > needed_ships:
                 pw.issue_order(my_planet.planet_id(), enemy_planet.planet_id(), needed_ships + 1)
                 my_planet.remove_ships(needed_ships + 1)
@@ -398,9 +402,9 @@ def attack(pw):
     enemy_planets = pw.enemy_future_neutrals
     for enemy_planet in sorted(filter(lambda p: p not in pw.my_future_planets, enemy_planets),
                                key=lambda p: score_planet(pw, p), reverse=True):
-        for my_planet in sorted(pw.my_planets(), key=lambda p: pw.distance(p.planet_id(), enemy_planet.planet_id())):
-            needed_ships = sum(enemy_planet.enemy_maximum_ships[:pw.distance(
-                my_planet.planet_id(), enemy_planet.planet_id())])
+        for my_planet in pw.nearest_planets(enemy_planet.planet_id(), 1):
+            needed_ships = utils.range_sum(enemy_planet.enemy_maximum_ships_sums, 0,
+                                           pw.distance(my_planet.planet_id(), enemy_planet.planet_id()))
             if my_planet.num_ships() > needed_ships and \
                     enemy_planets[enemy_planet][0] < pw.distance(my_planet.planet_id(), enemy_planet.planet_id()):
                 pw.issue_order(my_planet.planet_id(), enemy_planet.planet_id(), needed_ships + 1)
@@ -411,10 +415,11 @@ def attack(pw):
 
 
 def simple_take(pw, take_planet):
-    for planet in sorted(pw.my_planets(), key=lambda p: pw.distance(p.planet_id(), take_planet.planet_id())):
+    for planet in pw.nearest_planets(take_planet.planet_id(), 1):
         take_ships = 1 + take_planet.num_ships() + \
                      take_planet.growth_rate() * pw.distance(planet.planet_id(), take_planet.planet_id()) + \
-                     sum(planet.enemy_arriving_ships[:pw.distance(planet.planet_id(), take_planet.planet_id())])
+                     utils.range_sum(planet.enemy_arriving_ships_sums, 0,
+                                     pw.distance(planet.planet_id(), take_planet.planet_id()))
         if planet.num_ships() >= take_ships:
             pw.issue_order(planet.planet_id(), take_planet.planet_id(), take_ships)
             planet.remove_ships(take_ships)
@@ -423,13 +428,14 @@ def simple_take(pw, take_planet):
         return False
 
 
+@profiler.phase
 def cause_havoc(pw):
     global HAVOC_PLANET
 
     if HAVOC_PLANET[0] is not None:
         havoc_object = pw.get_planet(HAVOC_PLANET[0])
-        if sum(havoc_object.my_arriving_ships[:HAVOC_PLANET[1]]) > \
-                sum(havoc_object.enemy_maximum_ships[:HAVOC_PLANET[1]]):
+        if utils.range_sum(havoc_object.my_arriving_ships_sums, 0, HAVOC_PLANET[1]) > \
+                utils.range_sum(havoc_object.enemy_maximum_ships_sums, 0, HAVOC_PLANET[1]):
             HAVOC_PLANET = [None, 0]
         # elif sum(havoc_object.my_maximum_ships[:HAVOC_PLANET[1]]) <= \
         #         sum(havoc_object.enemy_maximum_ships[:HAVOC_PLANET[1]]):
@@ -438,18 +444,16 @@ def cause_havoc(pw):
     if HAVOC_PLANET[0] is None and pw.peaceful:
         for planet in sorted(filter(lambda p: p not in pw.my_future_planets, pw.enemy_planets()),
                              key=lambda p: score_planet(pw, p), reverse=True):
-            for t in range(furthest_meaningful_planet(pw, planet, 1) + 1):
-                if sum(planet.my_maximum_ships[:t]) > sum(planet.enemy_maximum_ships[:t]):
-                    HAVOC_PLANET = [planet.planet_id(), t]
-                    break
-            else:
-                continue
-            break
+            t = utils.first_exceeding(planet.my_maximum_ships_sums, planet.enemy_maximum_ships_sums,
+                                      range(furthest_meaningful_planet(pw, planet, 1) + 1))
+            if t is not None:
+                HAVOC_PLANET = [planet.planet_id(), t]
+                break
 
     if HAVOC_PLANET[0] is not None:
         targeted_planet = pw.get_planet(HAVOC_PLANET[0])
-        lacking_ships = sum(targeted_planet.enemy_maximum_ships[:HAVOC_PLANET[1]]) - \
-            sum(targeted_planet.my_arriving_ships[:HAVOC_PLANET[1]]) + 1
+        lacking_ships = utils.range_sum(targeted_planet.enemy_maximum_ships_sums, 0, HAVOC_PLANET[1]) - \
+            utils.range_sum(targeted_planet.my_arriving_ships_sums, 0, HAVOC_PLANET[1]) + 1
         for planet in filter(lambda p: pw.distance(p.planet_id(), HAVOC_PLANET[0]) == HAVOC_PLANET[1], pw.my_planets()):
             if lacking_ships <= 0:
                 return
@@ -461,17 +465,30 @@ def cause_havoc(pw):
             planet.num_ships(0)
 
 
-def do_turn(pw):
+@profiler.phase
+def do_turn(pw, turn_deadline: typing.Optional[deadline.Deadline] = None):
+    """
+    Plays one turn. Every phase but `defend()` is skipped, or replaced by a cheaper version, when `turn_deadline`
+    doesn't leave enough time for it.
+    :param pw: `PlanetWars` object
+    :param turn_deadline: `Deadline` object, None -> no time limit
+    :return: None
+    """
+
     global HAVOC_PLANET
     HAVOC_PLANET = [HAVOC_PLANET[0], HAVOC_PLANET[1] - 1] if HAVOC_PLANET[1] > 0 else [None, 0]
+    MEMO.start_turn()
+
+    if turn_deadline is None:
+        turn_deadline = deadline.Deadline()
 
     # don't go if ...
     if len(pw.my_planets()) == 0:
         return
 
     if len(pw.enemy_planets()) == 0:
-        defend(pw)
-        attack(pw)
+        turn_deadline.run_always("defend", defend, pw)
+        turn_deadline.run("attack", attack, pw)
         return
 
     # get global turn info
@@ -479,39 +496,42 @@ def do_turn(pw):
 
     # competition_mode ;)
     if COMPETITION_MODE and pw.peaceful and pw.time_result > -ACCEPT_DRAWS:
-        redistribute(pw)
+        turn_deadline.run("redistribute", redistribute, pw)
         return
 
     # cause havoc!
     if pw.time_result <= -ACCEPT_DRAWS or not COMPETITION_MODE:
-        cause_havoc(pw)
+        turn_deadline.run("cause_havoc", cause_havoc, pw)
 
-    # defend
-    defend(pw)
+    # defend, never skipped since that would give planets away
+    turn_deadline.run_always("defend", defend, pw)
 
     # attack!!
-    attack(pw)
+    turn_deadline.run("attack", attack, pw)
 
     # first redistribute
-    redistribute(pw)
+    turn_deadline.run("redistribute", redistribute, pw)
 
     # expand (if losing)
     if pw.turn > pw.map_size and pw.chilling and pw.time_result <= -ACCEPT_DRAWS:
         for l in range(pw.map_size):
-            expand(pw, expand_limit=1, possible_planets=filter(lambda p: p.latency > -l, pw.neutral_planets()),
-                   reckless=True)
+            if not turn_deadline.run("reckless_expand", expand, pw, expand_limit=1,
+                                     possible_planets=filter(lambda p: p.latency > -l, pw.neutral_planets()),
+                                     reckless=True, turn_deadline=turn_deadline):
+                break
             if pw.my_future_neutrals != {}:
                 break
 
-    # expand (if safe)
+    # expand (if safe). expanding without `defend_possible()` could give away planets, so both are skipped together.
     if pw.enemy_future_planets == {} and pw.time_result <= sum(map(lambda p: p.growth_rate(), pw.neutral_planets())):
-        defend_possible(pw)
-        expand(pw)
+        if turn_deadline.run("defend_possible", defend_possible, pw):
+            if not turn_deadline.run("expand", expand, pw, turn_deadline=turn_deadline):
+                turn_deadline.run("expand_one", expand, pw, expand_limit=1, turn_deadline=turn_deadline)
     elif pw.chilling and pw.turn > pw.map_size:
-        defend_possible(pw)
-        expand(pw, expand_limit=1)
+        if turn_deadline.run("defend_possible", defend_possible, pw):
+            turn_deadline.run("expand_one", expand, pw, expand_limit=1, turn_deadline=turn_deadline)
 
-    redistribute(pw)
+    turn_deadline.run("redistribute", redistribute, pw)
 
     # # trade down
     # if pw.turn > pw.distance(1, 2) and pw.time_result > 0 and \
@@ -522,19 +542,111 @@ def do_turn(pw):
     #         simple_take(pw, planet)
 
 
+def reset_state():
+    """
+    Reinitialises all per-game state without reporting anything, e.g. before every timed turn of a benchmark.
+    :return: None
+    """
+
+    global HAVOC_PLANET, MY_PLANETS_CENTER, ENEMY_PLANETS_CENTER
+    HAVOC_PLANET = [None, 0]
+    MY_PLANETS_CENTER = None
+    ENEMY_PLANETS_CENTER = None
+
+    planet_wars.PlanetWars.reset()
+
+
+def reset():
+    """
+    Reinitialises all per-game state, so that one warm process can play many games in a row, and reports the
+    statistics of the game that ended.
+    :return: None
+    """
+
+    reset_state()
+
+    deadline.Deadline.report()
+    deadline.Deadline.reset_statistics()
+    MEMO.report()
+    MEMO.reset_statistics()
+    profiler.summary()
+
+
+def new_recording(recorder: typing.Optional[replay.Recorder] = None) -> typing.Optional[replay.Recorder]:
+    """
+    Closes `recorder` and starts a new recording, if recording is enabled. Recording is given up, instead of taking
+    the bot down, when the recording can't be written.
+    :param recorder: `Recorder` object, None -> nothing to close
+    :return: `Recorder` object, None -> not recording
+    """
+
+    try:
+        if recorder is not None:
+            recorder.close()
+        return replay.open_recorder("bot")
+    except OSError as e:
+        utils.error_print("recording stopped: {!r}".format(e))
+        return None
+
+
+def record_turn(recorder: replay.Recorder, turn: int, state: str, orders) -> typing.Optional[replay.Recorder]:
+    """
+    Records a turn. A state on a different map, e.g. a new game without a reset, starts a new recording. Recording is
+    given up, instead of taking the bot down, when the recording can't be written.
+    :param recorder: `Recorder` object
+    :param turn: `int` the turn number
+    :param state: `str` the game state the bot received
+    :param orders: `list` of (source, destination, num_ships) orders
+    :return: `Recorder` object to record the next turn with, None -> stop recording
+    """
+
+    try:
+        recorder.record(turn, state, orders)
+        return recorder
+    except ValueError:
+        recorder = new_recording(recorder)
+    except OSError as e:
+        utils.error_print("recording stopped: {!r}".format(e))
+        return None
+
+    # the first turn on a new map
+    if recorder is not None:
+        try:
+            recorder.record(turn, state, orders)
+        except (OSError, ValueError) as e:
+            utils.error_print("recording stopped: {!r}".format(e))
+            return None
+    return recorder
+
+
 def main():
     pw = planet_wars.PlanetWars()
+    reader = planet_wars.GameStateReader()
+    recorder = new_recording()
     while True:
-        current_line = input()
+        records, current_line = reader.read_message()
+        turn_deadline = deadline.Deadline(TURN_TIME_LIMIT, TURN_TIME_RESERVE)
+        pw.parse_game_state(records)
         if len(current_line) >= 2 and current_line.startswith("go"):
             pw.initialise()
 
-            do_turn(pw)
+            turn = planet_wars.PlanetWars.turn
+            do_turn(pw, turn_deadline)
             pw.finish_turn()
 
+            overrun = turn_deadline.finish()
+            if overrun is not None:
+                utils.error_print("turn {}: {:.3f}s over the time limit".format(turn, overrun))
+            profiler.end_turn(planet_wars.PlanetWars.turn)
+            if recorder is not None:
+                recorder = record_turn(recorder, turn, records, pw.issued_orders())
+
+            pw.start_turn()
+        elif current_line.strip() == RESET_COMMAND:
+            reset()
             pw = planet_wars.PlanetWars()
-        else:
-            pw.parse_game_state(current_line)
+            if recorder is not None:
+                recorder = new_recording(recorder)
 
 
 if __name__ == '__main__':
@@ -542,3 +654,8 @@ if __name__ == '__main__':
         main()
     except KeyboardInterrupt:
         print('ctrl-c, leaving ...')
+    except EOFError:
+        # the harness closed stdin, e.g. when retiring a warm process
+        deadline.Deadline.report()
+        MEMO.report()
+        profiler.summary()
@@ -0,0 +1,114 @@
+"""
+file: deadline.py
+
+description: per-turn time budget. a `Deadline` is started when "go" arrives
+and every phase of the turn asks it for permission first. phases are only
+started if they took less time than what's left the last few times they ran,
+so expensive phases are skipped (or replaced by cheaper ones) on slow turns
+instead of timing out the whole turn. phases that can't be left out, such as
+defending our planets, are always run but still measured.
+"""
+
+import collections
+import time
+import typing
+
+import utils
+
+# how quickly a phase's estimated cost forgets a slow turn
+COST_DECAY: float = 0.9
+
+
+class Deadline:
+    # estimated cost of every phase in seconds, shared by all turns
+    phase_costs: typing.Dict[str, float] = {}
+
+    # statistics since the last `reset_statistics()`
+    turns: int = 0
+    overruns: int = 0
+    skipped_phases: typing.Counter[str] = collections.Counter()
+
+    def __init__(self, budget: typing.Optional[float] = None, reserve: float = 0):
+        """
+        :param budget: `float` seconds for the whole turn, `None` for no limit
+        :param reserve: `float` seconds at the end of the turn that phases may
+        not use, e.g. to write the orders
+        """
+
+        self.start: float = time.perf_counter()
+        self.budget: typing.Optional[float] = budget
+        self.end: float = self.start + budget - reserve if budget is not None else float("inf")
+
+    def remaining(self) -> float:
+        """
+        :return: `float` seconds left for phases, negative once they're used up
+        """
+
+        return self.end - time.perf_counter()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def allows(self, phase: str) -> bool:
+        """
+        whether `phase` is expected to finish in the time that's left. a phase
+        that's skipped is counted in `skipped_phases`.
+        :param phase: `str` name of the phase
+        :return: `bool`
+        """
+
+        if self.remaining() > Deadline.phase_costs.get(phase, 0):
+            return True
+        Deadline.skipped_phases[phase] += 1
+        return False
+
+    def run(self, phase: str, function: typing.Callable, *args, **kwargs) -> bool:
+        """
+        runs `function(*args, **kwargs)` if `allows(phase)` and updates the
+        phase's estimated cost.
+        :return: `bool` whether the phase was run
+        """
+
+        if not self.allows(phase):
+            return False
+        self.run_always(phase, function, *args, **kwargs)
+        return True
+
+    def run_always(self, phase: str, function: typing.Callable, *args, **kwargs) -> None:
+        """
+        runs `function(*args, **kwargs)` whatever the time that's left and
+        updates the phase's estimated cost.
+        """
+
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        cost = time.perf_counter() - start
+        Deadline.phase_costs[phase] = max(cost, COST_DECAY * Deadline.phase_costs.get(phase, 0))
+
+    def finish(self) -> typing.Optional[float]:
+        """
+        to be called once the turn is over, i.e. after the orders are written.
+        :return: `float` seconds over the budget, or `None` if it was kept
+        """
+
+        Deadline.turns += 1
+        if self.budget is None:
+            return None
+        overrun = time.perf_counter() - self.start - self.budget
+        if overrun <= 0:
+            return None
+        Deadline.overruns += 1
+        return overrun
+
+    @classmethod
+    def report(cls) -> None:
+        if cls.turns == 0:
+            return
+        utils.error_print("{} turns, {} over budget, skipped phases: {}".format(
+            cls.turns, cls.overruns, dict(cls.skipped_phases) or "none"))
+
+    @classmethod
+    def reset_statistics(cls) -> None:
+        cls.turns = 0
+        cls.overruns = 0
+        cls.skipped_phases = collections.Counter()
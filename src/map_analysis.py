@@ -0,0 +1,192 @@
+"""
+file: map_analysis.py
+
+description: static analysis of a map, i.e. everything that only depends on
+planet positions and growth rates. it is computed once per map and kept in
+memory. with `PLANET_WARS_MAP_CACHE` set to a directory, it is also persisted
+to a small on-disk store there (one file per map, keyed by a hash of the
+static part of the "P" lines) that is memory mapped when the same map is
+played again.
+"""
+
+import array
+import collections
+import hashlib
+import math
+import mmap
+import os
+import struct
+import typing
+
+import utils
+
+# on-disk store, `None` keeps the analysis in memory only
+CACHE_DIRECTORY: typing.Optional[str] = os.environ.get("PLANET_WARS_MAP_CACHE") or None
+
+# analyses of the most recently seen maps, keyed by `map_fingerprint()`
+MAXIMUM_CACHED_MAPS: int = 16
+_analyses: "collections.OrderedDict[str, MapAnalysis]" = collections.OrderedDict()
+
+# file layout: header, then the double arrays, then the int arrays
+_MAGIC: bytes = b"PWMA"
+_VERSION: int = 1
+_HEADER = struct.Struct("<4sIIIq")  # magic, version, num_planets, map_size, total_growth
+_INT_SIZE: int = array.array("i").itemsize
+_DOUBLE_SIZE: int = array.array("d").itemsize
+
+
+def map_fingerprint(planets) -> str:
+    """
+    hash of the parts of the "P" lines that never change during a game.
+    :param planets: `list` of `Planet` objects
+    :return: `str` hex digest
+    """
+
+    return hashlib.sha1("".join("{!r} {!r} {}\n".format(p.x(), p.y(), p.growth_rate())
+                                for p in planets).encode()).hexdigest()
+
+
+class MapAnalysis:
+    """
+    all arrays are flat and indexed by planet id; the matrices are row major,
+    i.e. `distances[source * num_planets + destination]`.
+    """
+
+    def __init__(self, fingerprint: str, num_planets: int, map_size: int, total_growth: int,
+                 raw_distances: typing.Sequence[float], surrounding_scores: typing.Sequence[float],
+                 center_scores: typing.Sequence[float], distances: typing.Sequence[int],
+                 neighbours: typing.Sequence[int]):
+        self.fingerprint: str = fingerprint
+        self.num_planets: int = num_planets
+        self.map_size: int = map_size
+        self.total_growth: int = total_growth
+
+        self.raw_distances: typing.Sequence[float] = raw_distances
+        self.distances: typing.Sequence[int] = distances
+        # growth weighted closeness of the other planets, see `MyBot.score_planet()`
+        self.surrounding_scores: typing.Sequence[float] = surrounding_scores
+        # closeness to the center planet (planet 0)
+        self.center_scores: typing.Sequence[float] = center_scores
+        # planet ids ordered by distance from each planet, starting with the planet itself
+        self.neighbours: typing.Sequence[int] = neighbours
+
+    def neighbours_of(self, planet_id: int) -> typing.Sequence[int]:
+        start = planet_id * self.num_planets
+        return memoryview(self.neighbours)[start:start + self.num_planets]
+
+    def save(self, path: str) -> None:
+        arrays = (self.raw_distances, self.surrounding_scores, self.center_scores,
+                  self.distances, self.neighbours)
+
+        temporary_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(temporary_path, "wb") as cache_file:
+            cache_file.write(_HEADER.pack(_MAGIC, _VERSION, self.num_planets, self.map_size, self.total_growth))
+            for values, type_code in zip(arrays, "dddii"):
+                cache_file.write(array.array(type_code, values).tobytes())
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str, fingerprint: str) -> typing.Optional["MapAnalysis"]:
+        """
+        memory maps a saved analysis; nothing is copied until it is used.
+        :return: `MapAnalysis` object, or `None` if the file is missing or invalid
+        """
+
+        try:
+            with open(path, "rb") as cache_file:
+                data = memoryview(mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ))
+        except (OSError, ValueError):
+            return None
+
+        if len(data) < _HEADER.size:
+            return None
+        magic, version, num_planets, map_size, total_growth = _HEADER.unpack(data[:_HEADER.size])
+        if magic != _MAGIC or version != _VERSION:
+            return None
+
+        sizes = ((num_planets ** 2, "d"), (num_planets, "d"), (num_planets, "d"),
+                 (num_planets ** 2, "i"), (num_planets ** 2, "i"))
+        arrays = []
+        offset = _HEADER.size
+        for length, type_code in sizes:
+            end = offset + length * (_DOUBLE_SIZE if type_code == "d" else _INT_SIZE)
+            if end > len(data):
+                return None
+            arrays.append(data[offset:end].cast(type_code))
+            offset = end
+
+        return cls(fingerprint, num_planets, map_size, total_growth, *arrays)
+
+
+def _compute(planets, fingerprint: str) -> MapAnalysis:
+    num_planets = len(planets)
+    map_size = 2 * math.ceil(utils.distance(0, 0, planets[0].x(), planets[0].y()))
+    total_growth = sum(p.growth_rate() for p in planets)
+
+    raw_distances = array.array("d", (utils.distance(source.x(), source.y(), destination.x(), destination.y())
+                                      for source in planets for destination in planets))
+    distances = array.array("i", (int(math.ceil(d)) for d in raw_distances))
+
+    # `map_size` is 0 when planet 0 isn't the center but sits at the origin
+    scale = map_size or 1
+
+    surrounding_scores = array.array("d")
+    center_scores = array.array("d")
+    neighbours = array.array("i")
+    for planet in planets:
+        row = planet.planet_id() * num_planets
+
+        surrounding_score = 0
+        for other_planet in planets:
+            if other_planet is planet:
+                continue
+            temp = (1 - (distances[row + other_planet.planet_id()] / scale)) ** 5
+            surrounding_score += other_planet.growth_rate() * temp
+        # without any growth on the map, every surrounding score is 0
+        surrounding_scores.append(surrounding_score / total_growth if total_growth != 0 else 0.0)
+
+        center_scores.append(1 - (distances[row] / scale))
+
+        neighbours.extend(sorted(range(num_planets), key=lambda i: (raw_distances[row + i], i)))
+
+    return MapAnalysis(fingerprint, num_planets, map_size, total_growth, raw_distances, surrounding_scores,
+                       center_scores, distances, neighbours)
+
+
+def analyse(planets) -> MapAnalysis:
+    """
+    static analysis of the map made up of `planets`, from memory, from disk or
+    computed (and saved) as a last resort.
+    :param planets: `list` of `Planet` objects, indexed by planet id
+    :return: `MapAnalysis` object
+    """
+
+    fingerprint = map_fingerprint(planets)
+    try:
+        _analyses.move_to_end(fingerprint)
+        return _analyses[fingerprint]
+    except KeyError:
+        pass
+
+    path = None
+    analysis = None
+    if CACHE_DIRECTORY is not None:
+        path = os.path.join(CACHE_DIRECTORY, fingerprint + ".bin")
+        analysis = MapAnalysis.load(path, fingerprint)
+        if analysis is not None and analysis.num_planets != len(planets):
+            analysis = None
+
+    if analysis is None:
+        analysis = _compute(planets, fingerprint)
+        if path is not None:
+            try:
+                os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+                analysis.save(path)
+            except OSError:
+                # the store is only an optimisation
+                pass
+
+    _analyses[fingerprint] = analysis
+    if len(_analyses) > MAXIMUM_CACHED_MAPS:
+        _analyses.popitem(last=False)
+    return analysis
@@ -0,0 +1,88 @@
+"""
+file: memo.py
+
+description: per-turn memoization of the bot's helper functions, which are
+called many times with the same planets in one turn. every result is stored
+with the planets it depends on and their `PlanetColumns.versions` at the time,
+which change whenever a planet's ships (`num_ships()`, `remove_ships()`, ...)
+or projections (`update_sums()`) change. a result is only recomputed if one of
+its own planets changed, so issuing an order and removing its ships from the
+source only affects the results that involve the source. `start_turn()` drops
+everything, e.g. the latencies and centers that are only set once per turn.
+"""
+
+import collections
+import functools
+import typing
+
+import utils
+
+
+class Memo:
+    """
+    the caches and statistics of one module's memoized functions. every copy
+    of the bot that `engine.load_bot()` loads has its own, which goes away
+    with it, so no copy clears or keeps alive the caches of another.
+    """
+
+    def __init__(self):
+        # one dict per function, arguments -> [`PlanetColumns.ships_version`, planet ids, their versions, result].
+        # the results are valid without looking at their planets as long as no planet has changed at all.
+        self.caches: typing.List[dict] = []
+
+        # statistics since the last `reset_statistics()`
+        self.hits: typing.Counter[str] = collections.Counter()
+        self.misses: typing.Counter[str] = collections.Counter()
+
+    def per_turn(self, dependencies: typing.Callable[..., typing.Iterable]) -> typing.Callable:
+        """
+        decorator for functions taking a `PlanetWars` object and hashable
+        arguments, e.g. `Planet` objects.
+        :param dependencies: `function` taking the same arguments, returning the
+        `Planet` objects whose ships or projections the result depends on
+        """
+
+        def decorator(function: typing.Callable) -> typing.Callable:
+            name = function.__name__
+            cache = {}
+            self.caches.append(cache)
+
+            @functools.wraps(function)
+            def wrapper(pw, *args):
+                columns = pw.columns
+                entry = cache.get(args)
+                if entry is not None:
+                    if entry[0] == columns.ships_version:
+                        self.hits[name] += 1
+                        return entry[3]
+                    versions = columns.versions
+                    if all(versions[i] == v for i, v in zip(entry[1], entry[2])):
+                        entry[0] = columns.ships_version
+                        self.hits[name] += 1
+                        return entry[3]
+
+                self.misses[name] += 1
+                planet_ids = [p.planet_id() for p in dependencies(pw, *args)]
+                planet_versions = [columns.versions[i] for i in planet_ids]
+                result = function(pw, *args)
+                cache[args] = [columns.ships_version, planet_ids, planet_versions, result]
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def start_turn(self) -> None:
+        for cache in self.caches:
+            cache.clear()
+
+    def report(self) -> None:
+        hits, misses = self.hits, self.misses
+        if not hits and not misses:
+            return
+        utils.error_print("memo hits/misses: {}".format(
+            ", ".join("{} {}/{}".format(name, hits[name], misses[name]) for name in sorted(set(hits) | set(misses)))))
+
+    def reset_statistics(self) -> None:
+        self.hits = collections.Counter()
+        self.misses = collections.Counter()
@@ -5,10 +5,16 @@ description: contains all `PlanetWars` related code. partially provided by the
 contest organizers but heavily modified.
 """
 
-import math
+import array
+import itertools
+import operator
+import os
+import re
 import sys
 import typing
 
+import map_analysis
+import profiler
 import utils
 
 TOTAL_TURNS: int = 200
@@ -20,6 +26,9 @@ SHIPS_LIST = typing.List[int]
 
 
 class Fleet:
+    __slots__ = ("_owner", "_num_ships", "_source_planet", "_destination_planet", "_total_trip_length",
+                 "_turns_remaining")
+
     def __init__(self, owner: int, num_ships: int, source_planet: int,
                  destination_planet: int, total_trip_length: int,
                  turns_remaining: int):
@@ -48,10 +57,57 @@ class Fleet:
     def turns_remaining(self) -> int:
         return self._turns_remaining
 
+    def advance(self) -> None:
+        self._turns_remaining -= 1
+
+
+class PlanetColumns:
+    """
+    struct-of-arrays copy of a map's planets, indexed by planet id, for code
+    that works on all planets at once. `Planet` objects write through to it,
+    everything else should only read it.
+    """
+
+    __slots__ = ("owners", "num_ships", "growth_rates", "xs", "ys", "owners_version", "versions", "ships_version")
+
+    def __init__(self):
+        self.owners: array.array = array.array("q")
+        self.num_ships: array.array = array.array("q")
+        self.growth_rates: array.array = array.array("q")
+        self.xs: array.array = array.array("d")
+        self.ys: array.array = array.array("d")
+        # changes whenever a planet changes owner
+        self.owners_version: int = 0
+        # change whenever a planet's ships or projections change, see `memo.py`
+        self.versions: array.array = array.array("q")
+        self.ships_version: int = 0  # any planet's
+
+    def __len__(self) -> int:
+        return len(self.owners)
+
+    def append(self, planet: "Planet") -> None:
+        self.owners.append(planet.owner())
+        self.num_ships.append(planet.num_ships())
+        self.growth_rates.append(planet.growth_rate())
+        self.xs.append(planet.x())
+        self.ys.append(planet.y())
+        self.versions.append(0)
+        self.owners_version += 1
+
+    def truncate(self, length: int) -> None:
+        for column in (self.owners, self.num_ships, self.growth_rates, self.xs, self.ys, self.versions):
+            del column[length:]
+        self.owners_version += 1
+
 
 class Planet:
+    __slots__ = ("_planet_id", "_owner", "_num_ships", "_growth_rate", "_x", "_y", "_columns", "dying",
+                 "my_maximum_ships", "enemy_maximum_ships", "my_arriving_ships", "enemy_arriving_ships", "latency",
+                 "arriving_fleets", "my_maximum_ships_sums", "enemy_maximum_ships_sums", "my_arriving_ships_sums",
+                 "enemy_arriving_ships_sums", "timeline")
+
     def __init__(self, planet_id: int, owner: int, num_ships: int,
-                 growth_rate: int, x: float, y: float):
+                 growth_rate: int, x: float, y: float, columns: typing.Optional[PlanetColumns] = None):
         self._planet_id: int = planet_id
         self._owner: int = owner
         self._num_ships: int = num_ships
@@ -59,6 +115,10 @@ class Planet:
         self._x: float = x
         self._y: float = y
 
+        self._columns: typing.Optional[PlanetColumns] = columns
+        if columns is not None:
+            columns.append(self)
+
         self.dying = False
 
         # to be defined later in `PlanetWars`
@@ -68,18 +128,36 @@ class Planet:
         self.enemy_arriving_ships: SHIPS_LIST = []
         self.latency = 0
 
+        # to be defined in `PlanetWars.initialise()`, sorted by turns remaining
+        self.arriving_fleets: FLEET_LIST = []
+        # to be defined in `PlanetWars._get_timelines()`
+        self.timeline: typing.Optional[Timeline] = None
+
+        # prefix sums of the above, see `update_sums()`
+        self.my_maximum_ships_sums: SHIPS_LIST = [0]
+        self.enemy_maximum_ships_sums: SHIPS_LIST = [0]
+        self.my_arriving_ships_sums: SHIPS_LIST = [0]
+        self.enemy_arriving_ships_sums: SHIPS_LIST = [0]
+
     def planet_id(self) -> int:
         return self._planet_id
 
     def owner(self, new_owner: typing.Optional[int] = None) -> typing.Optional[int]:
         if new_owner is None:
             return self._owner
+        if self._columns is not None and new_owner != self._owner:
+            self._columns.owners[self._planet_id] = new_owner
+            self._columns.owners_version += 1
         self._owner = new_owner
 
     def num_ships(self, new_num_ships: typing.Optional[int] = None) -> typing.Optional[int]:
         if new_num_ships is None:
             return self._num_ships
         self._num_ships = new_num_ships
+        if self._columns is not None:
+            self._columns.num_ships[self._planet_id] = new_num_ships
+            self._columns.versions[self._planet_id] += 1
+            self._columns.ships_version += 1
 
     def growth_rate(self) -> int:
         return self._growth_rate
@@ -90,25 +168,229 @@ class Planet:
     def y(self) -> float:
         return self._y
 
+    # these write the fields directly instead of going through `num_ships()`,
+    # they are called for every order and every turn of a simulated game
     def add_ships(self, amount: int) -> None:
         self._num_ships += amount
+        columns = self._columns
+        if columns is not None:
+            columns.num_ships[self._planet_id] = self._num_ships
+            columns.versions[self._planet_id] += 1
+            columns.ships_version += 1
 
     def remove_ships(self, amount: int) -> None:
         self._num_ships -= amount
+        columns = self._columns
+        if columns is not None:
+            columns.num_ships[self._planet_id] = self._num_ships
+            columns.versions[self._planet_id] += 1
+            columns.ships_version += 1
+
+    def update_sums(self) -> None:
+        """
+        recomputes the prefix sums of the projections. needs to be called
+        whenever a projection is changed.
+        """
+
+        self.my_maximum_ships_sums = utils.prefix_sums(self.my_maximum_ships)
+        self.enemy_maximum_ships_sums = utils.prefix_sums(self.enemy_maximum_ships)
+        self.my_arriving_ships_sums = utils.prefix_sums(self.my_arriving_ships)
+        self.enemy_arriving_ships_sums = utils.prefix_sums(self.enemy_arriving_ships)
+        if self._columns is not None:
+            self._columns.versions[self._planet_id] += 1
+            self._columns.ships_version += 1
+
+
+class Timeline:
+    """
+    the exact future of a planet if no more fleets are sent, with the rules of
+    the engine: every turn an owned planet grows, then the fleets arrive and
+    the largest force (including the planet's ships) wins and keeps the
+    difference to the second largest force. a tie leaves the planet with its
+    owner and no ships. the state after any number of turns is found in O(1).
+    """
+
+    __slots__ = ("owners", "ships", "growth_rate", "events", "balances")
+
+    def __init__(self, planet: Planet):
+        """
+        :param planet: `Planet` object with its `arriving_fleets`
+        """
+
+        owner = planet.owner()
+        num_ships = planet.num_ships()
+        self.growth_rate: int = planet.growth_rate()
+
+        # owner and ships after every turn until the last arrival
+        self.owners: typing.List[int] = [owner]
+        self.ships: SHIPS_LIST = [num_ships]
+        # (turn, owner, num_ships) after every turn with arrivals
+        self.events: typing.List[typing.Tuple[int, int, int]] = []
+        # (turn, ships gained by the current owner) after every turn with
+        # arrivals, as if the planet is never taken, see `minimum_held()`
+        self.balances: typing.List[typing.Tuple[int, int]] = []
+
+        balance = 0
+        fleets = planet.arriving_fleets
+        index = 0
+        while index < len(fleets):
+            turn = fleets[index].turns_remaining()
+
+            # the turns in between only grow the planet
+            elapsed = turn - len(self.ships) + 1
+            self.owners.extend(itertools.repeat(owner, elapsed - 1))
+            if owner == 0 or self.growth_rate == 0:
+                self.ships.extend(itertools.repeat(num_ships, elapsed - 1))
+            else:
+                self.ships.extend(range(num_ships + self.growth_rate, num_ships + elapsed * self.growth_rate,
+                                        self.growth_rate))
+                num_ships += elapsed * self.growth_rate
+
+            if self.owners[0] != 0:
+                balance += elapsed * self.growth_rate
+
+            forces = {owner: num_ships}
+            arrivals = {}
+            while index < len(fleets) and fleets[index].turns_remaining() == turn:
+                fleet = fleets[index]
+                forces[fleet.owner()] = forces.get(fleet.owner(), 0) + fleet.num_ships()
+                arrivals[fleet.owner()] = arrivals.get(fleet.owner(), 0) + fleet.num_ships()
+                index += 1
+            balance += arrivals.pop(self.owners[0], 0) - max(arrivals.values(), default=0)
+            self.balances.append((turn, balance))
+            ordered = sorted(forces.items(), key=lambda kv: kv[1], reverse=True) + [(0, 0)]
+            (winner, winner_ships), (_, second_ships) = ordered[0], ordered[1]
+            if winner_ships > second_ships:
+                owner = winner
+                num_ships = winner_ships - second_ships
+            else:
+                num_ships = 0
+
+            self.owners.append(owner)
+            self.ships.append(num_ships)
+            self.events.append((turn, owner, num_ships))
+
+    def owner(self, turn: int) -> int:
+        """
+        :param turn: `int` number of turns from now
+        :return: `int` owner of the planet after `turn` turns
+        """
+
+        if turn < len(self.owners):
+            return self.owners[turn]
+        return self.owners[-1]
+
+    def num_ships(self, turn: int) -> int:
+        """
+        :param turn: `int` number of turns from now
+        :return: `int` ships on the planet after `turn` turns
+        """
+
+        if turn < len(self.ships):
+            return self.ships[turn]
+        if self.owners[-1] == 0:
+            return self.ships[-1]
+        return self.ships[-1] + (turn - len(self.ships) + 1) * self.growth_rate
+
+    def first_change(self) -> typing.Optional[typing.Tuple[int, int, int]]:
+        """
+        :return: (turn, owner, num_ships) right after the planet first changes
+        owner, or `None` if it keeps its owner
+        """
+
+        for event in self.events:
+            if event[1] != self.owners[0]:
+                return event
+        return None
+
+    def minimum_held(self, num_ships: int) -> typing.Tuple[int, int, typing.Optional[int]]:
+        """
+        the planet as held by its current owner if it's never taken.
+        :param num_ships: `int` ships kept on the planet now, which may be less
+        than it started the turn with
+        :return: (fewest ships after any arrival, turn of that arrival, first
+        turn with fewer than zero ships or `None`)
+        """
+
+        minimum = (num_ships, 0)
+        first_lost = None
+        for turn, balance in self.balances:
+            if num_ships + balance < minimum[0]:
+                minimum = (num_ships + balance, turn)
+            if first_lost is None and num_ships + balance < 0:
+                first_lost = turn
+        return minimum[0], minimum[1], first_lost
 
 
 class PlanetWars:
     turn = 0
-    _distance_cache = {}
 
     def __init__(self):
         self._planets: PLANET_LIST = []
         self._fleets: FLEET_LIST = []
+        self.columns: PlanetColumns = PlanetColumns()
 
         self._planet_id_counter: int = 0
         self._temporary_fleets = {}
 
         self._issued_orders = {}
+        # orders kept exactly as issued, see `issue_raw_order()`
+        self._raw_orders: typing.List[typing.Tuple[int, int, int]] = []
+        # fleet lines of each owner in the game state, see `num_sent_fleets()`
+        self._sent_fleets: typing.Dict[int, int] = {}
+
+        # planets and fleets by owner, built when first needed and dropped
+        # whenever they change. the lists are shared and must not be modified.
+        self._planets_by_owner: typing.Optional[typing.Dict[int, PLANET_LIST]] = None
+        self._owners_version: int = -1
+        self._not_my_planets: PLANET_LIST = []
+        self._fleets_by_owner: typing.Optional[typing.Dict[int, FLEET_LIST]] = None
+
+        # source planet id -> its distances, proxies and first hops, see `_first_hop()`
+        self._routes: typing.Dict[int, tuple] = {}
+        self._routes_version: int = -1
+
+        # to be defined in `initialise()`
+        self.analysis: typing.Optional[map_analysis.MapAnalysis] = None
+        self._distances: typing.Sequence[int] = ()
+        self._raw_distances: typing.Sequence[float] = ()
+
+        # kept between turns when the object is reused with `start_turn()`
+        self._map_changed: bool = True
+        self._planet_tokens: typing.List[typing.Tuple[str, str, str]] = []  # (x, y, growth_rate)
+        self._advanced_fleets: typing.Dict[typing.Tuple[int, int, int], Fleet] = {}
+        # fleet ships by (owner, destination, turns_remaining) and the arriving
+        # ships they add up to, indexed by [owner - 1][planet_id]
+        self._fleet_ships: typing.Dict[typing.Tuple[int, int, int], int] = {}
+        self._arriving_ships: typing.List[typing.List[SHIPS_LIST]] = [[], []]
+        # growth of each player's planets arriving at every planet, indexed by
+        # [owner - 1][planet_id], and the planets it is made up of
+        self._growth_ramps: typing.List[typing.List[SHIPS_LIST]] = [[], []]
+        self._growth_sources: typing.List[typing.Set[int]] = [set(), set()]
+        self._distance_rows: typing.List[typing.List[int]] = []
+        self._arrival_turns: typing.List[typing.List[int]] = []
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.turn = 0
+
+    def start_turn(self) -> None:
+        """
+        gets the object ready to parse the next game state, so it can be kept
+        for a whole game instead of being rebuilt every turn. planets are
+        updated in place, fleets that only moved are reused and the
+        projections of `_get_info()` are updated from what changed.
+        """
+
+        self._advanced_fleets = {(f.owner(), f.destination_planet(), f.turns_remaining() - 1): f
+                                 for f in self._fleets}
+        self._planet_id_counter = 0
+        self._fleets = []
+        self._fleets_by_owner = None
+        self._temporary_fleets = {}
+        self._issued_orders = {}
+        self._raw_orders = []
+        self._sent_fleets = {}
 
     def num_planets(self) -> int:
         return len(self._planets)
@@ -122,29 +404,57 @@ class PlanetWars:
     def get_fleet(self, fleet_id: int) -> Fleet:
         return self._fleets[fleet_id]
 
+    def num_sent_fleets(self, player_id: int) -> int:
+        """
+        the number of fleets of `player_id` in the game state, counted like the
+        java starter package does: unlike `fleets()`, empty fleets are included
+        and fleets with the same destination and arrival turn aren't merged.
+        """
+
+        return self._sent_fleets.get(player_id, 0)
+
+    def _planet_views(self) -> typing.Dict[int, PLANET_LIST]:
+        if self._planets_by_owner is None or self._owners_version != self.columns.owners_version:
+            planets_by_owner = {0: [], 1: [], 2: []}
+            for planet in self._planets:
+                planets_by_owner.setdefault(planet.owner(), []).append(planet)
+            self._planets_by_owner = planets_by_owner
+            self._owners_version = self.columns.owners_version
+            self._not_my_planets = [p for p in self._planets if p.owner() != 1]
+        return self._planets_by_owner
+
+    def _fleet_views(self) -> typing.Dict[int, FLEET_LIST]:
+        if self._fleets_by_owner is None:
+            fleets_by_owner = {1: [], 2: []}
+            for fleet in self._fleets:
+                fleets_by_owner.setdefault(fleet.owner(), []).append(fleet)
+            self._fleets_by_owner = fleets_by_owner
+        return self._fleets_by_owner
+
     def planets(self) -> PLANET_LIST:
         return self._planets
 
     def my_planets(self) -> PLANET_LIST:
-        return list(filter(lambda p: p.owner() == 1, self._planets))
+        return self._planet_views()[1]
 
     def neutral_planets(self) -> PLANET_LIST:
-        return list(filter(lambda p: p.owner() == 0, self._planets))
+        return self._planet_views()[0]
 
     def enemy_planets(self) -> PLANET_LIST:
-        return list(filter(lambda p: p.owner() == 2, self._planets))
+        return self._planet_views()[2]
 
     def not_my_planets(self) -> PLANET_LIST:
-        return list(filter(lambda p: p.owner() != 1, self._planets))
+        self._planet_views()
+        return self._not_my_planets
 
     def fleets(self) -> FLEET_LIST:
         return self._fleets
 
     def my_fleets(self) -> FLEET_LIST:
-        return list(filter(lambda f: f.owner() == 1, self._fleets))
+        return self._fleet_views()[1]
 
     def enemy_fleets(self) -> FLEET_LIST:
-        return list(filter(lambda f: f.owner() == 2, self._fleets))
+        return self._fleet_views()[2]
 
     def to_string(self) -> str:
         string = ""
@@ -168,196 +478,394 @@ class PlanetWars:
         return string
 
     def distance(self, source_planet: int, destination_planet: int, raw: bool = False) -> typing.Union[int, float]:
+        if raw:
+            return self._raw_distances[source_planet * len(self._planets) + destination_planet]
+        return self._distances[source_planet * len(self._planets) + destination_planet]
+
+    def distances_from(self, planet_id: int, raw: bool = False) -> memoryview:
+        """
+        all distances from `planet_id`, indexed by planet id.
+        :param planet_id: `int` planet id
+        :param raw: `bool` whether to return the exact (not rounded up) distances
+        :return: `memoryview` row of the distance matrix
+        """
+
+        start = planet_id * len(self._planets)
+        return memoryview(self._raw_distances if raw else self._distances)[start:start + len(self._planets)]
+
+    def neighbours(self, planet_id: int) -> typing.Iterator[Planet]:
+        """
+        all planets from the closest to `planet_id` to the furthest, using the
+        per-map ordering of `MapAnalysis.neighbours`. planets are ordered by
+        their exact distance, so of two planets that `distance()` rounds up to
+        the same number of turns the nearer one comes first.
+        :param planet_id: `int` planet id
+        :return: iterator of `Planet` objects, starting with the planet itself,
+        ties of the exact distance by planet id
+        """
+
+        planets = self._planets
+        return (planets[i] for i in self.analysis.neighbours_of(planet_id))
+
+    def nearest_planets(self, planet_id: int, owner: int, k: typing.Optional[int] = None) -> PLANET_LIST:
+        """
+        :param planet_id: `int` planet id
+        :param owner: `int` owner of the planets to find
+        :param k: `int` maximum number of planets, `None` for all of them
+        :return: `list` of `Planet` objects owned by `owner`, closest first,
+        including `planet_id` itself if `owner` owns it
+        """
+
+        planets = (p for p in self.neighbours(planet_id) if p.owner() == owner)
+        return list(itertools.islice(planets, k))
+
+    def nearest_planet(self, planet_id: int, owner: int) -> typing.Optional[Planet]:
+        """
+        same as `nearest_planets()`, but only finds the closest planet.
+        :return: `Planet` object, or `None` if `owner` has no planets
+        """
+
+        return next((p for p in self.neighbours(planet_id) if p.owner() == owner), None)
+
+    def _first_hop(self, source_planet: int, destination_planet: int) -> int:
+        """
+        where an order from `source_planet` is sent to with `proxy`: the
+        closest of our other planets that isn't out of the way, i.e. the trip
+        through it is no longer, or else the destination itself. the routes are
+        kept until a planet changes owner, along with our other planets sorted
+        by distance from each source.
+        :param source_planet: `int` planet id
+        :param destination_planet: `int` planet id
+        :return: `int` planet id
+        """
+
+        if self._routes_version != self.columns.owners_version:
+            self._routes = {}
+            self._routes_version = self.columns.owners_version
+
+        routes = self._routes.get(source_planet)
+        if routes is None:
+            distances = self.distances_from(source_planet)
+            # closest first, ties by planet id
+            proxies = sorted((p.planet_id() for p in self.my_planets() if p.planet_id() != source_planet),
+                             key=distances.__getitem__)
+            routes = self._routes[source_planet] = (
+                distances, [(p, distances[p], self.distances_from(p)) for p in proxies], {})
+
+        distances, proxies, first_hops = routes
         try:
-            return PlanetWars._distance_cache[tuple(sorted((source_planet, destination_planet)))][raw]
+            return first_hops[destination_planet]
         except KeyError:
-            source = self._planets[source_planet]
-            destination = self._planets[destination_planet]
-            raw_distance = utils.distance(source.x(), source.y(), destination.x(), destination.y())
-            distance = int(math.ceil(raw_distance))
-
-            PlanetWars._distance_cache[tuple(sorted((source_planet, destination_planet)))] = (distance, raw_distance)
-            return raw_distance if raw else distance
+            distance = distances[destination_planet]
+            first_hop = first_hops[destination_planet] = next(
+                (p for p, to_proxy, from_proxy in proxies
+                 if p != destination_planet and to_proxy + from_proxy[destination_planet] <= distance),
+                destination_planet)
+            return first_hop
 
     def issue_order(self, source_planet: int, destination_planet: int, num_ships: int, proxy: bool = True) -> None:
         if num_ships == 0 or source_planet == destination_planet:
             return
 
-        key = (source_planet, destination_planet)
-
         if proxy:
-            initial_distance = self.distance(source_planet, destination_planet)
-            other_planets = list(filter(lambda p: p.planet_id() not in key and
-                                                  self.distance(source_planet, p.planet_id()) +
-                                                  self.distance(p.planet_id(), destination_planet) <= initial_distance,
-                                        self.my_planets()))
-            if other_planets:
-                other_planet = min(other_planets, key=lambda p: self.distance(source_planet, p.planet_id()))
-                key = (source_planet, other_planet.planet_id())
+            destination_planet = self._first_hop(source_planet, destination_planet)
+        key = (source_planet, destination_planet)
 
         try:
             self._issued_orders[key] += num_ships
         except KeyError:
             self._issued_orders[key] = num_ships
 
+    def issue_raw_order(self, source_planet: int, destination_planet: int, num_ships: int) -> None:
+        """
+        issues an order exactly as given, like `IssueOrder()` of the java
+        starter package: unlike `issue_order()`, empty orders are sent and
+        orders between the same planets aren't merged.
+        """
+
+        self._raw_orders.append((source_planet, destination_planet, num_ships))
+
     def is_alive(self, player_id: int) -> bool:
-        return any(map(lambda p: p.owner() == player_id, self._planets)) or \
-               any(map(lambda f: f.owner() == player_id, self._fleets))
+        return bool(self._planet_views().get(player_id)) or bool(self._fleet_views().get(player_id))
 
+    @profiler.phase
     def parse_game_state(self, input_string: str) -> bool:
-        lines = input_string.split("\n")
+        """
+        parses "P" and "F" records. the records of each type are converted
+        column by column rather than line by line, so it pays to pass whole
+        messages, e.g. from `GameStateReader`. a single line takes a cheaper
+        path of its own.
+        :param input_string: `str` any number of lines
+        :return: `bool` whether every line was valid, invalid lines are skipped
+        """
+
+        if "\n" not in input_string:
+            return self._parse_line(input_string)
 
-        for line in lines:
+        lines = input_string.split("\n")
+        if "#" in input_string:
+            lines = [line.split("#")[0] for line in lines]  # remove comments
+
+        planet_lines = [line for line in lines if line.startswith("P ")]
+        fleet_lines = [line for line in lines if line.startswith("F ")]
+        planet_tokens = " ".join(planet_lines).split(" ") if planet_lines else []
+        fleet_tokens = " ".join(fleet_lines).split(" ") if fleet_lines else []
+
+        # lines with the wrong number of tokens or of an unknown type
+        valid = len(planet_tokens) == 6 * len(planet_lines) and len(fleet_tokens) == 7 * len(fleet_lines) and \
+            sum(" " in line for line in lines) == len(planet_lines) + len(fleet_lines)
+        if not valid:
+            planet_lines = [line for line in planet_lines if line.count(" ") == 5]
+            fleet_lines = [line for line in fleet_lines if line.count(" ") == 6]
+            planet_tokens = " ".join(planet_lines).split(" ")
+            fleet_tokens = " ".join(fleet_lines).split(" ")
+
+        if planet_lines:
+            self._parse_planets(planet_tokens)
+        if fleet_lines:
+            self._parse_fleets(fleet_tokens)
+        return valid
+
+    def _parse_line(self, line: str) -> bool:
+        if "#" in line:
             line = line.split("#")[0]  # remove comments
-            tokens = line.split(" ")
-            if len(tokens) == 1:
-                continue
-            if tokens[0] == "P":
-                if len(tokens) != 6:
-                    return False
-                p = Planet(self._planet_id_counter,  # The ID of this planet
-                           int(tokens[3]),  # owner
-                           int(tokens[4]),  # num_ships
-                           int(tokens[5]),  # growth_rate
-                           float(tokens[1]),  # x
-                           float(tokens[2]))  # y
+        tokens = line.split(" ")
+        if tokens[0] == "P" and len(tokens) == 6:
+            planet_id = self._planet_id_counter
+            if planet_id < len(self._planets) and self._planet_tokens[planet_id] == (tokens[1], tokens[2], tokens[5]):
                 self._planet_id_counter += 1
-                self._planets.append(p)
-            elif tokens[0] == "F":
-                if len(tokens) != 7 or int(tokens[2]) == 0:
-                    return False
-                key = (int(tokens[1]), int(tokens[4]), int(tokens[6]))
-                try:
-                    self._temporary_fleets[key][0] += int(tokens[2])
-                except KeyError:
-                    self._temporary_fleets[key] = [int(tokens[2]), int(tokens[3]), int(tokens[5])]
+                p = self._planets[planet_id]
+                p.owner(int(tokens[3]))
+                p.num_ships(int(tokens[4]))
+                p.dying = False
             else:
-                return False
+                self._parse_planets(tokens)
+        elif tokens[0] == "F" and len(tokens) == 7:
+            self._parse_fleets(tokens)
+        else:
+            return len(tokens) == 1
         return True
 
+    def _parse_planets(self, tokens: typing.List[str]) -> None:
+        owners = list(map(int, tokens[3::6]))
+        num_ships = list(map(int, tokens[4::6]))
+        all_planet_tokens = list(zip(tokens[1::6], tokens[2::6], tokens[5::6]))  # (x, y, growth_rate)
+
+        first_planet_id = self._planet_id_counter
+        self._planet_id_counter += len(owners)
+
+        # planets that are still the same are updated in place
+        index = 0
+        for index, planet_tokens in enumerate(all_planet_tokens):
+            planet_id = first_planet_id + index
+            if planet_id >= len(self._planets) or self._planet_tokens[planet_id] != planet_tokens:
+                break
+            p = self._planets[planet_id]
+            p.owner(owners[index])
+            p.num_ships(num_ships[index])
+            p.dying = False
+        else:
+            return
+
+        # a different map, nothing from the previous turns can be kept
+        self._map_changed = True
+        planet_id = first_planet_id + index
+        del self._planets[planet_id:]
+        del self._planet_tokens[planet_id:]
+        self.columns.truncate(planet_id)
+        for planet_tokens, owner, ships in zip(all_planet_tokens[index:], owners[index:], num_ships[index:]):
+            p = Planet(planet_id,  # The ID of this planet
+                       owner,
+                       ships,
+                       int(planet_tokens[2]),  # growth_rate
+                       float(planet_tokens[0]),  # x
+                       float(planet_tokens[1]),  # y
+                       self.columns)
+            self._planets.append(p)
+            self._planet_tokens.append(planet_tokens)
+            planet_id += 1
+
+    def _parse_fleets(self, tokens: typing.List[str]) -> None:
+        for owner in tokens[1::7]:
+            self._sent_fleets[int(owner)] = self._sent_fleets.get(int(owner), 0) + 1
+
+        keys = zip(map(int, tokens[1::7]), map(int, tokens[4::7]), map(int, tokens[6::7]))  # owner, dest, turns
+        # source and trip length are only converted for the first fleet of a merged fleet
+        for key, num_ships, source, trip_length in zip(keys, map(int, tokens[2::7]), tokens[3::7], tokens[5::7]):
+            if num_ships == 0:
+                continue  # empty fleets don't matter
+            fleet = self._temporary_fleets.get(key)
+            if fleet is None:
+                self._temporary_fleets[key] = [num_ships, int(source), int(trip_length)]
+            else:
+                fleet[0] += num_ships
+
+    @profiler.phase
+    def _get_analysis(self):
+        self.analysis = map_analysis.analyse(self._planets)
+        self._distances = self.analysis.distances
+        self._raw_distances = self.analysis.raw_distances
+
+        self._fleet_ships = {}
+        self._arriving_ships = [[[0] * self.analysis.map_size for _ in self._planets] for _ in range(2)]
+        self._growth_ramps = [[[0] * (2 * self.analysis.map_size) for _ in self._planets] for _ in range(2)]
+        self._growth_sources = [set(), set()]
+
+        # `_distance_rows[destination][source]`, and the index in the
+        # projections of ships sent from `source` this turn
+        self._distance_rows = [self.distances_from(planet_id).tolist() for planet_id in range(len(self._planets))]
+        self._arrival_turns = [[max(0, distance - 1) for distance in distances] for distances in self._distance_rows]
+
+    def _add_growth_ramp(self, owner: int, source_planet: int, sign: int) -> None:
+        growth = itertools.repeat(sign * self.get_planet(source_planet).growth_rate())
+        for distances, ramp in zip(self._distance_rows, self._growth_ramps[owner - 1]):
+            start = distances[source_planet]
+            ramp[start:] = map(operator.add, ramp[start:], growth)
+
+    def _update_growth_ramps(self):
+        for owner in (1, 2):
+            sources = {p.planet_id() for p in self._planet_views()[owner]}
+            for planet_id in self._growth_sources[owner - 1] - sources:
+                self._add_growth_ramp(owner, planet_id, -1)
+            for planet_id in sources - self._growth_sources[owner - 1]:
+                self._add_growth_ramp(owner, planet_id, 1)
+            self._growth_sources[owner - 1] = sources
+
+    def _update_arriving_ships(self):
+        # a turn later every fleet is one turn closer, anything else is a
+        # fleet that was launched, arrived early or disappeared
+        for arriving_ships in self._arriving_ships[0] + self._arriving_ships[1]:
+            del arriving_ships[0]
+            arriving_ships.append(0)
+        changes = {(owner, destination, turns_remaining - 1): -num_ships
+                   for (owner, destination, turns_remaining), num_ships in self._fleet_ships.items()
+                   if turns_remaining > 1}
+        self._fleet_ships = {key: value[0] for key, value in self._temporary_fleets.items()}
+        for key, num_ships in self._fleet_ships.items():
+            changes[key] = changes.get(key, 0) + num_ships
+
+        for (owner, destination, turns_remaining), num_ships in changes.items():
+            if num_ships != 0:
+                self._arriving_ships[owner - 1][destination][turns_remaining - 1] += num_ships
+
+    @profiler.phase
+    def _get_timelines(self):
+        for planet in self._planets:
+            planet.timeline = Timeline(planet)
+
+    @profiler.phase
     def _get_future_neutrals(self):
+        """
+        the neutral planets that each player takes with the fleets already
+        flying, as `{planet: (turns to take, ships left)}`.
+        """
+
         future_planets = [{}, {}]
-        pseudo_ships = {p.planet_id(): p.num_ships() for p in self.neutral_planets()}
-        neutral_arriving_fleets = filter(lambda f: f.destination_planet() in pseudo_ships, self.fleets())
-        neutral_arriving_fleets = sorted(neutral_arriving_fleets, key=lambda f: f.destination_planet())
-        neutral_arriving_fleets = sorted(neutral_arriving_fleets, key=lambda f: f.turns_remaining())
-        for index, fleet in enumerate(neutral_arriving_fleets):
-            try:
-                pseudo_ships[fleet.destination_planet()] -= fleet.num_ships()
-                if pseudo_ships[fleet.destination_planet()] < 0:
-                    next_fleet = neutral_arriving_fleets[index + 1]
-                    if fleet.destination_planet() != next_fleet.destination_planet() or \
-                            next_fleet.turns_remaining() > fleet.turns_remaining():
-                        destination_planet = self.get_planet(fleet.destination_planet())
-                        future_planets[fleet.owner() - 1][destination_planet] = (
-                            fleet.turns_remaining(), abs(pseudo_ships[fleet.destination_planet()]))
-                        del pseudo_ships[fleet.destination_planet()]
-                    elif fleet.destination_planet() == next_fleet.destination_planet():
-                        destination_planet = self.get_planet(fleet.destination_planet())
-                        if fleet.num_ships() > next_fleet.num_ships():
-                            future_planets[fleet.owner() - 1][destination_planet] = (
-                                fleet.turns_remaining(), fleet.num_ships() - next_fleet.num_ships())
-                            del pseudo_ships[fleet.destination_planet()]
-                        elif fleet.num_ships() < next_fleet.num_ships():
-                            future_planets[next_fleet.owner() - 1][destination_planet] = (
-                                next_fleet.turns_remaining(), next_fleet.num_ships() - fleet.num_ships())
-                            del pseudo_ships[fleet.destination_planet()]
-                        else:
-                            pseudo_ships[fleet.destination_planet()] = 0
-                elif fleet.destination_planet() == neutral_arriving_fleets[index + 1].destination_planet():
-                    pseudo_ships[fleet.destination_planet()] += min(fleet.num_ships(),
-                                                                    neutral_arriving_fleets[index + 1].num_ships())
-            except IndexError:
-                if pseudo_ships[fleet.destination_planet()] < 0:
-                    destination_planet = self.get_planet(fleet.destination_planet())
-                    future_planets[fleet.owner() - 1][destination_planet] = (
-                        fleet.turns_remaining(), abs(pseudo_ships[fleet.destination_planet()]))
-                    del pseudo_ships[fleet.destination_planet()]
-            except KeyError:
-                pass
+        for planet in self.neutral_planets():
+            change = planet.timeline.first_change()
+            if change is not None:
+                turn, owner, num_ships = change
+                future_planets[owner - 1][planet] = (turn, num_ships)
 
         self.my_future_neutrals = future_planets[0]
         self.enemy_future_neutrals = future_planets[1]
 
+    def _maximum_ships(self, owner: int, future_neutrals) -> typing.List[SHIPS_LIST]:
+        """
+        the most ships `owner` can have arrive at every planet on every turn,
+        if everything is sent as soon as possible.
+        :param owner: `int` 1 or 2
+        :param future_neutrals: `dict` the neutral planets `owner` will take
+        :return: `list` of projections, indexed by planet id
+        """
+
+        planets = [(p.planet_id(), p.num_ships()) for p in self._planet_views()[owner]]
+        # (planet id, delay, num_ships): ships that can leave the planet after
+        # `delay` turns
+        departures = []
+        for fleet in self._fleet_views()[owner]:
+            destination_planet = self._planets[fleet.destination_planet()]
+            if destination_planet.owner() == owner or \
+                    (destination_planet in future_neutrals and
+                     future_neutrals[destination_planet][0] < fleet.turns_remaining()):
+                departures.append((fleet.destination_planet(), fleet.turns_remaining() - 1, fleet.num_ships()))
+        departures.extend((p.planet_id(), turns_to_take - 1, excess_ships)
+                          for p, (turns_to_take, excess_ships) in future_neutrals.items())
+        # (planet id, delay, growth_rate): growth of the future neutrals, the
+        # growth of owned planets is in `self._growth_ramps`
+        ramps = [(p.planet_id(), turns_to_take, p.growth_rate()) for p, (turns_to_take, _) in future_neutrals.items()]
+
+        all_maximum_ships = []
+        for growth_ramp, distances, arrival_turns in zip(self._growth_ramps[owner - 1], self._distance_rows,
+                                                         self._arrival_turns):
+            maximum_ships = growth_ramp[:]
+            for source_planet, num_ships in planets:
+                maximum_ships[arrival_turns[source_planet]] += num_ships
+            for source_planet, delay, num_ships in departures:
+                maximum_ships[delay + distances[source_planet]] += num_ships
+            if ramps:
+                steps = [0] * len(maximum_ships)
+                for source_planet, delay, growth_rate in ramps:
+                    if delay + distances[source_planet] < len(steps):
+                        steps[delay + distances[source_planet]] += growth_rate
+                maximum_ships = list(map(operator.add, maximum_ships, itertools.accumulate(steps)))
+            all_maximum_ships.append(maximum_ships)
+        return all_maximum_ships
+
+    @profiler.phase
     def _get_maximum_ships(self):
-        for planet in self.planets():
-            my_arriving_ships = [0 for _ in range(2 * self.map_size)]
-            for my_planet in self.my_planets():
-                distance = self.distance(my_planet.planet_id(), planet.planet_id()) - 1
-                my_arriving_ships[max(0, distance)] += my_planet.num_ships()
-                for turn in range(distance + 1, len(my_arriving_ships)):
-                    my_arriving_ships[turn] += my_planet.growth_rate()
-            for my_fleet in self.my_fleets():
-                destination_planet = self.get_planet(my_fleet.destination_planet())
-                if destination_planet.owner() == 1 or \
-                        (destination_planet in self.my_future_neutrals and
-                         self.my_future_neutrals[destination_planet][0] < my_fleet.turns_remaining()):
-                    distance = my_fleet.turns_remaining() + \
-                               self.distance(my_fleet.destination_planet(), planet.planet_id()) - 1
-                    my_arriving_ships[distance] += my_fleet.num_ships()
-            for my_planet, (turns_to_take, excess_ships) in self.my_future_neutrals.items():
-                distance = turns_to_take + self.distance(my_planet.planet_id(), planet.planet_id()) - 1
-                my_arriving_ships[distance] += excess_ships
-                for turn in range(distance + 1, len(my_arriving_ships)):
-                    my_arriving_ships[turn] += my_planet.growth_rate()
-            planet.my_maximum_ships = my_arriving_ships
-
-            enemy_arriving_ships = [0 for _ in range(2 * self.map_size)]
-            for enemy_planet in self.enemy_planets():
-                distance = self.distance(enemy_planet.planet_id(), planet.planet_id()) - 1
-                enemy_arriving_ships[max(0, distance)] += enemy_planet.num_ships()
-                for turn in range(distance + 1, len(enemy_arriving_ships)):
-                    enemy_arriving_ships[turn] += enemy_planet.growth_rate()
-            for enemy_fleet in self.enemy_fleets():
-                destination_planet = self.get_planet(enemy_fleet.destination_planet())
-                if destination_planet.owner() == 2 or \
-                        (destination_planet in self.enemy_future_neutrals and
-                         self.enemy_future_neutrals[destination_planet][0] < enemy_fleet.turns_remaining()):
-                    distance = enemy_fleet.turns_remaining() + \
-                               self.distance(enemy_fleet.destination_planet(), planet.planet_id()) - 1
-                    enemy_arriving_ships[distance] += enemy_fleet.num_ships()
-            for enemy_planet, (turns_to_take, excess_ships) in self.enemy_future_neutrals.items():
-                distance = turns_to_take + self.distance(enemy_planet.planet_id(), planet.planet_id()) - 1
-                enemy_arriving_ships[distance] += excess_ships
-                for turn in range(distance + 1, len(enemy_arriving_ships)):
-                    enemy_arriving_ships[turn] += enemy_planet.growth_rate()
-            planet.enemy_maximum_ships = enemy_arriving_ships
+        self._update_growth_ramps()
+        my_maximum_ships = self._maximum_ships(1, self.my_future_neutrals)
+        enemy_maximum_ships = self._maximum_ships(2, self.enemy_future_neutrals)
+        for planet in self._planets:
+            planet.my_maximum_ships = my_maximum_ships[planet.planet_id()]
+            planet.enemy_maximum_ships = enemy_maximum_ships[planet.planet_id()]
 
+    @profiler.phase
+    def _get_arriving_fleets(self):
+        for planet in self._planets:
+            planet.arriving_fleets = []
+        for fleet in sorted(self._fleets, key=lambda f: f.turns_remaining()):
+            self._planets[fleet.destination_planet()].arriving_fleets.append(fleet)
+
+    @profiler.phase
     def _get_arriving_ships(self):
+        # the projections are rows of the [owner][destination][turn] histogram
+        self._update_arriving_ships()
         for planet in self.planets():
-            my_arriving_ships = [0 for _ in range(self.map_size)]
-            for my_fleet in filter(lambda f: f.destination_planet() == planet.planet_id(), self.my_fleets()):
-                my_arriving_ships[my_fleet.turns_remaining() - 1] += my_fleet.num_ships()
-            planet.my_arriving_ships = my_arriving_ships
-
-            enemy_arriving_ships = [0 for _ in range(self.map_size)]
-            for enemy_fleet in filter(lambda f: f.destination_planet() == planet.planet_id(), self.enemy_fleets()):
-                enemy_arriving_ships[enemy_fleet.turns_remaining() - 1] += enemy_fleet.num_ships()
-            planet.enemy_arriving_ships = enemy_arriving_ships
+            planet.my_arriving_ships = self._arriving_ships[0][planet.planet_id()][:]
+            planet.enemy_arriving_ships = self._arriving_ships[1][planet.planet_id()][:]
+            planet.update_sums()
 
+    @profiler.phase
     def _get_future_exchanges(self):
+        turns = range(1, self.map_size)
+
         my_future_planets = {}
         for planet in self.enemy_planets():
-            for t in range(1, self.map_size):
-                if sum(planet.my_arriving_ships[:t]) > sum(planet.enemy_maximum_ships[:t]):
-                    my_future_planets[planet] = t
-        for planet, (turns, excess) in self.enemy_future_neutrals.items():
-            for t in range(1, self.map_size):
-                if sum(planet.my_arriving_ships[turns:t]) > sum(planet.enemy_maximum_ships[:t]):
-                    my_future_planets[planet] = t
+            t = utils.last_exceeding(planet.my_arriving_ships_sums, planet.enemy_maximum_ships_sums, turns)
+            if t is not None:
+                my_future_planets[planet] = t
+        for planet, (turns_to_take, excess) in self.enemy_future_neutrals.items():
+            t = utils.last_exceeding(planet.my_arriving_ships_sums, planet.enemy_maximum_ships_sums, turns,
+                                     turns_to_take)
+            if t is not None:
+                my_future_planets[planet] = t
         self.my_future_planets = my_future_planets
 
         enemy_future_planets = {}
         for planet in self.my_planets():
-            for t in range(1, self.map_size):
-                if sum(planet.enemy_arriving_ships[:t]) > sum(planet.my_maximum_ships[:t]):
-                    enemy_future_planets[planet] = t
-        for planet, (turns, excess) in self.my_future_neutrals.items():
-            for t in range(1, self.map_size):
-                if sum(planet.enemy_arriving_ships[turns:t]) > sum(planet.my_maximum_ships[:t]):
-                    enemy_future_planets[planet] = t
+            t = utils.last_exceeding(planet.enemy_arriving_ships_sums, planet.my_maximum_ships_sums, turns)
+            if t is not None:
+                enemy_future_planets[planet] = t
+        for planet, (turns_to_take, excess) in self.my_future_neutrals.items():
+            t = utils.last_exceeding(planet.enemy_arriving_ships_sums, planet.my_maximum_ships_sums, turns,
+                                     turns_to_take)
+            if t is not None:
+                enemy_future_planets[planet] = t
         self.enemy_future_planets = enemy_future_planets
 
+    @profiler.phase
     def _get_latencies(self):
         my_planets = {p: 0 for p in self.my_planets()}
         my_planets.update({k: v[0] for k, v in self.my_future_neutrals.items()})
@@ -384,15 +892,17 @@ class PlanetWars:
                                         enemy_planets.items()))
                 planet.latency = enemy_closest - my_closest
 
+    @profiler.phase
     def _get_info(self):
         self.turns_remaining = (TOTAL_TURNS - PlanetWars.turn)
-        self.map_size = 2 * math.ceil(utils.distance(0, 0, self._planets[0].x(), self._planets[0].y()))
+        self.map_size = self.analysis.map_size
         self.my_total_ships = sum(map(lambda x: x.num_ships(), self.my_planets() + self.my_fleets()))
         self.enemy_total_ships = sum(map(lambda x: x.num_ships(), self.enemy_planets() + self.enemy_fleets()))
         self.my_growth_rate = sum(map(lambda p: p.growth_rate(), self.my_planets()))
         self.enemy_growth_rate = sum(map(lambda p: p.growth_rate(), self.enemy_planets()))
-        self.total_growth = sum(map(lambda p: p.growth_rate(), self.planets()))
+        self.total_growth = self.analysis.total_growth
 
+        self._get_timelines()
         self._get_future_neutrals()
         self._get_maximum_ships()
         self._get_arriving_ships()
@@ -421,23 +931,90 @@ class PlanetWars:
         else:
             self.chilling = True
 
-    def initialise(self):
+    @profiler.phase
+    def initialise(self, get_info: bool = True):
+        if self._planet_id_counter < len(self._planets):
+            self._map_changed = True
+            self.columns.truncate(self._planet_id_counter)
+            del self._planets[self._planet_id_counter:]
+            del self._planet_tokens[self._planet_id_counter:]
+        if self._map_changed:
+            self._get_analysis()
+            self._map_changed = False
+
         for (owner, destination, turns_remaining), (num_ships, source, trip_length) in self._temporary_fleets.items():
-            f = Fleet(int(owner),  # owner
-                      int(num_ships),  # num_ships
-                      int(source),  # source
-                      int(destination),  # destination
-                      int(trip_length),  # total_trip_length
-                      int(turns_remaining))  # turns_remaining
+            f = self._advanced_fleets.get((owner, destination, turns_remaining))
+            if f is not None and (f.num_ships(), f.source_planet(), f.total_trip_length()) == \
+                    (num_ships, source, trip_length):
+                f.advance()
+            else:
+                f = Fleet(int(owner),  # owner
+                          int(num_ships),  # num_ships
+                          int(source),  # source
+                          int(destination),  # destination
+                          int(trip_length),  # total_trip_length
+                          int(turns_remaining))  # turns_remaining
             self._fleets.append(f)
+        self._advanced_fleets = {}
+        self._fleets_by_owner = None
+        self._get_arriving_fleets()
 
-        self._get_info()
+        if get_info:
+            self._get_info()
 
+    def clear_orders(self) -> None:
+        self._issued_orders = {}
+        self._raw_orders = []
+
+    def issued_orders(self) -> typing.List[typing.Tuple[int, int, int]]:
+        return [(source_planet, destination_planet, num_ships)
+                for (source_planet, destination_planet), num_ships in self._issued_orders.items()] + self._raw_orders
+
+    @profiler.phase
     def finish_turn(self) -> None:
         PlanetWars.turn += 1
 
-        for (source_planet, destination_planet), num_ships in self._issued_orders.items():
+        for source_planet, destination_planet, num_ships in self.issued_orders():
             sys.stdout.write("{} {} {}\n".format(source_planet, destination_planet, num_ships))
 
         sys.stdout.write("go\n")
         sys.stdout.flush()
+
+
+class GameStateReader:
+    """
+    reads the engine's messages straight from a file descriptor, as many
+    bytes as are available at a time, instead of one line at a time.
+    """
+
+    # any line that isn't a record, a comment or empty ends a message, e.g. "go"
+    _COMMAND_LINE = re.compile(rb"^[^PF#\r\n].*$", re.MULTILINE)
+    _READ_SIZE: int = 1 << 16
+
+    def __init__(self, stream: typing.TextIO = sys.stdin):
+        self._file_descriptor: int = stream.fileno()
+        self._buffer: bytes = b""
+
+    def read_message(self) -> typing.Tuple[str, str]:
+        """
+        blocks until a whole message has arrived.
+        :return: (`str` records, `str` command) the lines before the command,
+        to be given to `PlanetWars.parse_game_state()`, and the command itself
+        :raises EOFError: if the input ends before the next command
+        """
+
+        search_start = 0
+        while True:
+            match = self._COMMAND_LINE.search(self._buffer, search_start)
+            if match is not None and match.end() < len(self._buffer):
+                records, command = self._buffer[:match.start()], match.group().rstrip(b"\r")
+                self._buffer = self._buffer[match.end() + 1:]
+                return records.decode(), command.decode()
+
+            # only the last, possibly incomplete line needs to be searched again
+            search_start = self._buffer.rfind(b"\n") + 1
+            data = os.read(self._file_descriptor, self._READ_SIZE)
+            if not data:
+                raise EOFError
+            self._buffer += data
+
@@ -0,0 +1,142 @@
+"""
+file: profiler.py
+
+description: opt-in instrumentation of the phases of a turn. when the
+`PLANET_WARS_PROFILE` environment variable is set to a file path (or "-" for
+stderr), every function decorated with `@phase` records its wall time, call
+count and the change in memory traced by `tracemalloc`. `end_turn()` writes one
+json line per turn and `summary()` one line with the p50/p95/max time of every
+phase; `python profiler.py <profile>` summarises the turns of a bot that was
+killed before it could. nested phases are timed inclusively, e.g.
+`PlanetWars.initialise` includes `PlanetWars._get_info`. without the variable
+`@phase` returns the function unchanged, so there is no overhead.
+"""
+
+import collections
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+import typing
+
+OUTPUT: typing.Optional[str] = os.environ.get("PLANET_WARS_PROFILE") or None
+ENABLED: bool = OUTPUT is not None
+
+# phase name -> [seconds, calls, allocated bytes] of the current turn
+_turn: typing.Dict[str, list] = {}
+# phase name -> seconds of every turn the phase ran in
+_history: typing.DefaultDict[str, typing.List[float]] = collections.defaultdict(list)
+_stream: typing.Optional[typing.TextIO] = None
+
+if ENABLED and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def phase(function: typing.Callable) -> typing.Callable:
+    """
+    decorator that records `function` as a phase named after its qualified
+    name, if profiling is enabled.
+    """
+
+    if not ENABLED:
+        return function
+
+    name = function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            record = _turn.get(name)
+            if record is None:
+                record = _turn[name] = [0.0, 0, 0]
+            record[0] += elapsed
+            record[1] += 1
+            record[2] += tracemalloc.get_traced_memory()[0] - memory
+
+    return wrapper
+
+
+def _write(record: dict) -> None:
+    global _stream
+    if _stream is None:
+        _stream = sys.stderr if OUTPUT == "-" else open(OUTPUT, "a", buffering=1)
+    _stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def end_turn(turn: int) -> None:
+    """
+    writes the record of the turn that just finished, e.g.
+    `{"turn":3,"phases":{"expand":[0.412,1,2048],...}}` with milliseconds,
+    calls and allocated bytes per phase.
+    :param turn: `int` the turn number
+    :return: `None`
+    """
+
+    if not ENABLED or not _turn:
+        return
+
+    phases = {}
+    for name, (seconds, calls, allocated) in _turn.items():
+        phases[name] = [round(seconds * 1000, 3), calls, allocated]
+        _history[name].append(seconds)
+    _turn.clear()
+    _write({"turn": turn, "phases": phases})
+
+
+def _percentile(ordered: typing.List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _summarise(history: typing.Dict[str, typing.List[float]]) -> dict:
+    phases = {}
+    for name, times in history.items():
+        ordered = sorted(times)
+        phases[name] = {"turns": len(ordered),
+                        "p50": round(_percentile(ordered, 0.5) * 1000, 3),
+                        "p95": round(_percentile(ordered, 0.95) * 1000, 3),
+                        "max": round(ordered[-1] * 1000, 3)}
+    return {"summary": phases}
+
+
+def summary() -> None:
+    """
+    writes the p50/p95/max milliseconds per turn of every phase since the last
+    summary, e.g. at the end of a game.
+    :return: `None`
+    """
+
+    if not ENABLED or not _history:
+        return
+
+    _write(_summarise(_history))
+    _history.clear()
+
+
+def main():
+    """
+    prints the summary of a profile written by a bot that never got to write
+    its own, e.g. because the engine killed it at the end of the game.
+    usage: python profiler.py <profile>
+    """
+
+    history = collections.defaultdict(list)
+    with open(sys.argv[1]) as profile:
+        for line in profile:
+            record = json.loads(line)
+            for name, (milliseconds, _, _) in record.get("phases", {}).items():
+                history[name].append(milliseconds / 1000)
+
+    for name, statistics in _summarise(history)["summary"].items():
+        print("{:<36} {turns:>5} turns  p50 {p50:>9.3f} ms  p95 {p95:>9.3f} ms  max {max:>9.3f} ms".format(
+            name, **statistics))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+"""
+file: replay.py
+
+description: compact recording of the states a bot saw and the orders it gave.
+a replay file starts with the planet geometry, stored once, followed by one
+frame per turn. every `keyframe_interval` turns a keyframe holds the owner and
+ships of every planet and all fleets; the frames in between only hold the
+planets that changed and the fleets that were added or removed. the frames of
+a keyframe and the deltas after it share one zlib stream that is flushed after
+every frame, so a recording can be streamed to disk while the game runs (and
+survives the bot being killed) while still compressing across turns.
+
+the offsets of the keyframes are appended to "<file>.idx" as they are written,
+so `Replay` can seek to any turn by decoding at most one keyframe and
+`keyframe_interval - 1` deltas. without the index the frame headers are
+scanned instead.
+
+recording is enabled by setting `PLANET_WARS_RECORD` to a directory.
+`rerun()` plays a recorded turn again, e.g. to debug it with `MyBot.do_turn()`.
+
+usage: python replay.py <file> [index] [--rerun]
+       (prints the recorded turns, or one turn, or plays it again with MyBot)
+"""
+
+import itertools
+import json
+import os
+import struct
+import sys
+import typing
+import zlib
+
+import planet_wars
+
+RECORD_DIRECTORY: typing.Optional[str] = os.environ.get("PLANET_WARS_RECORD") or None
+KEYFRAME_INTERVAL: int = 32
+
+_MAGIC: bytes = b"PWR1"
+_FRAME_HEADER = struct.Struct("<BIi")  # kind, payload length, turn
+_OFFSET = struct.Struct("<q")
+_GEOMETRY, _KEYFRAME, _DELTA = 0, 1, 2
+
+_file_counter = itertools.count()
+
+ORDER_LIST = typing.List[typing.Tuple[int, int, int]]
+FLEET = typing.Tuple[int, int, int, int, int, int]
+
+
+def _dumps(payload) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def _parse_state(state: str) -> typing.Tuple[list, typing.List[FLEET]]:
+    """
+    :return: (`list` of [x, y, owner, num_ships, growth_rate] with the
+    coordinates kept as written, `list` of fleet tuples)
+    """
+
+    planets = []
+    fleets = []
+    for line in state.split("\n"):
+        tokens = line.split("#")[0].split()
+        if len(tokens) == 6 and tokens[0] == "P":
+            planets.append([tokens[1], tokens[2], int(tokens[3]), int(tokens[4]), int(tokens[5])])
+        elif len(tokens) == 7 and tokens[0] == "F":
+            fleets.append(tuple(int(t) for t in tokens[1:]))
+    return planets, fleets
+
+
+class Turn:
+    def __init__(self, index: int, turn: int, state: str, orders: ORDER_LIST):
+        # position in the recording, the first recorded turn is 0
+        self.index: int = index
+        # `PlanetWars.turn` of the recorded turn
+        self.turn: int = turn
+        # the game state as the bot received it, without the "go"
+        self.state: str = state
+        self.orders: ORDER_LIST = orders
+
+
+class Recorder:
+    def __init__(self, path: str, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.path: str = path
+        self.keyframe_interval: int = keyframe_interval
+
+        self._file: typing.BinaryIO = open(path, "wb")
+        self._index_file: typing.BinaryIO = open(path + ".idx", "wb")
+        self._compressor = None
+        self._geometry: typing.Optional[list] = None
+        self._planets: typing.List[typing.Tuple[int, int]] = []
+        self._fleets: typing.List[FLEET] = []
+        self._turns: int = 0
+
+        self._file.write(_MAGIC)
+
+    def _write_frame(self, kind: int, turn: int, payload: bytes) -> None:
+        self._file.write(_FRAME_HEADER.pack(kind, len(payload), turn))
+        self._file.write(payload)
+        self._file.flush()
+
+    def record(self, turn: int, state: str, orders: ORDER_LIST) -> None:
+        """
+        :param turn: `int` `PlanetWars.turn` of the turn
+        :param state: `str` the game state the bot received
+        :param orders: `list` of (source, destination, num_ships) orders it gave
+        :raises ValueError: if `state` isn't on the map of the earlier turns
+        """
+
+        planets, fleets = _parse_state(state)
+        geometry = [[x, y, growth_rate] for x, y, _, _, growth_rate in planets]
+        if self._geometry is None:
+            self._geometry = geometry
+            self._write_frame(_GEOMETRY, turn, zlib.compress(_dumps(
+                {"keyframe_interval": self.keyframe_interval, "planets": geometry})))
+        elif geometry != self._geometry:
+            raise ValueError("state isn't on the recorded map")
+
+        planets = [(owner, num_ships) for _, _, owner, num_ships, _ in planets]
+        orders = [list(order) for order in orders]
+
+        if self._turns % self.keyframe_interval == 0:
+            kind = _KEYFRAME
+            payload = {"p": planets, "f": fleets, "o": orders}
+            self._index_file.write(_OFFSET.pack(self._file.tell()))
+            self._index_file.flush()
+            self._compressor = zlib.compressobj()
+        else:
+            kind = _DELTA
+            changed = [[planet_id, owner, num_ships]
+                       for planet_id, (old, (owner, num_ships)) in enumerate(zip(self._planets, planets))
+                       if old != (owner, num_ships)]
+
+            # fleets that are still flying keep their order, so only the ones
+            # that arrived and the ones that were sent need to be stored
+            removed = []
+            kept = 0
+            for i, f in enumerate(self._fleets):
+                if kept < len(fleets) and fleets[kept] == f[:5] + (f[5] - 1,):
+                    kept += 1
+                else:
+                    removed.append(i)
+            payload = {"p": changed, "r": removed, "a": fleets[kept:], "o": orders}
+
+        self._write_frame(kind, turn, self._compressor.compress(_dumps(payload)) +
+                          self._compressor.flush(zlib.Z_SYNC_FLUSH))
+        self._planets = planets
+        self._fleets = fleets
+        self._turns += 1
+
+    def close(self) -> None:
+        self._file.close()
+        self._index_file.close()
+
+
+def open_recorder(prefix: str) -> typing.Optional[Recorder]:
+    """
+    :param prefix: `str` start of the file name, e.g. who is recording
+    :return: `Recorder` writing to a new file in `RECORD_DIRECTORY`, or `None`
+    if recording is disabled
+    """
+
+    if RECORD_DIRECTORY is None:
+        return None
+    os.makedirs(RECORD_DIRECTORY, exist_ok=True)
+    return Recorder(os.path.join(RECORD_DIRECTORY, "{}-{}-{}.pwr".format(prefix, os.getpid(), next(_file_counter))))
+
+
+def rerun(turn: Turn, do_turn: typing.Callable[[planet_wars.PlanetWars], None]) -> ORDER_LIST:
+    """
+    plays a recorded turn again on a fresh `PlanetWars` object. module level
+    state of the bot, such as `MyBot.HAVOC_PLANET`, isn't recorded, so the
+    orders can differ from the recorded ones.
+    :param turn: `Turn` object
+    :param do_turn: `function` the bot's `do_turn(pw)`
+    :return: `list` of (source, destination, num_ships) orders
+    """
+
+    planet_wars.PlanetWars.turn = turn.turn
+    pw = planet_wars.PlanetWars()
+    pw.parse_game_state(turn.state)
+    pw.initialise()
+    do_turn(pw)
+    return pw.issued_orders()
+
+
+class Replay:
+    def __init__(self, path: str):
+        with open(path, "rb") as replay_file:
+            self._data: bytes = replay_file.read()
+        if self._data[:len(_MAGIC)] != _MAGIC:
+            raise ValueError("not a replay file")
+
+        kind, length, _ = self._header(len(_MAGIC))
+        if kind != _GEOMETRY:
+            raise ValueError("replay file without geometry")
+        start = len(_MAGIC) + _FRAME_HEADER.size
+        geometry = json.loads(zlib.decompress(self._data[start:start + length]))
+        self.keyframe_interval: int = geometry["keyframe_interval"]
+        self._geometry: list = geometry["planets"]
+
+        self._keyframes: typing.List[int] = []
+        try:
+            with open(path + ".idx", "rb") as index_file:
+                index = index_file.read()
+            self._keyframes = [offset for offset, in _OFFSET.iter_unpack(index[:len(index) // 8 * 8])
+                               if offset < len(self._data)]
+        except OSError:
+            pass
+
+        # scan the frames after the last indexed keyframe (all of them without
+        # an index) for keyframes the index missed and to count the turns
+        offset = self._keyframes[-1] if self._keyframes else start + length
+        frames = 0
+        while True:
+            header = self._header(offset)
+            if header is None:
+                break
+            kind, length, _ = header
+            if kind == _KEYFRAME:
+                if not self._keyframes or offset > self._keyframes[-1]:
+                    self._keyframes.append(offset)
+                frames = 0
+            frames += 1
+            offset += _FRAME_HEADER.size + length
+
+        self._length: int = (len(self._keyframes) - 1) * self.keyframe_interval + frames if self._keyframes else 0
+
+    def _header(self, offset: int) -> typing.Optional[typing.Tuple[int, int, int]]:
+        """
+        :return: (kind, length, turn) of the frame at `offset`, or `None` if
+        there's no complete frame there, e.g. after the bot was killed mid-write
+        """
+
+        if offset + _FRAME_HEADER.size > len(self._data):
+            return None
+        kind, length, turn = _FRAME_HEADER.unpack_from(self._data, offset)
+        if offset + _FRAME_HEADER.size + length > len(self._data):
+            return None
+        return kind, length, turn
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _decode(self, keyframe: int) -> typing.Iterator[Turn]:
+        """
+        decodes the turns from keyframe number `keyframe` to the end of the recording.
+        """
+
+        offset = self._keyframes[keyframe]
+        decompressor = None
+        planets = []
+        fleets = []
+        for index in range(keyframe * self.keyframe_interval, self._length):
+            kind, length, turn = self._header(offset)
+            payload = self._data[offset + _FRAME_HEADER.size:offset + _FRAME_HEADER.size + length]
+            offset += _FRAME_HEADER.size + length
+
+            if kind == _KEYFRAME:
+                decompressor = zlib.decompressobj()
+                frame = json.loads(decompressor.decompress(payload))
+                planets = [list(planet) for planet in frame["p"]]
+                fleets = [tuple(f) for f in frame["f"]]
+            else:
+                frame = json.loads(decompressor.decompress(payload))
+                for planet_id, owner, num_ships in frame["p"]:
+                    planets[planet_id] = [owner, num_ships]
+                removed = set(frame["r"])
+                fleets = [f[:5] + (f[5] - 1,) for i, f in enumerate(fleets) if i not in removed]
+                fleets += [tuple(f) for f in frame["a"]]
+
+            lines = ["P {} {} {} {} {}".format(x, y, owner, num_ships, growth_rate)
+                     for (x, y, growth_rate), (owner, num_ships) in zip(self._geometry, planets)]
+            lines += ["F {} {} {} {} {} {}".format(*f) for f in fleets]
+            yield Turn(index, turn, "\n".join(lines), [tuple(order) for order in frame["o"]])
+
+    def __getitem__(self, index: int) -> Turn:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("replay index out of range")
+
+        turns = self._decode(index // self.keyframe_interval)
+        for _ in range(index % self.keyframe_interval):
+            next(turns)
+        return next(turns)
+
+    def __iter__(self) -> typing.Iterator[Turn]:
+        if self._length == 0:
+            return iter(())
+        return self._decode(0)
+
+
+def main():
+    rerun_turn = "--rerun" in sys.argv[1:]
+    arguments = [argument for argument in sys.argv[1:] if argument != "--rerun"]
+    if len(arguments) != 2 and (rerun_turn or len(arguments) != 1):
+        print("\n".join(__doc__.strip().split("\n")[-2:]), file=sys.stderr)
+        sys.exit(1)
+
+    replay = Replay(arguments[0])
+    if len(arguments) == 2:
+        turn = replay[int(arguments[1])]
+        if rerun_turn:
+            import MyBot
+            orders = rerun(turn, MyBot.do_turn)
+            print("# turn {}: recorded {}, rerun {}".format(turn.turn, turn.orders, orders))
+            return
+        print("# turn {}".format(turn.turn))
+        print(turn.state)
+        for order in turn.orders:
+            print("# order {} {} {}".format(*order))
+        return
+
+    for turn in replay:
+        print("{:>6} turn {:>4}: {:>3} fleets, {} orders".format(
+            turn.index, turn.turn, turn.state.count("\nF "), len(turn.orders)))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,8 +5,10 @@ description: contains general utility definitions.
 """
 
 
+import itertools
 import math
 import sys
+import typing
 
 
 # set a large number for utility purposes
@@ -36,3 +38,75 @@ def error_print(*args, **kwargs) -> None:
     """
 
     print(*args, file=sys.stderr, **kwargs)
+
+
+def prefix_sums(values: typing.Iterable[int]) -> typing.List[int]:
+    """
+    cumulative sums of `values`, starting with 0, i.e. `sums[t]` is
+    `sum(values[:t])`.
+    :param values: iterable of `int` values
+    :return: `list` of `int` sums, one longer than `values`
+    """
+
+    return [0] + list(itertools.accumulate(values))
+
+
+def range_sum(sums: typing.Sequence[int], start: int, end: int) -> int:
+    """
+    `sum(values[start:end])` in constant time, for non-negative `start` and
+    `end`.
+    :param sums: `list` of prefix sums of `values`, see `prefix_sums()`
+    :param start: `int` first index
+    :param end: `int` index after the last index
+    :return: `int` sum of the range, 0 if it is empty
+    """
+
+    end = min(end, len(sums) - 1)
+    if start >= end:
+        return 0
+    return sums[end] - sums[start]
+
+
+def first_exceeding(sums: typing.Sequence[int], other_sums: typing.Sequence[int], turns: range,
+                    start: int = 0) -> typing.Optional[int]:
+    """
+    first `t` in `turns` where `sum(values[start:t]) > sum(other_values[:t])`.
+    :param sums: `list` of prefix sums of `values`
+    :param other_sums: `list` of prefix sums of `other_values`
+    :param turns: `range` of turns to search
+    :param start: `int` first index of `values` to count
+    :return: `int` turn, or `None` if there is none
+    """
+
+    for t in turns:
+        if range_sum(sums, start, t) > range_sum(other_sums, 0, t):
+            return t
+    return None
+
+
+def last_exceeding(sums: typing.Sequence[int], other_sums: typing.Sequence[int], turns: range,
+                   start: int = 0) -> typing.Optional[int]:
+    """
+    same as `first_exceeding()`, but finds the last such turn.
+    """
+
+    return first_exceeding(sums, other_sums, turns[::-1], start)
+
+
+def first_true(turns: range, predicate: typing.Callable[[int], bool]) -> typing.Optional[int]:
+    """
+    binary search for the first `t` in `turns` where `predicate(t)` is true.
+    `predicate` has to be monotonic, i.e. stay true once it is true.
+    :param turns: `range` of turns to search, with a step of 1
+    :param predicate: `function` taking a turn
+    :return: `int` turn, or `None` if there is none
+    """
+
+    low, high = turns.start, turns.stop
+    while low < high:
+        middle = (low + high) // 2
+        if predicate(middle):
+            high = middle
+        else:
+            low = middle + 1
+    return low if low < turns.stop else None
@@ -0,0 +1,88 @@
+"""
+file: test_batch_simulator.py
+
+description: `BatchSimulator` has to agree exactly with the single-game rules
+of `engine.Game`. both play the same orders on generated maps and are
+compared planet by planet after every turn.
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "tools"))
+
+import batch_simulator
+import engine
+import map_generator
+import map_generator_v2
+
+MAPS: int = 20
+
+
+def random_policy(rng):
+    """
+    :return: `function` policy sending random parts of the ships of random
+    planets anywhere, so that fleets of all owners meet on the same planets
+    """
+
+    def policy(simulator, player):
+        orders = numpy.zeros((simulator.games, simulator.planets, simulator.planets), dtype=numpy.int64)
+        sources = (simulator.owner == player) & (rng.random(simulator.owner.shape) < 0.3)
+        for game, source in zip(*numpy.nonzero(sources)):
+            destinations = numpy.flatnonzero(simulator.valid[game])
+            destinations = destinations[destinations != source]
+            left = simulator.ships[game, source]
+            for destination in rng.choice(destinations, size=min(2, len(destinations)), replace=False):
+                orders[game, source, destination] = rng.integers(0, left // 2 + 1)
+                left -= orders[game, source, destination]
+        return orders
+
+    return policy
+
+
+def compare(map_strings, policy_one, policy_two):
+    simulator = batch_simulator.BatchSimulator(map_strings)
+    games = [engine.Game(map_string) for map_string in map_strings]
+
+    issued = {}
+
+    def recorded(player, policy):
+        def recording_policy(simulator, player):
+            issued[player] = policy(simulator, player)
+            return issued[player]
+        return recording_policy
+
+    policies = (recorded(1, policy_one), recorded(2, policy_two))
+    while simulator.active().any():
+        simulator.step(*policies)
+        for index, game in enumerate(games):
+            if game.winner() != engine.NOT_FINISHED:
+                continue
+            alive = [player for player in (1, 2) if game.is_alive(player)]
+            for player in alive:
+                for source, destination in zip(*numpy.nonzero(issued[player][index])):
+                    assert game.issue_order(player, int(source), int(destination),
+                                            int(issued[player][index, source, destination]))
+            game.do_time_step()
+
+            planets = len(game.planets)
+            assert [p.owner() for p in game.planets] == list(simulator.owner[index, :planets])
+            assert [p.num_ships() for p in game.planets] == list(simulator.ships[index, :planets])
+            assert game.winner() == simulator.winner[index]
+
+    assert [game.turn for game in games] == list(simulator.turns)
+
+
+@pytest.mark.parametrize("generator", [map_generator, map_generator_v2])
+def test_matches_engine(generator):
+    random.seed(0)
+    map_strings = [generator.generate_map() for _ in range(MAPS)]
+    rng = numpy.random.default_rng(0)
+    compare(map_strings, batch_simulator.rage_policy, batch_simulator.rage_policy)
+    compare(map_strings, random_policy(rng), batch_simulator.rage_policy)
+    compare(map_strings, random_policy(rng), random_policy(rng))
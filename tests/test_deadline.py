@@ -0,0 +1,44 @@
+"""
+file: test_deadline.py
+
+description: phases are skipped once the turn's time is used up, except the
+ones that have to run every turn.
+"""
+
+import collections
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import deadline
+
+
+@pytest.fixture(autouse=True)
+def fresh_statistics(monkeypatch):
+    # the costs and statistics are shared by all turns, the tests mustn't leave theirs behind
+    monkeypatch.setattr(deadline.Deadline, "phase_costs", {})
+    monkeypatch.setattr(deadline.Deadline, "turns", 0)
+    monkeypatch.setattr(deadline.Deadline, "overruns", 0)
+    monkeypatch.setattr(deadline.Deadline, "skipped_phases", collections.Counter())
+
+
+def test_expired():
+    turn_deadline = deadline.Deadline(0)
+    phases = []
+    assert not turn_deadline.run("attack", phases.append, "attack")
+    turn_deadline.run_always("defend", phases.append, "defend")
+    assert phases == ["defend"]
+    assert list(deadline.Deadline.phase_costs) == ["defend"]
+    assert deadline.Deadline.skipped_phases == {"attack": 1}
+
+
+def test_no_limit():
+    turn_deadline = deadline.Deadline()
+    phases = []
+    assert turn_deadline.run("attack", phases.append, "attack")
+    assert phases == ["attack"]
+    assert turn_deadline.finish() is None
+    assert deadline.Deadline.turns == 1
@@ -0,0 +1,88 @@
+"""
+file: test_engine.py
+
+description: combat resolution of `tools/engine.py`, which has to match
+`PlayGame.jar` for the engine's games to mean anything.
+"""
+
+import os
+import shlex
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "tools"))
+
+import engine
+import planet_wars
+
+# one planet for each player to launch from, and the planet fought over
+MAP_STRING = "P 0 0 1 100 0\nP 10 0 2 100 0\nP 5 0 {} {} 0\n"
+BATTLEFIELD = 2
+
+
+def fight(owner, num_ships, fleets):
+    """
+    :param owner: `int` owner of the battlefield
+    :param num_ships: `int` ships on the battlefield
+    :param fleets: `list` of (owner, num_ships) fleets arriving next turn
+    :return: (owner, num_ships) of the battlefield after the turn
+    """
+
+    game = engine.Game(MAP_STRING.format(owner, num_ships))
+    for fleet_owner, fleet_ships in fleets:
+        game.fleets.append(planet_wars.Fleet(fleet_owner, fleet_ships, fleet_owner - 1, BATTLEFIELD, 1, 1))
+    game.do_time_step()
+    planet = game.planets[BATTLEFIELD]
+    return planet.owner(), planet.num_ships()
+
+
+def test_reinforcement():
+    assert fight(1, 10, [(1, 5)]) == (1, 15)
+    assert fight(1, 10, [(1, 5), (1, 7)]) == (1, 22)
+
+
+def test_attack():
+    assert fight(1, 10, [(2, 4)]) == (1, 6)
+    assert fight(1, 10, [(2, 14)]) == (2, 4)
+    assert fight(0, 10, [(1, 11)]) == (1, 1)
+
+
+def test_tie():
+    # the planet keeps its owner, without any ships
+    assert fight(1, 10, [(2, 10)]) == (1, 0)
+    assert fight(0, 10, [(1, 10)]) == (0, 0)
+
+
+def test_three_way():
+    assert fight(0, 10, [(1, 15), (2, 12)]) == (1, 3)
+    assert fight(0, 20, [(1, 5), (2, 8)]) == (0, 12)
+    assert fight(0, 5, [(1, 10), (2, 10)]) == (0, 0)
+    assert fight(0, 10, [(1, 12), (2, 12)]) == (0, 0)
+
+
+# answers every fleet line it gets with an "order" of (source, ships, turns remaining)
+ECHO_FLEETS = """
+import sys
+for line in sys.stdin:
+    if line.startswith("F"):
+        _, _, ships, source, _, _, remaining = line.split()
+        print(source, ships, remaining)
+    elif line.startswith("go"):
+        print("go")
+        sys.stdout.flush()
+"""
+
+
+def test_process_bot_state(tmp_path):
+    # `PlanetWars.to_string()` would merge the first two fleets and drop the third
+    script = tmp_path / "echo_fleets.py"
+    script.write_text(ECHO_FLEETS)
+    bot = engine.ProcessBot("{} {}".format(shlex.quote(sys.executable), shlex.quote(str(script))))
+
+    game = engine.Game(MAP_STRING.format(0, 10))
+    game.fleets.append(planet_wars.Fleet(1, 5, 0, BATTLEFIELD, 4, 3))
+    game.fleets.append(planet_wars.Fleet(1, 7, 1, BATTLEFIELD, 4, 3))
+    game.fleets.append(planet_wars.Fleet(1, 0, 0, BATTLEFIELD, 4, 3))
+    try:
+        assert engine.get_orders(bot, game.state_string(1), 0) == [(0, 5, 3), (1, 7, 3), (0, 0, 3)]
+    finally:
+        bot.close()
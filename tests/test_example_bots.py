@@ -0,0 +1,36 @@
+"""
+file: test_example_bots.py
+
+description: the python ports of the example bots have to count fleets and
+issue orders like the java bots, which see every fleet line and send empty
+orders.
+"""
+
+import os
+import sys
+
+ROOT_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir)
+sys.path.insert(0, os.path.join(ROOT_DIRECTORY, "tools"))
+
+import engine
+
+PLANETS = "P 5 5 0 3 1\nP 0 0 1 1 5\nP 10 0 2 30 5\n"
+
+
+def orders(name, state):
+    return engine.get_orders(engine.load_bot("example_bots/{}.py".format(name), ROOT_DIRECTORY), state, 0)
+
+
+def test_empty_orders():
+    # half of one ship is an empty order, which the java bots send anyway
+    assert orders("BullyBot", PLANETS) == [(1, 0, 0)]
+    assert orders("DualBot", PLANETS) == [(1, 0, 0)]
+
+
+def test_sent_fleets():
+    # an empty fleet, and two fleets that `PlanetWars.fleets()` merges
+    assert orders("BullyBot", PLANETS + "F 1 0 1 0 7 3\n") == []
+    # ahead in ships, so `DualBot` keeps up to three fleets in flight
+    state = PLANETS + "F 1 20 1 0 7 3\nF 1 20 1 0 7 3\n"
+    assert orders("DualBot", state) == [(1, 0, 0)]
+    assert orders("DualBot", state + "F 1 2 1 2 10 4\n") == []
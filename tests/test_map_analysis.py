@@ -0,0 +1,32 @@
+"""
+file: test_map_analysis.py
+
+description: maps that the analysis has to cope with even though no real map
+looks like them.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import map_analysis
+import planet_wars
+
+
+def analyse(map_string):
+    pw = planet_wars.PlanetWars()
+    pw.parse_game_state(map_string)
+    return map_analysis.analyse(pw.planets())
+
+
+def test_no_growth():
+    analysis = analyse("P 5 5 0 3 0\nP 0 0 1 10 0\nP 10 0 2 10 0\n")
+    assert analysis.total_growth == 0
+    assert list(analysis.surrounding_scores) == [0.0, 0.0, 0.0]
+
+
+def test_center_at_origin():
+    analysis = analyse("P 0 0 0 3 1\nP 1 0 1 10 5\nP 10 0 2 10 5\n")
+    assert analysis.map_size == 0
+    assert len(analysis.center_scores) == 3
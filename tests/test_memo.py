@@ -0,0 +1,38 @@
+"""
+file: test_memo.py
+
+description: every copy of the bot that the engine loads keeps its own
+caches, and gives them up once it's no longer used, however many games a
+tournament worker plays.
+"""
+
+import gc
+import os
+import sys
+import weakref
+
+ROOT_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir)
+sys.path.insert(0, os.path.join(ROOT_DIRECTORY, "tools"))
+
+import engine
+import map_generator
+
+LOADS = 20
+
+
+def test_caches_per_copy():
+    map_string = map_generator.generate_map()
+    memos = []
+    num_caches = None
+    for _ in range(LOADS):
+        do_turn = engine.load_bot("src/MyBot.py", ROOT_DIRECTORY)
+        engine.get_orders(do_turn, map_string, 0)
+        memo = do_turn.__globals__["MEMO"]
+        num_caches = num_caches or len(memo.caches)
+        assert len(memo.caches) == num_caches
+        assert any(memo.caches)
+        memos.append(weakref.ref(memo))
+        del do_turn, memo
+
+    gc.collect()
+    assert sum(memo() is not None for memo in memos) == 0
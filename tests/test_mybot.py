@@ -0,0 +1,23 @@
+"""
+file: test_mybot.py
+
+description: phases of the bot on states that `do_turn()` doesn't give them
+today, but that they have to cope with when they're called on their own.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import MyBot
+import planet_wars
+
+
+def test_redistribute_without_enemy():
+    planet_wars.PlanetWars.turn = 0
+    pw = planet_wars.PlanetWars()
+    pw.parse_game_state("P 10 10 0 5 1\nP 0 0 1 50 5\nP 20 0 1 50 5\nP 20 20 0 50 5\n")
+    pw.initialise()
+    MyBot.redistribute(pw)
+    assert pw.issued_orders() == []
@@ -0,0 +1,260 @@
+"""
+file: test_planet_wars.py
+
+description: a `PlanetWars` object kept for a whole game with `start_turn()`
+only updates what changed since the previous turn. whatever the bot did to it
+in between, it has to end up exactly like a freshly parsed one. the same goes
+for states parsed one line at a time, and for the messages `GameStateReader`
+cuts out of whatever the engine's pipe delivers.
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+ROOT_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir)
+sys.path.insert(0, os.path.join(ROOT_DIRECTORY, "tools"))
+
+import engine
+import map_generator
+import map_generator_v2
+import planet_wars
+
+MAPS: int = 2
+MAX_TURNS: int = 80
+
+
+def ids(planets):
+    return sorted(p.planet_id() for p in planets)
+
+
+def snapshot(pw):
+    """
+    :return: everything `initialise()` computes, with planets and fleets replaced by plain values
+    """
+
+    def fleet(f):
+        return f.owner(), f.num_ships(), f.source_planet(), f.destination_planet(), f.total_trip_length(), \
+            f.turns_remaining()
+
+    planets = [(p.owner(), p.num_ships(), p.growth_rate(), p.my_maximum_ships, p.enemy_maximum_ships,
+                p.my_arriving_ships, p.enemy_arriving_ships, p.my_maximum_ships_sums, p.enemy_maximum_ships_sums,
+                p.my_arriving_ships_sums, p.enemy_arriving_ships_sums, p.latency,
+                [fleet(f) for f in p.arriving_fleets],
+                [(p.timeline.owner(turn), p.timeline.num_ships(turn)) for turn in range(pw.map_size)])
+               for p in pw.planets()]
+    info = (pw.turns_remaining, pw.map_size, pw.my_total_ships, pw.enemy_total_ships, pw.my_growth_rate,
+            pw.enemy_growth_rate, pw.total_growth, pw.time_result, pw.peaceful, pw.chilling)
+    future = [{p.planet_id(): value for p, value in futures.items()}
+              for futures in (pw.my_future_neutrals, pw.enemy_future_neutrals, pw.my_future_planets,
+                              pw.enemy_future_planets)]
+    views = (ids(pw.my_planets()), ids(pw.enemy_planets()), ids(pw.neutral_planets()), ids(pw.not_my_planets()),
+             sorted(map(fleet, pw.my_fleets())), sorted(map(fleet, pw.enemy_fleets())),
+             pw.num_sent_fleets(1), pw.num_sent_fleets(2))
+    columns = (list(pw.columns.owners), list(pw.columns.num_ships))
+    return planets, [fleet(f) for f in pw.fleets()], info, future, views, columns, pw.to_string()
+
+
+def play(map_string, bots, states):
+    """
+    plays a game like `engine.play_game()`, checking each player's kept
+    `PlanetWars` object against a fresh one before its bot plays the turn.
+    """
+
+    game = engine.Game(map_string, MAX_TURNS)
+    checked = 0
+    while game.winner() == engine.NOT_FINISHED:
+        all_orders = {}
+        for player, bot in bots.items():
+            if not game.is_alive(player):
+                all_orders[player] = []
+                continue
+            state = game.state_string(player)
+
+            def checking_bot(pw):
+                nonlocal checked
+                fresh = planet_wars.PlanetWars()
+                fresh.parse_game_state(state)
+                fresh.initialise()
+                assert snapshot(pw) == snapshot(fresh), "turn {}, player {}".format(game.turn, player)
+                checked += 1
+                bot(pw)
+
+            all_orders[player] = engine.get_orders(checking_bot, state, game.turn, states[player])
+
+        for player, orders in all_orders.items():
+            for source_planet, destination_planet, num_ships in orders:
+                assert game.issue_order(player, source_planet, destination_planet, num_ships)
+        game.do_time_step()
+    return checked
+
+
+def test_kept_between_turns():
+    random.seed(0)
+    map_strings = [generator.generate_map() for generator in (map_generator, map_generator_v2) for _ in range(MAPS)]
+    opponents = ["src/MyBot.py", "example_bots/DualBot.py", "example_bots/RageBot.py"]
+
+    # the same objects for every game, so new maps are parsed into old ones too
+    states = {1: planet_wars.PlanetWars(), 2: planet_wars.PlanetWars()}
+    checked = 0
+    for index, map_string in enumerate(map_strings):
+        bots = {1: engine.load_bot("src/MyBot.py", ROOT_DIRECTORY),
+                2: engine.load_bot(opponents[index % len(opponents)], ROOT_DIRECTORY)}
+        planet_wars.PlanetWars.reset()
+        checked += play(map_string, bots, states)
+    assert checked > len(map_strings) * 40
+
+
+def test_parse_line_by_line():
+    random.seed(1)
+    game = engine.Game(map_generator_v2.generate_map())
+    game.fleets.append(planet_wars.Fleet(1, 5, 0, 2, 6, 4))
+    game.fleets.append(planet_wars.Fleet(1, 7, 1, 2, 6, 4))
+    game.fleets.append(planet_wars.Fleet(2, 0, 1, 3, 6, 2))
+    state = game.state_string(1) + "\n# a comment\nP 1 2 3\n"
+
+    whole = planet_wars.PlanetWars()
+    assert not whole.parse_game_state(state)
+    whole.initialise()
+    by_line = planet_wars.PlanetWars()
+    valid = [by_line.parse_game_state(line) for line in state.split("\n")]
+    by_line.initialise()
+    assert valid.count(False) == 1
+    assert snapshot(by_line) == snapshot(whole)
+
+    # parsed into planets that already exist
+    by_line.start_turn()
+    for line in state.split("\n"):
+        by_line.parse_game_state(line)
+    by_line.initialise()
+    assert snapshot(by_line) == snapshot(whole)
+
+
+def pipe(data):
+    """
+    :param data: `bytes` everything the engine sends
+    :return: `file` the read end of a pipe that is closed after `data`
+    """
+
+    read_end, write_end = os.pipe()
+    os.write(write_end, data)
+    os.close(write_end)
+    return os.fdopen(read_end)
+
+
+MESSAGES = b"P 0 0 1 10 5\nP 1 1 2 10 5\ngo\nP 0 0 1 15 5\nF 1 5 0 1 2 1\r\ngo\r\nreset\n"
+
+
+@pytest.mark.parametrize("read_size", [None, 1, 7])
+def test_read_messages(read_size):
+    # messages split across reads, or several in one read
+    with pipe(MESSAGES) as stream:
+        game_state_reader = planet_wars.GameStateReader(stream)
+        if read_size is not None:
+            game_state_reader._READ_SIZE = read_size
+        assert game_state_reader.read_message() == ("P 0 0 1 10 5\nP 1 1 2 10 5\n", "go")
+        assert game_state_reader.read_message() == ("P 0 0 1 15 5\nF 1 5 0 1 2 1\r\n", "go")
+        assert game_state_reader.read_message() == ("", "reset")
+        with pytest.raises(EOFError):
+            game_state_reader.read_message()
+
+
+def test_read_unfinished_message():
+    # a command is only complete with its newline
+    with pipe(b"P 0 0 1 10 5\ngo") as stream:
+        with pytest.raises(EOFError):
+            planet_wars.GameStateReader(stream).read_message()
+
+
+# distances from planet 0: 3 is 2.5 away and 1 and 2 are 3 away, which all round up to 3 turns
+NEIGHBOURS = "P 10 10 1 10 1\nP 13 10 2 10 1\nP 10 13 1 10 1\nP 12.5 10 2 10 1\nP 10 5 0 10 1\nP 6 10 1 10 1\n"
+
+
+def initialised(state):
+    planet_wars.PlanetWars.turn = 0
+    pw = planet_wars.PlanetWars()
+    pw.parse_game_state(state)
+    pw.initialise()
+    return pw
+
+
+def test_neighbours():
+    pw = initialised(NEIGHBOURS)
+    # by exact distance, then planet id; sorting by `distance()` alone would put 3 after 1 and 2
+    assert [p.planet_id() for p in pw.neighbours(0)] == [0, 3, 1, 2, 5, 4]
+    assert [p.planet_id() for p in pw.neighbours(5)] == [5, 0, 2, 4, 3, 1]
+
+
+def test_nearest_planets():
+    pw = initialised(NEIGHBOURS)
+    assert [p.planet_id() for p in pw.nearest_planets(0, 1)] == [0, 2, 5]
+    assert [p.planet_id() for p in pw.nearest_planets(0, 1, 2)] == [0, 2]
+    assert [p.planet_id() for p in pw.nearest_planets(0, 2, 5)] == [3, 1]
+    assert pw.nearest_planets(0, 1, 0) == []
+    assert pw.nearest_planet(0, 2).planet_id() == 3
+    assert pw.nearest_planet(5, 0).planet_id() == 4
+
+    # planets are compared by owner when they are looked up, not when the map was analysed
+    pw.get_planet(3).owner(1)
+    assert pw.nearest_planet(0, 2).planet_id() == 1
+    pw.get_planet(1).owner(1)
+    assert pw.nearest_planet(0, 2) is None
+    assert pw.nearest_planets(0, 2) == []
+
+
+def old_first_hop(pw, source_planet, destination_planet):
+    """
+    the proxy filter of `PlanetWars.issue_order()` before `PlanetWars._first_hop()`.
+    """
+
+    key = (source_planet, destination_planet)
+    initial_distance = pw.distance(source_planet, destination_planet)
+    other_planets = list(filter(lambda p: p.planet_id() not in key and
+                                          pw.distance(source_planet, p.planet_id()) +
+                                          pw.distance(p.planet_id(), destination_planet) <= initial_distance,
+                                pw.my_planets()))
+    if other_planets:
+        return min(other_planets, key=lambda p: pw.distance(source_planet, p.planet_id())).planet_id()
+    return destination_planet
+
+
+def test_first_hop_matches_old_filter():
+    random.seed(2)
+    rng = random.Random(2)
+    for generator in (map_generator, map_generator_v2):
+        for _ in range(10):
+            pw = initialised(generator.generate_map())
+            for planet in pw.planets():
+                planet.owner(rng.choice((0, 1, 1, 2)))
+            for source in pw.my_planets():
+                for destination in pw.planets():
+                    if destination is not source:
+                        assert pw._first_hop(source.planet_id(), destination.planet_id()) == \
+                            old_first_hop(pw, source.planet_id(), destination.planet_id())
+
+
+# on a line: 3 at x = 4, 0 at 10, 4 at 12, 2 at 13 and 1 at 16, so every detour through a planet in between is free
+ROUTES = "P 10 10 1 10 1\nP 16 10 2 10 1\nP 13 10 0 10 1\nP 4 10 1 10 1\nP 12 10 0 10 1\n"
+
+
+def test_first_hop_owner_changes():
+    pw = initialised(ROUTES)
+    assert pw._first_hop(3, 1) == 0
+    assert pw._first_hop(0, 1) == 1
+
+    # the routes from both sources were cached, a planet changing owner replaces them
+    pw.get_planet(2).owner(1)
+    assert pw._first_hop(0, 1) == 2
+    assert pw._first_hop(3, 1) == 0
+    pw.get_planet(0).owner(2)
+    assert pw._first_hop(3, 1) == 2
+    pw.get_planet(2).owner(0)
+    assert pw._first_hop(3, 1) == 1
+    pw.get_planet(4).owner(1)
+    assert pw._first_hop(3, 1) == 4
+
+    pw.issue_order(3, 1, 4)
+    pw.issue_order(3, 1, 4, proxy=False)
+    assert sorted(pw.issued_orders()) == [(3, 1, 4), (3, 4, 4)]
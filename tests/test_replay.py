@@ -0,0 +1,44 @@
+"""
+file: test_replay.py
+
+description: recordings are read back as they were written, and a bot that
+records never goes down because of its recording.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import MyBot
+import replay
+
+MAP_ONE = "P 5 5 0 3 1\nP 0 0 1 10 5\nP 10 0 2 10 5"
+MAP_TWO = "P 6 6 0 3 1\nP 0 0 1 10 5\nP 12 0 2 10 5"
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "game.pwr")
+    recorder = replay.Recorder(path, keyframe_interval=2)
+    states = [MAP_ONE, MAP_ONE.replace("1 10 5", "1 15 5"), MAP_ONE + "\nF 1 5 1 0 7 6",
+              MAP_ONE.replace("2 10 5", "2 1 5") + "\nF 1 5 1 0 7 5"]
+    for turn, state in enumerate(states):
+        recorder.record(turn, state, [(1, 0, turn)])
+    recorder.close()
+
+    recording = replay.Replay(path)
+    assert len(recording) == len(states)
+    assert [t.state for t in recording] == states
+    assert recording[3].orders == [(1, 0, 3)]
+
+
+def test_new_map(tmp_path, monkeypatch):
+    monkeypatch.setattr(replay, "RECORD_DIRECTORY", str(tmp_path))
+    recorder = MyBot.new_recording()
+    recorder = MyBot.record_turn(recorder, 0, MAP_ONE, [])
+    recorder = MyBot.record_turn(recorder, 1, MAP_TWO, [(1, 0, 5)])
+    recorder.close()
+
+    recordings = sorted(str(path) for path in tmp_path.glob("*.pwr"))
+    assert [len(replay.Replay(path)) for path in recordings] == [1, 1]
+    assert replay.Replay(recordings[1])[0].state == MAP_TWO
@@ -0,0 +1,63 @@
+"""
+file: test_rollout.py
+
+description: a worker that dies takes its rollouts with it, but never the
+turn: the pool carries on with the workers it has left. `search_bot.py` plays
+the rollouts within the time of the turn.
+"""
+
+import os
+import signal
+import sys
+import time
+
+ROOT_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir)
+sys.path.insert(0, os.path.join(ROOT_DIRECTORY, "src"))
+sys.path.insert(0, os.path.join(ROOT_DIRECTORY, "tools"))
+
+import deadline
+import engine
+import planet_wars
+import rollout
+import search
+
+MAP = "P 10 10 0 5 3\nP 0 0 1 60 5\nP 20 0 2 60 5\nP 3 4 0 2 2\nP 17 4 0 2 2\n"
+
+
+def test_dead_workers():
+    planet_wars.PlanetWars.turn = 0
+    pw = planet_wars.PlanetWars()
+    pw.parse_game_state(MAP)
+    pw.initialise()
+    game = search.Search.from_planet_wars(pw)
+    plans = game.alternatives([])
+
+    pool = rollout.RolloutPool(2)
+    try:
+        os.kill(pool._processes[0].pid, signal.SIGKILL)
+        values = pool.evaluate(game, plans, 0.5)
+        assert len(pool._processes) == 1
+        assert values[0] is not None
+
+        os.kill(pool._processes[0].pid, signal.SIGKILL)
+        pool.evaluate(game, plans, 0.5)
+        assert pool.evaluate(game, plans, 0.5) == [None] * len(plans)
+    finally:
+        pool.close()
+
+
+def test_search_bot():
+    do_turn = engine.load_bot("tools/search_bot.py", ROOT_DIRECTORY)
+    do_turn.__globals__["ROLLOUTS"] = True
+    planet_wars.PlanetWars.turn = 0
+    pw = planet_wars.PlanetWars()
+    pw.parse_game_state(MAP)
+    pw.initialise()
+    try:
+        turn_deadline = deadline.Deadline(0.5)
+        do_turn(pw, turn_deadline)
+        assert time.perf_counter() - turn_deadline.start < turn_deadline.budget
+        assert all(pw.get_planet(source).owner() == 1 for source, _, _ in pw.issued_orders())
+    finally:
+        if do_turn.__globals__["ROLLOUT_POOL"] is not None:
+            do_turn.__globals__["ROLLOUT_POOL"].close()
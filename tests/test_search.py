@@ -0,0 +1,35 @@
+"""
+file: test_search.py
+
+description: the search only ever weighs the orders of the turn against order
+sets one change away from them, never against unrelated ones.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "tools"))
+
+import search
+
+import planet_wars
+
+MAP = "P 10 10 0 5 3\nP 0 0 1 60 5\nP 20 0 2 60 5\nP 3 4 0 2 2\nP 17 4 0 2 2\n"
+
+
+def test_alternatives():
+    pw = planet_wars.PlanetWars()
+    planet_wars.PlanetWars.turn = 0
+    pw.parse_game_state(MAP)
+    pw.initialise()
+    root = search.Search.from_planet_wars(pw)
+    orders = [(1, 0, 10), (1, 3, 5)]
+
+    alternatives = root.alternatives(orders)
+    assert alternatives[0] == orders
+    assert [(1, 3, 5)] in alternatives and [(1, 0, 10)] in alternatives
+    for alternative in alternatives[1:]:
+        kept = [order for order in alternative if order in orders]
+        assert kept == alternative[:len(kept)]
+        assert (len(kept), len(alternative)) in ((len(orders) - 1, len(orders) - 1),
+                                                 (len(orders), len(orders) + 1))
@@ -0,0 +1,61 @@
+"""
+file: test_sprt.py
+
+description: log-likelihood ratios of known results, worked out separately
+from the win/draw/loss frequencies, and the verdicts they lead to.
+"""
+
+import math
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "tools"))
+
+import sprt
+
+
+def series(wins, draws, losses, **kwargs):
+    test = sprt.SPRT(**kwargs)
+    for result, count in (("win", wins), ("draw", draws), ("loss", losses)):
+        for _ in range(count):
+            test.add(result)
+    return test
+
+
+def test_bounds():
+    test = sprt.SPRT(alpha=0.05, beta=0.05)
+    assert test.lower_bound == pytest.approx(math.log(0.05 / 0.95))
+    assert test.upper_bound == pytest.approx(math.log(0.95 / 0.05))
+    assert sprt.SPRT(alpha=0.05, beta=0.1).lower_bound == pytest.approx(math.log(0.1 / 0.95))
+
+
+@pytest.mark.parametrize("wins, draws, losses, llr, verdict", [
+    (0, 0, 0, 0.0, None),
+    (1, 0, 0, 0.018910782153204037, None),
+    (60, 20, 40, 0.3409443412411983, None),
+    (40, 20, 60, -0.37197802608624275, None),
+    (500, 300, 480, 0.20268786774419578, None),
+    (100, 0, 0, 72.50114419950184, sprt.H1),
+    # all draws: a score of one half, which is what elo0 = 0 expects
+    (0, 10, 0, -0.012528146593581976, None),
+    (0, 300, 0, -9.380682723348103, sprt.H0),
+])
+def test_llr(wins, draws, losses, llr, verdict):
+    test = series(wins, draws, losses)
+    assert test.llr() == pytest.approx(llr)
+    assert test.verdict() == verdict
+
+
+def test_elo_range():
+    assert series(600, 0, 400, elo0=-10, elo1=10).llr() == pytest.approx(11.988322607992993)
+    assert sprt.elo_to_score(0) == 0.5
+    assert sprt.elo_to_score(400) == pytest.approx(10 / 11)
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        sprt.SPRT(elo0=5, elo1=5)
+    with pytest.raises(ValueError):
+        sprt.SPRT().add("timeout")
@@ -0,0 +1,185 @@
+"""
+file: test_timeline.py
+
+description: `Timeline` against the engine, and against the per-fleet loops
+that `MyBot.defend()` and `PlanetWars._get_future_neutrals()` used before it.
+the old loops are kept here as the reference. they agree with the timeline
+on the states they handled correctly: the old defend loop when no two fleets
+land on a planet on the same turn, and the old future neutrals loop when at
+most one fleet is on its way to each neutral planet.
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "tools"))
+
+import engine
+import planet_wars
+
+GAMES: int = 200
+
+
+def random_game(rng, simultaneous=True, one_per_planet=False):
+    """
+    :param simultaneous: `bool` whether fleets may land on a planet on the same turn
+    :param one_per_planet: `bool` whether to send at most one fleet to each planet
+    :return: `Game` object with random planets and fleets
+    """
+
+    num_planets = rng.randint(3, 12)
+    planets = ["P 10 10 0 {} {}".format(rng.randint(0, 50), rng.randint(0, 5))]
+    for _ in range(num_planets - 1):
+        planets.append("P {} {} {} {} {}".format(rng.uniform(0, 20), rng.uniform(0, 20), rng.choice((0, 1, 2)),
+                                                 rng.randint(0, 100), rng.randint(0, 5)))
+    game = engine.Game("\n".join(planets))
+
+    used_turns = set()
+    for _ in range(rng.randint(0, 20)):
+        destination = rng.randrange(num_planets)
+        turns_remaining = rng.randint(1, 15)
+        if one_per_planet:
+            if any(d == destination for d, _ in used_turns):
+                continue
+            used_turns.add((destination, turns_remaining))
+        elif not simultaneous:
+            if (destination, turns_remaining) in used_turns:
+                continue
+            used_turns.add((destination, turns_remaining))
+        source = (destination + rng.randint(1, num_planets - 1)) % num_planets
+        game.fleets.append(planet_wars.Fleet(rng.choice((1, 2)), rng.randint(1, 60), source, destination,
+                                             turns_remaining + rng.randint(0, 5), turns_remaining))
+    return game
+
+
+def planet_wars_of(game):
+    planet_wars.PlanetWars.turn = 0
+    pw = planet_wars.PlanetWars()
+    pw.parse_game_state(game.state_string(1))
+    pw.initialise()
+    return pw
+
+
+def old_defend(planet):
+    """
+    the loop of `MyBot.defend()` before `Timeline.minimum_held()`.
+    :return: (fewest ships, turn of the fewest ships, first turn below zero or `None`)
+    """
+
+    sorted_fleets = planet.arriving_fleets
+
+    first_oof = False
+    minimum_ships_data = [planet.num_ships(), 0]
+    cache_data = [planet.num_ships(), 0]  # (number of ships, turns past)
+    for index, fleet in enumerate(sorted_fleets):
+        cache_data[0] += planet.growth_rate() * (fleet.turns_remaining() - cache_data[1])
+        cache_data[0] += (-2 * fleet.owner() + 3) * fleet.num_ships()
+        cache_data[1] = fleet.turns_remaining()
+
+        try:
+            if cache_data[0] < minimum_ships_data[0] and \
+                    sorted_fleets[index + 1].turns_remaining() != cache_data[1]:
+                minimum_ships_data = cache_data[:]
+        except IndexError:
+            minimum_ships_data = cache_data[:]
+        finally:
+            if cache_data[0] < 0 and not first_oof:
+                first_oof = fleet.turns_remaining()
+
+    return minimum_ships_data[0], minimum_ships_data[1], first_oof or None
+
+
+def old_future_neutrals(pw):
+    """
+    `PlanetWars._get_future_neutrals()` before `Timeline.first_change()`.
+    :return: `list` of `{planet id: (turns to take, ships left)}` for each player
+    """
+
+    future_planets = [{}, {}]
+    pseudo_ships = {p.planet_id(): p.num_ships() for p in pw.neutral_planets()}
+    # by turns remaining, then destination
+    neutral_arriving_fleets = sorted((f for p in pw.neutral_planets() for f in p.arriving_fleets),
+                                     key=lambda f: f.turns_remaining())
+    for index, fleet in enumerate(neutral_arriving_fleets):
+        try:
+            pseudo_ships[fleet.destination_planet()] -= fleet.num_ships()
+            if pseudo_ships[fleet.destination_planet()] < 0:
+                next_fleet = neutral_arriving_fleets[index + 1]
+                if fleet.destination_planet() != next_fleet.destination_planet() or \
+                        next_fleet.turns_remaining() > fleet.turns_remaining():
+                    future_planets[fleet.owner() - 1][fleet.destination_planet()] = (
+                        fleet.turns_remaining(), abs(pseudo_ships[fleet.destination_planet()]))
+                    del pseudo_ships[fleet.destination_planet()]
+                elif fleet.destination_planet() == next_fleet.destination_planet():
+                    if fleet.num_ships() > next_fleet.num_ships():
+                        future_planets[fleet.owner() - 1][fleet.destination_planet()] = (
+                            fleet.turns_remaining(), fleet.num_ships() - next_fleet.num_ships())
+                        del pseudo_ships[fleet.destination_planet()]
+                    elif fleet.num_ships() < next_fleet.num_ships():
+                        future_planets[next_fleet.owner() - 1][fleet.destination_planet()] = (
+                            next_fleet.turns_remaining(), next_fleet.num_ships() - fleet.num_ships())
+                        del pseudo_ships[fleet.destination_planet()]
+                    else:
+                        pseudo_ships[fleet.destination_planet()] = 0
+            elif fleet.destination_planet() == neutral_arriving_fleets[index + 1].destination_planet():
+                pseudo_ships[fleet.destination_planet()] += min(fleet.num_ships(),
+                                                                neutral_arriving_fleets[index + 1].num_ships())
+        except IndexError:
+            if pseudo_ships[fleet.destination_planet()] < 0:
+                future_planets[fleet.owner() - 1][fleet.destination_planet()] = (
+                    fleet.turns_remaining(), abs(pseudo_ships[fleet.destination_planet()]))
+                del pseudo_ships[fleet.destination_planet()]
+        except KeyError:
+            pass
+    return future_planets
+
+
+def test_matches_engine():
+    rng = random.Random(0)
+    for _ in range(GAMES):
+        game = random_game(rng)
+        timelines = [planet.timeline for planet in planet_wars_of(game).planets()]
+        for turn in range(1, 21):
+            game.do_time_step()
+            for planet, timeline in zip(game.planets, timelines):
+                assert (timeline.owner(turn), timeline.num_ships(turn)) == (planet.owner(), planet.num_ships())
+
+
+def test_defend_matches_old_loop():
+    rng = random.Random(1)
+    for _ in range(GAMES):
+        for planet in planet_wars_of(random_game(rng, simultaneous=False)).my_planets():
+            assert planet.timeline.minimum_held(planet.num_ships()) == old_defend(planet)
+
+
+def test_defend_simultaneous_arrivals():
+    # the old loop saw the enemy fleet land before ours and called the planet
+    # lost on turn 3, but the engine fights both fleets at once and we keep it
+    game = engine.Game("P 10 10 0 5 1\nP 0 0 1 10 0\nP 20 0 2 10 0")
+    game.fleets.append(planet_wars.Fleet(2, 15, 2, 1, 3, 3))
+    game.fleets.append(planet_wars.Fleet(1, 10, 0, 1, 3, 3))
+    planet = planet_wars_of(game).get_planet(1)
+    planet.arriving_fleets.sort(key=lambda f: f.owner(), reverse=True)
+    assert old_defend(planet) == (5, 3, 3)
+    assert planet.timeline.minimum_held(planet.num_ships()) == (5, 3, None)
+
+
+def test_future_neutrals_match_old_loop():
+    rng = random.Random(2)
+    for _ in range(GAMES):
+        pw = planet_wars_of(random_game(rng, one_per_planet=True))
+        new = [{planet.planet_id(): value for planet, value in future_neutrals.items()}
+               for future_neutrals in (pw.my_future_neutrals, pw.enemy_future_neutrals)]
+        assert new == old_future_neutrals(pw)
+
+
+def test_future_neutrals_several_fleets():
+    # the old loop added ships back whenever the next fleet had the same
+    # destination, so it missed that the second fleet takes the planet
+    game = engine.Game("P 10 10 0 10 1\nP 0 0 1 50 0\nP 20 0 2 50 0")
+    game.fleets.append(planet_wars.Fleet(1, 5, 1, 0, 2, 2))
+    game.fleets.append(planet_wars.Fleet(1, 8, 1, 0, 4, 4))
+    pw = planet_wars_of(game)
+    assert old_future_neutrals(pw) == [{}, {}]
+    assert pw.my_future_neutrals == {pw.get_planet(0): (4, 3)}
@@ -0,0 +1,212 @@
+"""
+file: batch_simulator.py
+
+description: lockstep simulator for many games at once, for parameter sweeps.
+every game's planets are rows of numpy arrays and fleets are kept as an
+arrival histogram indexed by [game, owner, destination, arrival turn], so one
+call to `BatchSimulator.step()` advances all games by one turn with the same
+rules as `engine.Game` (departure, growth, arrival, multi-owner combat and the
+turn limit / elimination end conditions).
+
+policies are vectorized: `policy(simulator, player)` returns an integer array
+of shape (games, planets, planets) where `orders[g, s, d]` is the number of
+ships player `player` sends from planet `s` to planet `d` in game `g`.
+
+needs numpy, see `requirements.txt`.
+
+usage: python batch_simulator.py [games]   (plays `rage_policy` against itself on generated maps)
+"""
+
+import random
+import sys
+import typing
+
+import numpy
+
+import engine
+import map_generator_v2
+
+import planet_wars
+import utils
+
+POLICY_FUNCTION = typing.Callable[["BatchSimulator", int], numpy.ndarray]
+
+# owners: neutral, player 1 and player 2
+OWNERS: int = 3
+
+
+class BatchSimulator:
+    def __init__(self, map_strings: typing.List[str], max_turns: int = planet_wars.TOTAL_TURNS):
+        maps = []
+        for map_string in map_strings:
+            parser = planet_wars.PlanetWars()
+            if not parser.parse_game_state(map_string):
+                raise ValueError("invalid map")
+            maps.append(parser)
+
+        self.games: int = len(maps)
+        self.planets: int = max(parser.num_planets() for parser in maps)
+        self.max_turns: int = max_turns
+        self.turn: int = 0
+
+        shape = (self.games, self.planets)
+        self.owner: numpy.ndarray = numpy.zeros(shape, dtype=numpy.int64)
+        self.ships: numpy.ndarray = numpy.zeros(shape, dtype=numpy.int64)
+        self.growth: numpy.ndarray = numpy.zeros(shape, dtype=numpy.int64)
+        # maps with fewer planets are padded with planets that can't be targeted
+        self.valid: numpy.ndarray = numpy.zeros(shape, dtype=bool)
+        self.distances: numpy.ndarray = numpy.zeros((self.games, self.planets, self.planets), dtype=numpy.int64)
+
+        for game, parser in enumerate(maps):
+            columns = parser.columns
+            planets = len(columns)
+            self.owner[game, :planets] = numpy.frombuffer(columns.owners, dtype=numpy.int64)
+            self.ships[game, :planets] = numpy.frombuffer(columns.num_ships, dtype=numpy.int64)
+            self.growth[game, :planets] = numpy.frombuffer(columns.growth_rates, dtype=numpy.int64)
+            self.valid[game, :planets] = True
+            xs, ys = numpy.frombuffer(columns.xs), numpy.frombuffer(columns.ys)
+            self.distances[game, :planets, :planets] = numpy.ceil(numpy.sqrt(
+                (xs[:, None] - xs[None, :]) ** 2 + (ys[:, None] - ys[None, :]) ** 2))
+
+        # fleets, bucketed by arrival turn modulo the longest trip. an order
+        # matrix can't express empty fleets, so every bucket with ships is alive.
+        self.horizon: int = int(self.distances.max()) + 2
+        self.arriving_ships: numpy.ndarray = numpy.zeros((self.games, OWNERS, self.planets, self.horizon),
+                                                         dtype=numpy.int64)
+
+        self.winner: numpy.ndarray = numpy.full(self.games, engine.NOT_FINISHED, dtype=numpy.int64)
+        self.turns: numpy.ndarray = numpy.zeros(self.games, dtype=numpy.int64)
+        self.dropped: numpy.ndarray = numpy.zeros((self.games, OWNERS), dtype=bool)
+
+    def active(self) -> numpy.ndarray:
+        return self.winner == engine.NOT_FINISHED
+
+    def is_alive(self, player: int) -> numpy.ndarray:
+        return (self.owner == player).any(axis=1) | (self.arriving_ships[:, player] > 0).any(axis=(1, 2))
+
+    def total_ships(self, player: int) -> numpy.ndarray:
+        return numpy.where(self.owner == player, self.ships, 0).sum(axis=1) + \
+               self.arriving_ships[:, player].sum(axis=(1, 2))
+
+    def drop_player(self, player: int, games: numpy.ndarray) -> None:
+        self.owner[games[:, None] & (self.owner == player)] = 0
+        self.arriving_ships[games, player] = 0
+        self.dropped[games, player] = True
+
+    def issue_orders(self, player: int, orders: numpy.ndarray) -> None:
+        """
+        departure. games where `player` gives an invalid order drop the player,
+        like `engine.play_game()` does.
+        :param player: `int` 1 or 2
+        :param orders: `numpy.ndarray` (games, planets, planets) ships to send
+        """
+
+        orders = numpy.where(self.active()[:, None, None], orders, 0)
+        sent = orders.sum(axis=2)
+        invalid = (orders < 0).any(axis=(1, 2)) | \
+                  ((orders > 0) & ~self.valid[:, None, :]).any(axis=(1, 2)) | \
+                  ((sent > 0) & (self.owner != player)).any(axis=1) | \
+                  (sent > self.ships).any(axis=1)
+        if invalid.any():
+            self.drop_player(player, invalid)
+            orders[invalid] = 0
+            sent[invalid] = 0
+
+        self.ships -= sent
+
+        games, sources, destinations = numpy.nonzero(orders)
+        trip_lengths = numpy.maximum(self.distances[games, sources, destinations], 1)
+        buckets = (self.turn + trip_lengths) % self.horizon
+        numpy.add.at(self.arriving_ships, (games, player, destinations, buckets), orders[games, sources, destinations])
+
+    def step(self, policy_one: POLICY_FUNCTION, policy_two: POLICY_FUNCTION) -> None:
+        """
+        plays one turn of every unfinished game.
+        """
+
+        active = self.active()
+        policies = {1: policy_one, 2: policy_two}
+        all_orders = {}
+        for player, policy in policies.items():
+            all_orders[player] = numpy.where((active & self.is_alive(player))[:, None, None],
+                                             policy(self, player), 0)
+        for player, orders in all_orders.items():
+            self.issue_orders(player, orders)
+
+        # growth
+        self.ships += numpy.where(active[:, None] & (self.owner != 0), self.growth, 0)
+
+        # arrival
+        bucket = (self.turn + 1) % self.horizon
+        forces = numpy.where(active[:, None, None], self.arriving_ships[:, :, :, bucket], 0)
+        self.arriving_ships[active, :, :, bucket] = 0
+        forces += (self.owner[:, None, :] == numpy.arange(OWNERS)[None, :, None]) * self.ships[:, None, :]
+
+        # combat: the largest force wins and keeps the difference to the second
+        # largest force. ties leave the planet with its owner and no ships.
+        ordered = numpy.sort(forces, axis=1)
+        first, second = ordered[:, -1], ordered[:, -2]
+        won = active[:, None] & (first > second)
+        self.owner = numpy.where(won, forces.argmax(axis=1), self.owner)
+        self.ships = numpy.where(active[:, None], numpy.where(won, first - second, 0), self.ships)
+
+        self.turn += 1
+        self.turns[active] = self.turn
+        self._update_winner(active)
+
+    def _update_winner(self, active: numpy.ndarray) -> None:
+        alive_one, alive_two = self.is_alive(1), self.is_alive(2)
+        winner = numpy.full(self.games, engine.NOT_FINISHED, dtype=numpy.int64)
+
+        if self.turn >= self.max_turns:
+            ships_one, ships_two = self.total_ships(1), self.total_ships(2)
+            winner = numpy.where(ships_one > ships_two, 1, numpy.where(ships_one < ships_two, 2, engine.DRAW))
+        winner = numpy.where(alive_one & ~alive_two, 1, winner)
+        winner = numpy.where(alive_two & ~alive_one, 2, winner)
+        winner = numpy.where(~alive_one & ~alive_two, engine.DRAW, winner)
+
+        self.winner = numpy.where(active, winner, self.winner)
+
+    def run(self, policy_one: POLICY_FUNCTION, policy_two: POLICY_FUNCTION) -> numpy.ndarray:
+        """
+        plays every game to the end.
+        :return: `numpy.ndarray` winner of each game
+        """
+
+        while self.active().any():
+            self.step(policy_one, policy_two)
+        return self.winner
+
+
+def rage_policy(simulator: BatchSimulator, player: int) -> numpy.ndarray:
+    """
+    vectorized `RageBot`: every planet with at least ten turns of growth sends
+    all of its ships to the closest enemy planet.
+    """
+
+    enemy = 3 - player
+    sources = (simulator.owner == player) & (simulator.ships >= 10 * simulator.growth)
+    distances = numpy.where((simulator.owner == enemy)[:, None, :], simulator.distances, utils.INFINITY)
+    targets = distances.argmin(axis=2)
+    sources &= distances.min(axis=2) < utils.INFINITY
+
+    orders = numpy.zeros((simulator.games, simulator.planets, simulator.planets), dtype=numpy.int64)
+    games, planets = numpy.nonzero(sources)
+    orders[games, planets, targets[games, planets]] = simulator.ships[games, planets]
+    return orders
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    maps = []
+    for seed in range(games):
+        random.seed(seed)
+        maps.append(map_generator_v2.generate_map())
+
+    winners = BatchSimulator(maps).run(rage_policy, rage_policy)
+    print("player 1: {}, player 2: {}, draws: {}".format(
+        (winners == 1).sum(), (winners == 2).sum(), (winners == engine.DRAW).sum()))
+
+
+if __name__ == '__main__':
+    main()
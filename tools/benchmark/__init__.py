@@ -0,0 +1,12 @@
+"""
+file: benchmark/__init__.py
+
+description: benchmarks of `PlanetWars.parse_game_state()`,
+`PlanetWars.initialise()` and `MyBot.do_turn()` over a versioned corpus of game
+states recorded from real games. run from the `tools` directory:
+
+    python -m benchmark record v3                 (records a new corpus version)
+    python -m benchmark run --output new.json     (times this checkout)
+    python -m benchmark run --source <other checkout>/src --output old.json
+    python -m benchmark compare old.json new.json
+"""
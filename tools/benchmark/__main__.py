@@ -0,0 +1,67 @@
+"""
+file: benchmark/__main__.py
+
+description: command line of the benchmark package, see `benchmark/__init__.py`.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+SOURCE_DIRECTORY = os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir))
+if SOURCE_DIRECTORY not in sys.path:
+    sys.path.insert(0, SOURCE_DIRECTORY)
+
+from benchmark import compare
+from benchmark import corpus
+from benchmark import runner
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="record a new corpus version")
+    record_parser.add_argument("version", help="name of the new version, e.g. v2")
+    record_parser.add_argument("--games", type=int, default=corpus.GAMES_PER_SIZE, help="games per map size")
+
+    run_parser = commands.add_parser("run", help="time a checkout")
+    run_parser.add_argument("--source", default=runner.DEFAULT_SOURCE, help="src directory of the checkout")
+    run_parser.add_argument("--corpus", default=corpus.DEFAULT_VERSION, help="corpus version")
+    run_parser.add_argument("--warmup", type=int, default=3)
+    run_parser.add_argument("--repetitions", type=int, default=20)
+    run_parser.add_argument("--benchmarks", nargs="+", default=runner.BENCHMARKS, choices=runner.BENCHMARKS)
+    run_parser.add_argument("--states", nargs="+", help="names of the states to time, default all")
+    run_parser.add_argument("--output", help="results file, default stdout")
+
+    compare_parser = commands.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        states = corpus.record(args.version, args.games)
+        print("recorded {} states in {}".format(len(states), os.path.join(corpus.CORPUS_DIRECTORY, args.version)))
+
+    elif args.command == "run":
+        results = runner.run(args.source, args.corpus, args.warmup, args.repetitions, args.benchmarks, args.states)
+        output = json.dumps(results, indent=2)
+        if args.output is None:
+            print(output)
+        else:
+            with open(args.output, "w") as output_file:
+                output_file.write(output + "\n")
+
+    else:
+        with open(args.base) as base_file, open(args.new) as new_file:
+            rows = compare.compare(json.load(base_file), json.load(new_file))
+        for name, base_median, new_median, ratio in rows:
+            print("{:<32} {:>12.1f} us {:>12.1f} us {:>8.3f}x".format(name, base_median, new_median, ratio))
+        for benchmark, mean in sorted(compare.geometric_means(rows).items()):
+            print("{:<32} geometric mean {:>8.3f}x".format(benchmark, mean))
+
+
+if __name__ == '__main__':
+    main()
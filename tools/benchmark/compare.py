@@ -0,0 +1,38 @@
+"""
+file: benchmark/compare.py
+
+description: compares two results files of `benchmark.runner.run()` by the
+median time of every benchmark they have in common.
+"""
+
+import math
+import typing
+
+
+def compare(base: dict, new: dict) -> typing.List[typing.Tuple[str, float, float, float]]:
+    """
+    :param base: `dict` results of the reference checkout
+    :param new: `dict` results of the checkout being measured
+    :return: `list` of (benchmark, base median, new median, new / base) in microseconds
+    """
+
+    if base["corpus"] != new["corpus"]:
+        raise ValueError("results of different corpus versions: {} and {}".format(base["corpus"], new["corpus"]))
+
+    rows = []
+    for name in sorted(base["results"].keys() & new["results"].keys()):
+        base_median = base["results"][name]["median_us"]
+        new_median = new["results"][name]["median_us"]
+        rows.append((name, base_median, new_median, new_median / base_median))
+    return rows
+
+
+def geometric_means(rows: typing.List[typing.Tuple[str, float, float, float]]) -> typing.Dict[str, float]:
+    """
+    :return: `dict` benchmark (the part of the name before "/") -> geometric mean of its ratios
+    """
+
+    logarithms = {}
+    for name, _, _, ratio in rows:
+        logarithms.setdefault(name.split("/")[0], []).append(math.log(ratio))
+    return {benchmark: math.exp(sum(values) / len(values)) for benchmark, values in logarithms.items()}
@@ -0,0 +1,133 @@
+"""
+file: benchmark/corpus.py
+
+description: the corpus is a directory per version (`corpus/v1`, ...) with one
+file per game state and a `manifest.json` describing them. states are taken
+from `MyBot` self-play games on small and large generated maps: the opening,
+the middle of the game and the endgame turn with the most fleets in flight.
+since v2, every state after the first turn comes with the state of the turn
+before it, so that a benchmark can time the bot the way it runs in the middle
+of a game, with the `PlanetWars` object of its previous turn. a recorded
+version is never changed, so results of the same version compare.
+"""
+
+import json
+import os
+import random
+import typing
+
+CORPUS_DIRECTORY: str = os.path.join(os.path.dirname(os.path.realpath(__file__)), "corpus")
+DEFAULT_VERSION: str = "v2"
+MANIFEST: str = "manifest.json"
+
+# map size category -> (minimum, maximum) number of planets, within the range
+# of `map_generator_v2`
+MAP_SIZES: typing.Dict[str, typing.Tuple[int, int]] = {
+    "small": (15, 19),
+    "large": (27, 30),
+}
+GAMES_PER_SIZE: int = 3
+
+
+class State:
+    def __init__(self, name: str, state: str, turn: int, map_size: str, phase: str, seed: int,
+                 previous: typing.Optional[str] = None):
+        self.name: str = name
+        self.state: str = state
+        # the state the same player saw on the turn before, if there was one
+        # and the version has it
+        self.previous: typing.Optional[str] = previous
+        # turns already played, i.e. `PlanetWars.turn` when the state was seen
+        self.turn: int = turn
+        self.map_size: str = map_size
+        self.phase: str = phase
+        self.seed: int = seed
+
+
+def load(version: str = DEFAULT_VERSION) -> typing.List[State]:
+    directory = os.path.join(CORPUS_DIRECTORY, version)
+    with open(os.path.join(directory, MANIFEST)) as manifest_file:
+        manifest = json.load(manifest_file)
+
+    states = []
+    for entry in manifest["states"]:
+        with open(os.path.join(directory, entry["file"])) as state_file:
+            state = State(entry["name"], state_file.read(), entry["turn"], entry["map_size"],
+                          entry["phase"], entry["seed"])
+        if entry.get("previous") is not None:
+            with open(os.path.join(directory, entry["previous"])) as previous_file:
+                state.previous = previous_file.read()
+        states.append(state)
+    return states
+
+
+def _select(states: typing.List[typing.Tuple[int, str]]) -> typing.Dict[str, int]:
+    """
+    :param states: `list` of (turn, state) seen by one player, in order
+    :return: `dict` phase -> index in `states`
+    """
+
+    endgame = range(2 * len(states) // 3, len(states)) or range(len(states) - 1, len(states))
+    return {
+        "opening": 0,
+        "midgame": len(states) // 2,
+        "endgame": max(endgame, key=lambda i: states[i][1].count("\nF ")),
+    }
+
+
+def record(version: str, games_per_size: int = GAMES_PER_SIZE) -> typing.List[State]:
+    """
+    plays `MyBot` against itself and writes a new corpus version.
+    :param version: `str` name of the version, must not exist yet
+    :param games_per_size: `int` number of games per map size category
+    :return: `list` of `State` objects
+    """
+
+    # only recording needs the engine (which puts this checkout's `src` first
+    # on the path), running a benchmark may be pointed at another checkout
+    import engine
+    import map_generator_v2
+
+    directory = os.path.join(CORPUS_DIRECTORY, version)
+    os.makedirs(directory)
+
+    bot = os.path.join(engine.SOURCE_DIRECTORY, "MyBot.py")
+    corpus = []
+    seed = 0
+    for map_size, (minimum, maximum) in MAP_SIZES.items():
+        for game in range(games_per_size):
+            while True:
+                random.seed(seed)
+                map_string = map_generator_v2.generate_map()
+                seed += 1
+                if minimum <= map_string.count("P ") <= maximum:
+                    break
+
+            states = []
+            engine.play_game(map_string, engine.load_bot(bot), engine.load_bot(bot),
+                             observer=lambda turn, player, state, orders:
+                             states.append((turn, state)) if player == 1 else None)
+
+            for phase, index in _select(states).items():
+                name = "{}-{}-{}".format(map_size, phase, game)
+                turn, state = states[index]
+                previous = states[index - 1][1] if index > 0 and states[index - 1][0] == turn - 1 else None
+                corpus.append(State(name, state, turn, map_size, phase, seed - 1, previous))
+
+    entries = []
+    for state in corpus:
+        file_name = state.name + ".txt"
+        with open(os.path.join(directory, file_name), "w") as state_file:
+            state_file.write(state.state)
+        previous_file_name = None
+        if state.previous is not None:
+            previous_file_name = state.name + ".previous.txt"
+            with open(os.path.join(directory, previous_file_name), "w") as previous_file:
+                previous_file.write(state.previous)
+        entries.append({"name": state.name, "file": file_name, "previous": previous_file_name, "turn": state.turn,
+                        "map_size": state.map_size, "phase": state.phase, "seed": state.seed})
+    with open(os.path.join(directory, MANIFEST), "w") as manifest_file:
+        json.dump({"version": version, "states": entries}, manifest_file, indent=2)
+        manifest_file.write("\n")
+
+    return corpus
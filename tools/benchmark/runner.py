@@ -0,0 +1,150 @@
+"""
+file: benchmark/runner.py
+
+description: times `PlanetWars.parse_game_state()`, `PlanetWars.initialise()`
+and `MyBot.do_turn()` on every state of a corpus. outside of the timed region,
+every repetition gets a `PlanetWars` object that has played the turn before
+the state, as `MyBot.main()` keeps it between turns, and the warmup
+repetitions fill the in-memory map analysis cache, so the times are those of a
+bot in the middle of a game. states without a previous turn (the opening, or
+a v1 corpus) and checkouts that don't keep their `PlanetWars` object between
+turns get a fresh one, which is what such a bot uses.
+"""
+
+import contextlib
+import gc
+import io
+import importlib
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import typing
+
+from benchmark import corpus
+
+DEFAULT_SOURCE: str = os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "src"))
+BENCHMARKS: typing.Tuple[str, ...] = ("parse", "initialise", "do_turn")
+
+# results file format, bump when it changes
+RESULTS_VERSION: int = 1
+
+
+def _import_source(source: str):
+    """
+    imports `planet_wars` and `MyBot` from the `src` directory of a checkout.
+    :return: `tuple` of the two modules
+    """
+
+    sys.path.insert(0, source)
+    return importlib.import_module("planet_wars"), importlib.import_module("MyBot")
+
+
+def _revision(source: str) -> typing.Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=source, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _time(setup: typing.Callable[[], typing.Any], function: typing.Callable[[typing.Any], typing.Any],
+          warmup: int, repetitions: int) -> typing.List[float]:
+    """
+    :return: `list` of seconds taken by `function(setup())`, one per repetition
+    """
+
+    samples = []
+    for repetition in range(warmup + repetitions):
+        argument = setup()
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            function(argument)
+            elapsed = time.perf_counter() - start
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if repetition >= warmup:
+            samples.append(elapsed)
+    return samples
+
+
+def run(source: str = DEFAULT_SOURCE, version: str = corpus.DEFAULT_VERSION, warmup: int = 3,
+        repetitions: int = 20, benchmarks: typing.Sequence[str] = BENCHMARKS,
+        names: typing.Optional[typing.Sequence[str]] = None) -> dict:
+    """
+    :param source: `str` the `src` directory of the checkout to time
+    :param version: `str` corpus version
+    :param warmup: `int` untimed repetitions before the timed ones
+    :param repetitions: `int` timed repetitions per state
+    :param benchmarks: `list` of names from `BENCHMARKS`
+    :param names: `list` of state names to time, None -> all
+    :return: `dict` the results, see `RESULTS_VERSION`
+    """
+
+    planet_wars, bot = _import_source(os.path.realpath(source))
+
+    def warmed(state: corpus.State):
+        if hasattr(bot, "reset_state"):
+            bot.reset_state()
+        elif hasattr(bot, "reset"):
+            # older checkouts only have the reset that reports the statistics of the game
+            with contextlib.redirect_stderr(io.StringIO()):
+                bot.reset()
+        pw = planet_wars.PlanetWars()
+        if state.previous is not None and hasattr(pw, "start_turn"):
+            planet_wars.PlanetWars.turn = state.turn - 1
+            pw.parse_game_state(state.previous)
+            pw.initialise()
+            bot.do_turn(pw)
+            pw.start_turn()
+        planet_wars.PlanetWars.turn = state.turn
+        return pw
+
+    def parsed(state: corpus.State):
+        pw = warmed(state)
+        pw.parse_game_state(state.state)
+        return pw
+
+    def initialised(state: corpus.State):
+        pw = parsed(state)
+        pw.initialise()
+        return pw
+
+    setups = {
+        "parse": lambda state: (lambda: warmed(state)),
+        "initialise": lambda state: (lambda: parsed(state)),
+        "do_turn": lambda state: (lambda: initialised(state)),
+    }
+    functions = {
+        "parse": lambda state: (lambda pw: pw.parse_game_state(state.state)),
+        "initialise": lambda state: (lambda pw: pw.initialise()),
+        "do_turn": lambda state: (lambda pw: bot.do_turn(pw)),
+    }
+
+    results = {}
+    for state in corpus.load(version):
+        if names is not None and state.name not in names:
+            continue
+        for benchmark in benchmarks:
+            samples = _time(setups[benchmark](state), functions[benchmark](state), warmup, repetitions)
+            results["{}/{}".format(benchmark, state.name)] = {
+                "median_us": round(statistics.median(samples) * 1e6, 2),
+                "min_us": round(min(samples) * 1e6, 2),
+                "samples_us": [round(s * 1e6, 2) for s in samples],
+            }
+
+    return {
+        "version": RESULTS_VERSION,
+        "corpus": version,
+        "source": os.path.realpath(source),
+        "revision": _revision(source),
+        "python": platform.python_version(),
+        "warmup": warmup,
+        "repetitions": repetitions,
+        "results": results,
+    }
@@ -0,0 +1,104 @@
+"""
+file: conformance.py
+
+description: checks that the python ports in `example_bots/` issue the same
+orders as the original java bots, in the same order and including empty
+orders. game states are recorded from in-process games (or read from a
+directory of state files), then given to both versions of each bot.
+
+usage: python conformance.py [--games 10] [--seed 0] [--states <directory>] [--bots BullyBot RageBot ...]
+"""
+
+import argparse
+import os
+import random
+import sys
+import typing
+
+import engine
+import map_generator_v2
+
+ROOT_DIRECTORY: str = os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# `ExpandBot.java` is a copy of `BullyBot.java` and has no jar of its own.
+# `RandomBot` isn't listed since it can't be reproduced.
+JAVA_BOTS: typing.Dict[str, str] = {
+    "BullyBot": "java -jar example_bots/BullyBot.jar",
+    "DualBot": "java -jar example_bots/DualBot.jar",
+    "ExpandBot": "java -jar example_bots/BullyBot.jar",
+    "ProspectorBot": "java -jar example_bots/ProspectorBot.jar",
+    "RageBot": "java -jar example_bots/RageBot.jar",
+}
+
+
+def record_states(games: int, seed: int) -> typing.List[str]:
+    """
+    plays every port against every other port and records the states that
+    each seat saw.
+    :return: `list` of game states
+    """
+
+    states = []
+    names = sorted(JAVA_BOTS)
+    for game in range(games):
+        random.seed(seed + game)
+        map_string = map_generator_v2.generate_map()
+        bot_one, bot_two = names[game % len(names)], names[(game // len(names) + game + 1) % len(names)]
+        engine.play_game(map_string,
+                         engine.load_bot("example_bots/{}.py".format(bot_one), ROOT_DIRECTORY),
+                         engine.load_bot("example_bots/{}.py".format(bot_two), ROOT_DIRECTORY),
+                         observer=lambda turn, player, state, orders: states.append(state))
+    return states
+
+
+def read_states(directory: str) -> typing.List[str]:
+    states = []
+    for file_name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, file_name)) as state_file:
+            states.append(state_file.read())
+    return states
+
+
+def check(name: str, states: typing.List[str]) -> int:
+    """
+    :return: `int` number of states on which the port and the java bot disagree
+    """
+
+    port = engine.load_bot("example_bots/{}.py".format(name), ROOT_DIRECTORY)
+    java = engine.ProcessBot(JAVA_BOTS[name], ROOT_DIRECTORY)
+
+    mismatches = 0
+    try:
+        for index, state in enumerate(states):
+            expected = java.orders(state)
+            actual = engine.get_orders(port, state, 0)
+            if expected != actual:
+                if mismatches == 0:
+                    print("{}: state {}: java {} != python {}".format(name, index, expected, actual), file=sys.stderr)
+                mismatches += 1
+    finally:
+        java.close()
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[1])
+    parser.add_argument("--games", type=int, default=10, help="number of games to record states from")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first generated map")
+    parser.add_argument("--states", help="check the state files in this directory instead of recording games")
+    parser.add_argument("--bots", nargs="+", default=sorted(JAVA_BOTS), choices=sorted(JAVA_BOTS))
+    args = parser.parse_args()
+
+    states = read_states(args.states) if args.states else record_states(args.games, args.seed)
+
+    failed = False
+    for name in args.bots:
+        mismatches = check(name, states)
+        failed |= mismatches > 0
+        print("{:<16} {:>6} / {} states {}".format(name, len(states) - mismatches, len(states),
+                                                    "ok" if mismatches == 0 else "MISMATCH"))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
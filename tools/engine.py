@@ -0,0 +1,408 @@
+"""
+file: engine.py
+
+description: pure-python replacement for `PlayGame.jar`. runs a full game
+in-process by calling each bot's `do_turn()` directly (no stdin/stdout, no JVM)
+and produces the same playback string that `visualizer/js/visualizer.js`
+consumes.
+
+usage: python engine.py <map file> <bot one> <bot two> [max turns]
+       python engine.py maps/map1.txt ../src/MyBot.py ../src/MyBot.py | python ../visualizer/visualize_locally.py
+
+bots are either python files defining `do_turn(pw)` (played in-process) or
+commands such as "java -jar ../example_bots/BullyBot.jar" (played over pipes).
+bots that only look at the raw planets and fleets can set
+`do_turn.needs_info = False` to skip `PlanetWars._get_info()`.
+
+with `PLANET_WARS_RECORD` set, the states and orders of both players are
+recorded, see `replay.py`.
+"""
+
+import importlib.util
+import itertools
+import math
+import os
+import shlex
+import subprocess
+import sys
+import typing
+
+SOURCE_DIRECTORY = os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+if SOURCE_DIRECTORY not in sys.path:
+    sys.path.insert(0, SOURCE_DIRECTORY)
+
+import planet_wars
+import replay
+import utils
+
+BOT_FUNCTION = typing.Callable[[planet_wars.PlanetWars], None]
+ORDER_LIST = typing.List[typing.Tuple[int, int, int]]
+OBSERVER_FUNCTION = typing.Callable[[int, int, str, ORDER_LIST], None]
+
+_module_counter = itertools.count()
+
+# see `MyBot.RESET_COMMAND`
+RESET_COMMAND: str = "reset"
+
+# winner values, as returned by `Game.winner()`
+NOT_FINISHED: int = -1
+DRAW: int = 0
+
+
+class GameResult:
+    def __init__(self, winner: int, turns: int, playback: str, errors: typing.Dict[int, str]):
+        self.winner: int = winner
+        self.turns: int = turns
+        self.playback: str = playback
+        self.errors: typing.Dict[int, str] = errors
+
+
+class Game:
+    def __init__(self, map_string: str, max_turns: int = planet_wars.TOTAL_TURNS):
+        parser = planet_wars.PlanetWars()
+        if not parser.parse_game_state(map_string):
+            raise ValueError("invalid map")
+
+        self.planets: planet_wars.PLANET_LIST = parser.planets()
+        self.fleets: planet_wars.FLEET_LIST = []
+        self.max_turns: int = max_turns
+        self.turn: int = 0
+
+        self.distances: typing.List[typing.List[int]] = [
+            [int(math.ceil(utils.distance(source.x(), source.y(), destination.x(), destination.y())))
+             for destination in self.planets]
+            for source in self.planets
+        ]
+
+        self._playback: typing.List[str] = [
+            ":".join("{},{},{},{},{}".format(p.x(), p.y(), p.owner(), p.num_ships(), p.growth_rate())
+                     for p in self.planets),
+            "|"
+        ]
+
+    def state_string(self, player: int) -> str:
+        """
+        the game state as seen by `player`. like the real engine, every bot sees
+        itself as player 1 and its opponent as player 2.
+        :param player: `int` the player to render the state for
+        :return: `str` the game state (without the trailing "go")
+        """
+
+        def perspective(owner: int) -> int:
+            if player == 2 and owner != 0:
+                return 3 - owner
+            return owner
+
+        lines = ["P {} {} {} {} {}".format(p.x(), p.y(), perspective(p.owner()), p.num_ships(), p.growth_rate())
+                 for p in self.planets]
+        lines += ["F {} {} {} {} {} {}".format(perspective(f.owner()), f.num_ships(), f.source_planet(),
+                                               f.destination_planet(), f.total_trip_length(), f.turns_remaining())
+                  for f in self.fleets]
+        return "\n".join(lines)
+
+    def issue_order(self, player: int, source_planet: int, destination_planet: int, num_ships: int) -> bool:
+        """
+        departure: removes the ships from the source planet and launches a fleet.
+        :return: `bool` whether the order was valid
+        """
+
+        try:
+            source = self.planets[source_planet]
+            self.planets[destination_planet]
+        except (IndexError, TypeError):
+            return False
+        if source.owner() != player or num_ships < 0 or num_ships > source.num_ships():
+            return False
+
+        source.remove_ships(num_ships)
+        distance = self.distances[source_planet][destination_planet]
+        self.fleets.append(planet_wars.Fleet(player, num_ships, source_planet, destination_planet, distance, distance))
+        return True
+
+    def drop_player(self, player: int) -> None:
+        for planet in self.planets:
+            if planet.owner() == player:
+                planet.owner(0)
+        self.fleets = [f for f in self.fleets if f.owner() != player]
+
+    def do_time_step(self) -> None:
+        # growth
+        for planet in self.planets:
+            if planet.owner() != 0:
+                planet.add_ships(planet.growth_rate())
+
+        # fleet advance
+        for fleet in self.fleets:
+            fleet.advance()
+
+        # arrival
+        arrivals = [{p.owner(): p.num_ships()} for p in self.planets]
+        in_flight = []
+        for fleet in self.fleets:
+            if fleet.turns_remaining() <= 0:
+                participants = arrivals[fleet.destination_planet()]
+                participants[fleet.owner()] = participants.get(fleet.owner(), 0) + fleet.num_ships()
+            else:
+                in_flight.append(fleet)
+        self.fleets = in_flight
+
+        # combat: the largest force wins and keeps the difference to the second
+        # largest force. ties leave the planet with its owner and no ships.
+        for planet, participants in zip(self.planets, arrivals):
+            forces = sorted(participants.items(), key=lambda kv: kv[1], reverse=True) + [(0, 0)]
+            (winner, winner_ships), (_, second_ships) = forces[0], forces[1]
+            if winner_ships > second_ships:
+                planet.owner(winner)
+                planet.num_ships(winner_ships - second_ships)
+            else:
+                planet.num_ships(0)
+
+        self.turn += 1
+        self._playback.append(self.frame() + ":")
+
+    def frame(self) -> str:
+        return ",".join(
+            ["{}.{}".format(p.owner(), p.num_ships()) for p in self.planets] +
+            ["{}.{}.{}.{}.{}.{}".format(f.owner(), f.num_ships(), f.source_planet(), f.destination_planet(),
+                                        f.total_trip_length(), f.turns_remaining()) for f in self.fleets]
+        )
+
+    def total_ships(self, player: int) -> int:
+        return sum(p.num_ships() for p in self.planets if p.owner() == player) + \
+               sum(f.num_ships() for f in self.fleets if f.owner() == player)
+
+    def is_alive(self, player: int) -> bool:
+        return any(p.owner() == player for p in self.planets) or any(f.owner() == player for f in self.fleets)
+
+    def winner(self) -> int:
+        """
+        elimination and turn limit end conditions.
+        :return: `int` winning player, `DRAW` or `NOT_FINISHED`
+        """
+
+        alive = [player for player in (1, 2) if self.is_alive(player)]
+        if len(alive) == 1:
+            return alive[0]
+        if not alive:
+            return DRAW
+        if self.turn < self.max_turns:
+            return NOT_FINISHED
+
+        ships_one, ships_two = self.total_ships(1), self.total_ships(2)
+        if ships_one == ships_two:
+            return DRAW
+        return 1 if ships_one > ships_two else 2
+
+    def playback_string(self) -> str:
+        return "".join(self._playback)
+
+
+class ProcessBot:
+    """
+    an external bot that speaks the stdin/stdout protocol, wrapped so that it
+    can be played like an in-process `do_turn(pw)`. a `warm` bot must support
+    `MyBot.RESET_COMMAND`; its process is reset and kept between games instead
+    of being restarted, unless a turn was left unfinished.
+    """
+
+    needs_info = False
+
+    def __init__(self, command: str, cwd: typing.Optional[str] = None, warm: bool = False):
+        self.command: str = command
+        self.cwd: typing.Optional[str] = cwd
+        self.warm: bool = warm
+        self._process: typing.Optional[subprocess.Popen] = None
+        # whether the orders of the last turn weren't read up to "go", e.g.
+        # after an invalid line, so that the output still holds some of them
+        self._unfinished_turn: bool = False
+
+    def __call__(self, pw: planet_wars.PlanetWars) -> None:
+        # `pw` has merged fleets, `get_orders()` sends the engine's own state instead
+        for source_planet, destination_planet, num_ships in self.orders(pw.to_string()):
+            pw.issue_raw_order(source_planet, destination_planet, num_ships)
+
+    def orders(self, state: str) -> ORDER_LIST:
+        """
+        sends one game state to the bot and reads back its orders.
+        :param state: `str` game state, without the trailing "go"
+        :return: `list` of (source, destination, num_ships) orders
+        """
+
+        if self._process is None:
+            self._process = subprocess.Popen(shlex.split(self.command), cwd=self.cwd, universal_newlines=True,
+                                             stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+        self._unfinished_turn = True
+        self._process.stdin.write(state.rstrip("\n") + "\ngo\n")
+        self._process.stdin.flush()
+        orders = []
+        while True:
+            line = self._process.stdout.readline()
+            if line == "":
+                raise EOFError("bot exited")
+            if line.startswith("go"):
+                self._unfinished_turn = False
+                return orders
+            orders.append(tuple(map(int, line.split())))
+
+    def end_game(self) -> None:
+        # the rest of an unfinished turn would be read as the next game's orders
+        if not self.warm or self._process is None or self._process.poll() is not None or self._unfinished_turn:
+            self.close()
+            return
+
+        try:
+            self._process.stdin.write(RESET_COMMAND + "\n")
+            self._process.stdin.flush()
+        except OSError:
+            self.close()
+
+    def close(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+        self._unfinished_turn = False
+
+
+def get_orders(bot: BOT_FUNCTION, state: str, turn: int,
+               pw: typing.Optional[planet_wars.PlanetWars] = None) -> ORDER_LIST:
+    """
+    runs one turn of `bot` in-process, exactly as `MyBot.main()` would after
+    receiving "go". a `ProcessBot` gets `state` itself, since
+    `PlanetWars.to_string()` merges fleets and drops empty ones that
+    `PlayGame.jar` would send.
+    :param bot: `function` the bot's `do_turn(pw)`
+    :param state: `str` game state from the bot's perspective
+    :param turn: `int` number of turns already played
+    :param pw: `PlanetWars` object the bot used on its previous turn, if any
+    :return: `list` of (source, destination, num_ships) orders
+    """
+
+    if isinstance(bot, ProcessBot):
+        return bot.orders(state)
+
+    planet_wars.PlanetWars.turn = turn
+    if pw is None:
+        pw = planet_wars.PlanetWars()
+    pw.start_turn()
+    pw.parse_game_state(state)
+    pw.initialise(getattr(bot, "needs_info", True))
+    bot(pw)
+    return pw.issued_orders()
+
+
+def play_game(map_string: str, bot_one: BOT_FUNCTION, bot_two: BOT_FUNCTION,
+              max_turns: int = planet_wars.TOTAL_TURNS,
+              observer: typing.Optional[OBSERVER_FUNCTION] = None) -> GameResult:
+    """
+    plays a full game between two bots.
+    :param map_string: `str` the map, as "P" lines
+    :param bot_one: `function` `do_turn(pw)` of player 1
+    :param bot_two: `function` `do_turn(pw)` of player 2
+    :param max_turns: `int` turn limit
+    :param observer: `function` called as `observer(turn, player, state, orders)` for every bot turn
+    :return: `GameResult` object
+    """
+
+    game = Game(map_string, max_turns)
+    bots = {1: bot_one, 2: bot_two}
+    states = {player: planet_wars.PlanetWars() for player in bots}
+    errors = {}
+
+    planet_wars.PlanetWars.reset()
+
+    try:
+        while game.winner() == NOT_FINISHED:
+            all_orders = {}
+            for player, bot in bots.items():
+                if not game.is_alive(player):
+                    all_orders[player] = []
+                    continue
+                state = game.state_string(player)
+                try:
+                    all_orders[player] = get_orders(bot, state, game.turn, states[player])
+                except Exception as e:
+                    errors[player] = "turn {}: {!r}".format(game.turn, e)
+                    all_orders[player] = None
+                    continue
+                if observer is not None:
+                    observer(game.turn, player, state, all_orders[player])
+
+            for player, orders in all_orders.items():
+                if orders is None:
+                    game.drop_player(player)
+                    continue
+                for source_planet, destination_planet, num_ships in orders:
+                    if not game.issue_order(player, source_planet, destination_planet, num_ships):
+                        errors[player] = "turn {}: invalid order {} {} {}".format(
+                            game.turn, source_planet, destination_planet, num_ships)
+                        game.drop_player(player)
+                        break
+
+            game.do_time_step()
+    finally:
+        for bot in bots.values():
+            if isinstance(bot, ProcessBot):
+                bot.end_game()
+
+    return GameResult(game.winner(), game.turn, game.playback_string(), errors)
+
+
+def load_bot(path: str, cwd: typing.Optional[str] = None, warm: bool = False) -> BOT_FUNCTION:
+    """
+    loads a fresh copy of a bot module (so that module level state, such as
+    `MyBot.HAVOC_PLANET`, isn't shared between seats) and returns its `do_turn`.
+    anything that isn't a python file is treated as a command for `ProcessBot`.
+    :param path: `str` path to a python file defining `do_turn(pw)`, or a command
+    :param cwd: `str` directory that relative paths and commands are resolved from
+    :param warm: `bool` whether a command bot is kept running between games
+    :return: `function` the bot's `do_turn`
+    """
+
+    if len(shlex.split(path)) > 1 or not path.endswith(".py"):
+        return ProcessBot(path, cwd, warm)
+
+    path = os.path.realpath(os.path.join(cwd or os.curdir, path))
+    if os.path.dirname(path) not in sys.path:
+        sys.path.append(os.path.dirname(path))
+
+    name = "{}_{}".format(os.path.splitext(os.path.basename(path))[0], next(_module_counter))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.do_turn
+
+
+def main():
+    if len(sys.argv) not in (4, 5):
+        utils.error_print(__doc__.strip())
+        sys.exit(1)
+
+    with open(sys.argv[1]) as map_file:
+        map_string = map_file.read()
+    max_turns = int(sys.argv[4]) if len(sys.argv) == 5 else planet_wars.TOTAL_TURNS
+
+    recorders = {player: replay.open_recorder("engine-player{}".format(player)) for player in (1, 2)}
+    observer = None
+    if replay.RECORD_DIRECTORY is not None:
+        def observer(turn, player, state, orders):
+            recorders[player].record(turn, state, orders)
+
+    try:
+        result = play_game(map_string, load_bot(sys.argv[2]), load_bot(sys.argv[3]), max_turns, observer)
+    finally:
+        for recorder in recorders.values():
+            if recorder is not None:
+                recorder.close()
+    for player, error in sorted(result.errors.items()):
+        utils.error_print("Player {} dropped: {}".format(player, error))
+    if result.winner == DRAW:
+        utils.error_print("Draw! ({} turns)".format(result.turns))
+    else:
+        utils.error_print("Player {} Wins! ({} turns)".format(result.winner, result.turns))
+    print(result.playback)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+file: rollout.py
+
+description: monte-carlo evaluation of competing order sets, e.g. expanding
+to one planet against attacking another. every plan is played out many times
+from the current state with a randomised version of the search's candidate
+moves for both players, and scored by the average `Search.evaluate()` of the
+final states. the work is spread over a pool of worker processes that is
+forked once when the bot starts, so no turn pays for creating processes. each
+turn the workers get a compact snapshot of the state (the per-map parts only
+when the map changes) and reply with their sums before the deadline.
+
+it isn't part of the bot until it makes it stronger, see `search_bot.py`.
+"""
+
+import multiprocessing
+import multiprocessing.connection
+import os
+import random
+import time
+import typing
+
+import search
+
+ORDER_LIST = search.ORDER_LIST
+
+
+def _available_cores() -> int:
+    # the cores this process may run on, which can be fewer than the machine has
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# rollout configs
+WORKERS: int = int(os.environ.get("PLANET_WARS_WORKERS", 0)) or _available_cores()
+HORIZON: int = 20  # turns played out after the plan
+RANDOM_MOVES: float = 0.3  # chance of a random candidate instead of the best paying one
+MAXIMUM_ROLLOUTS: int = 256  # per plan and turn, for turns without a time limit
+REPLY_TIME: float = 0.02  # seconds kept for the workers' replies to arrive
+
+
+def play_out(game: search.Search, node: search.Node, orders: ORDER_LIST, rng: random.Random,
+             horizon: int = HORIZON) -> int:
+    """
+    plays `orders`, then `horizon` turns of randomised candidate moves.
+    :param game: `Search` object of the map
+    :param node: `Node` to start from, before our orders
+    :param orders: `list` of our orders for the first turn
+    :param rng: `Random` object
+    :param horizon: `int` turns to play after the first
+    :return: `int` value of the final state, higher is better for us
+    """
+
+    node = game.launch(node, orders, 1)
+    node = game.advance(game.launch(node, _choose(game.candidates(node, 2), rng), 2))
+    for _ in range(horizon):
+        node = game.launch(node, _choose(game.candidates(node, 1), rng), 1)
+        node = game.advance(game.launch(node, _choose(game.candidates(node, 2), rng), 2))
+    return game.evaluate(node)
+
+
+def _choose(candidates: typing.List[ORDER_LIST], rng: random.Random) -> ORDER_LIST:
+    # candidates start with not moving, then the attacks that pay back the most
+    if len(candidates) == 1 or rng.random() < RANDOM_MOVES:
+        return rng.choice(candidates)
+    return candidates[1]
+
+
+def _worker(connection: multiprocessing.connection.Connection, worker_id: int,
+            inherited: typing.List[multiprocessing.connection.Connection]) -> None:
+    """
+    serves evaluation requests until it receives `None` or the pool goes away.
+    a request is (request id, per-map data or `None` if unchanged, state,
+    plans, seconds, rollouts per plan); the reply is (request id, sums, counts).
+    `inherited` are the pool's ends of the pipes, which a forked worker has to
+    close to notice when the pool's process dies.
+    """
+
+    for other_connection in inherited:
+        other_connection.close()
+
+    static = None
+    rng = random.Random(worker_id)
+    while True:
+        try:
+            request = connection.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+
+        request_id, new_static, state, plans, seconds, rollouts = request
+        stop = time.perf_counter() + seconds
+        if new_static is not None:
+            static = new_static
+        game = search.Search(*static, *state)
+
+        sums = [0] * len(plans)
+        counts = [0] * len(plans)
+        while min(counts) < rollouts and time.perf_counter() < stop:
+            for index, orders in enumerate(plans):
+                sums[index] += play_out(game, game.root, orders, rng)
+                counts[index] += 1
+
+        try:
+            connection.send((request_id, sums, counts))
+        except (EOFError, OSError):
+            return
+
+
+class RolloutPool:
+    def __init__(self, workers: int = WORKERS):
+        """
+        forks the workers, so it should be created once, before the game starts.
+        :param workers: `int` number of worker processes
+        """
+
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+
+        self._connections: typing.List[multiprocessing.connection.Connection] = []
+        self._processes: typing.List[multiprocessing.Process] = []
+        for worker_id in range(workers):
+            connection, child_connection = context.Pipe()
+            process = context.Process(target=_worker, args=(child_connection, worker_id,
+                                                            self._connections + [connection]), daemon=True)
+            process.start()
+            child_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+        self._request_id: int = 0
+        # the per-map data every worker has, to only send it when it changes
+        self._static: typing.Optional[tuple] = None
+
+    def evaluate(self, game: search.Search, plans: typing.List[ORDER_LIST],
+                 seconds: float = float("inf")) -> typing.List[typing.Optional[float]]:
+        """
+        plays out every plan from the root of `game` on all workers.
+        :param game: `Search` object, its root is the current state
+        :param plans: `list` of order sets for the current turn
+        :param seconds: `float` time to spend, including the replies
+        :return: `list` of the average value of each plan, `None` for plans
+        that weren't played out in time
+        """
+
+        if not self._connections:
+            return [None] * len(plans)
+
+        self._request_id += 1
+        static = (game.growth_rates, game.distance_rows)
+        new_static = static if static != self._static else None
+        self._static = static
+
+        node = game.root
+        state = (node.turn, node.owners, node.ships, node.fleets)
+        rollouts = -(-MAXIMUM_ROLLOUTS // len(self._connections))
+        work_seconds = max(0.0, seconds - REPLY_TIME)
+        for connection in list(self._connections):
+            try:
+                connection.send((self._request_id, new_static, state, plans, work_seconds, rollouts))
+            except (EOFError, OSError):
+                self._drop(connection)
+
+        sums = [0] * len(plans)
+        counts = [0] * len(plans)
+        stop = time.perf_counter() + seconds
+        waiting = list(self._connections)
+        while waiting:
+            timeout = stop - time.perf_counter()
+            if timeout <= 0:
+                break
+            for connection in multiprocessing.connection.wait(waiting, None if timeout == float("inf") else timeout):
+                try:
+                    request_id, worker_sums, worker_counts = connection.recv()
+                except (EOFError, OSError):
+                    # the worker died, the others carry on without it
+                    waiting.remove(connection)
+                    self._drop(connection)
+                    continue
+                if request_id != self._request_id:
+                    # a reply to an earlier turn that came in after its deadline
+                    continue
+                waiting.remove(connection)
+                for index in range(len(plans)):
+                    sums[index] += worker_sums[index]
+                    counts[index] += worker_counts[index]
+
+        return [s / c if c != 0 else None for s, c in zip(sums, counts)]
+
+    def _drop(self, connection: multiprocessing.connection.Connection) -> None:
+        index = self._connections.index(connection)
+        del self._connections[index]
+        process = self._processes.pop(index)
+        connection.close()
+        process.kill()
+        process.join(1)
+
+    def close(self) -> None:
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except (EOFError, OSError):
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join(1)
+        self._connections = []
+        self._processes = []
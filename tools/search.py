@@ -0,0 +1,494 @@
+"""
+file: search.py
+
+description: depth-limited alpha-beta search over a few candidate order sets
+per player. a turn of the search is a move of ours, the opponent's reply (made
+knowing our move) and the engine's time step. nodes are compact copies of the
+planets and fleets, hashed incrementally with zobrist keys of the planet
+owners, bucketed ship counts and fleets, and looked up in a bounded
+transposition table that is kept for the whole game. leaves are valued like
+`PlanetWars.time_result`, after letting every fleet in flight land. the search
+deepens iteratively, so it always has the best order set of the last finished
+depth ready when the time runs out.
+
+it isn't part of the bot until it makes it stronger, see `search_bot.py`.
+"""
+
+import os
+import random
+import sys
+import time
+import typing
+
+SOURCE_DIRECTORY = os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+if SOURCE_DIRECTORY not in sys.path:
+    sys.path.insert(0, SOURCE_DIRECTORY)
+
+import planet_wars
+
+ORDER_LIST = typing.List[typing.Tuple[int, int, int]]
+# fleets by arrival turn, as [(owner, num_ships, destination_planet)]
+FLEET_TABLE = typing.Dict[int, typing.List[typing.Tuple[int, int, int]]]
+
+# search configs
+MAXIMUM_DEPTH: int = 4  # turns
+CANDIDATE_TARGETS: int = 3  # order sets generated per player and node, besides not moving
+SHIP_BUCKET: int = 4  # planets whose ships only differ within a bucket hash the same
+MAXIMUM_BUCKET: int = 64
+TABLE_SIZE: int = 1 << 16  # transposition table entries
+CHECK_TIME_EVERY: int = 64  # nodes
+
+# transposition table bounds
+EXACT: int = 0
+LOWER: int = 1
+UPPER: int = 2
+
+_random = random.Random(0)
+
+
+def _random_key() -> int:
+    return _random.getrandbits(64)
+
+
+class Zobrist:
+    """
+    random keys of every feature of a node. the keys of fleets are created
+    when first needed, fleets are keyed by their arrival turn so that they
+    keep their key while they fly.
+    """
+
+    def __init__(self, num_planets: int):
+        self.owner_keys: typing.List[typing.List[int]] = [[_random_key() for _ in range(3)]
+                                                          for _ in range(num_planets)]
+        self.ship_keys: typing.List[typing.List[int]] = [[_random_key() for _ in range(MAXIMUM_BUCKET)]
+                                                         for _ in range(num_planets)]
+        self.reply_key: int = _random_key()
+        self._fleet_keys: typing.Dict[typing.Tuple[int, int, int, int], int] = {}
+        self._turn_keys: typing.Dict[int, int] = {}
+
+    def ships(self, planet_id: int, num_ships: int) -> int:
+        return self.ship_keys[planet_id][min(num_ships // SHIP_BUCKET, MAXIMUM_BUCKET - 1)]
+
+    def fleet(self, owner: int, num_ships: int, destination_planet: int, arrival: int) -> int:
+        feature = (owner, min(num_ships // SHIP_BUCKET, MAXIMUM_BUCKET - 1), destination_planet, arrival)
+        key = self._fleet_keys.get(feature)
+        if key is None:
+            key = self._fleet_keys[feature] = _random_key()
+        return key
+
+    def turn(self, turn: int) -> int:
+        key = self._turn_keys.get(turn)
+        if key is None:
+            key = self._turn_keys[turn] = _random_key()
+        return key
+
+
+class Node:
+    __slots__ = ("turn", "owners", "ships", "fleets", "key")
+
+    def __init__(self, turn: int, owners: typing.List[int], ships: typing.List[int], fleets: FLEET_TABLE, key: int):
+        self.turn: int = turn
+        self.owners: typing.List[int] = owners
+        self.ships: typing.List[int] = ships
+        self.fleets: FLEET_TABLE = fleets
+        self.key: int = key
+
+
+class TranspositionTable:
+    """
+    fixed number of slots indexed by the low bits of the key. an entry is
+    replaced by one searched at least as deep, or by any entry once it's from
+    an older search.
+    """
+
+    def __init__(self, size: int = TABLE_SIZE):
+        self.size: int = size
+        # (key, depth, value, bound, move index, generation)
+        self.entries: typing.List[typing.Optional[tuple]] = [None] * size
+        self.generation: int = 0
+        self.hits: int = 0
+        self.stores: int = 0
+
+    def get(self, key: int) -> typing.Optional[tuple]:
+        entry = self.entries[key & (self.size - 1)]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def put(self, key: int, depth: int, value: float, bound: int, move_index: int) -> None:
+        index = key & (self.size - 1)
+        entry = self.entries[index]
+        if entry is None or entry[5] != self.generation or depth >= entry[1]:
+            self.entries[index] = (key, depth, value, bound, move_index, self.generation)
+            self.stores += 1
+
+    def clear(self) -> None:
+        self.entries = [None] * self.size
+        self.generation = 0
+        self.hits = 0
+        self.stores = 0
+
+
+class _TimeUp(Exception):
+    pass
+
+
+# kept for the whole game, see `reset()`
+_table: TranspositionTable = TranspositionTable()
+_zobrist: typing.Optional[Zobrist] = None
+
+
+def reset() -> None:
+    global _zobrist
+    _table.clear()
+    _zobrist = None
+
+
+class Search:
+    def __init__(self, growth_rates: typing.List[int], distance_rows: typing.List[typing.List[int]], turn: int,
+                 owners: typing.List[int], ships: typing.List[int], fleets: FLEET_TABLE):
+        """
+        :param growth_rates: `list` of growth rates by planet id
+        :param distance_rows: `list` of distances from every planet, by planet id
+        :param turn: `int` turn of the root
+        :param owners: `list` of owners by planet id
+        :param ships: `list` of ships by planet id
+        :param fleets: `dict` of the fleets in flight by arrival turn
+        """
+
+        global _zobrist
+
+        self.num_planets: int = len(growth_rates)
+        self.growth_rates: typing.List[int] = growth_rates
+        self.distance_rows: typing.List[typing.List[int]] = distance_rows
+
+        if _zobrist is None or len(_zobrist.owner_keys) != self.num_planets:
+            _zobrist = Zobrist(self.num_planets)
+        self.zobrist: Zobrist = _zobrist
+        self.table: TranspositionTable = _table
+
+        key = self.zobrist.turn(turn)
+        for planet_id in range(self.num_planets):
+            key ^= self.zobrist.owner_keys[planet_id][owners[planet_id]]
+            key ^= self.zobrist.ships(planet_id, ships[planet_id])
+        for arrival, arriving_fleets in fleets.items():
+            for owner, num_ships, destination_planet in arriving_fleets:
+                key ^= self.zobrist.fleet(owner, num_ships, destination_planet, arrival)
+        self.root: Node = Node(turn, owners, ships, fleets, key)
+
+        self.nodes: int = 0
+        self.depth: int = 0
+        self._stop: float = float("inf")
+
+    @classmethod
+    def from_planet_wars(cls, pw: planet_wars.PlanetWars) -> "Search":
+        """
+        takes a snapshot of `pw`, so it has to be called before any orders
+        change the ships of its planets.
+        :param pw: `PlanetWars` object
+        :return: `Search` object
+        """
+
+        planets = pw.planets()
+        turn = planet_wars.PlanetWars.turn
+        fleets = {}
+        for fleet in pw.fleets():
+            fleets.setdefault(turn + fleet.turns_remaining(), []).append(
+                (fleet.owner(), fleet.num_ships(), fleet.destination_planet()))
+        return cls([p.growth_rate() for p in planets], [list(pw.distances_from(p.planet_id())) for p in planets],
+                   turn, [p.owner() for p in planets], [p.num_ships() for p in planets], fleets)
+
+    def launch(self, node: Node, orders: ORDER_LIST, player: int) -> Node:
+        """
+        :return: `Node` with the fleets of `orders` flying, still on the same turn
+        """
+
+        zobrist = self.zobrist
+        ships = node.ships[:]
+        fleets = dict(node.fleets)
+        key = node.key ^ zobrist.reply_key
+        for source_planet, destination_planet, num_ships in orders:
+            key ^= zobrist.ships(source_planet, ships[source_planet])
+            ships[source_planet] -= num_ships
+            key ^= zobrist.ships(source_planet, ships[source_planet])
+
+            arrival = node.turn + self.distance_rows[source_planet][destination_planet]
+            fleets[arrival] = fleets.get(arrival, []) + [(player, num_ships, destination_planet)]
+            key ^= zobrist.fleet(player, num_ships, destination_planet, arrival)
+        return Node(node.turn, node.owners, ships, fleets, key)
+
+    def advance(self, node: Node) -> Node:
+        """
+        one time step of the engine: growth, then arrivals and combat.
+        :return: `Node` of the next turn
+        """
+
+        zobrist = self.zobrist
+        turn = node.turn + 1
+        owners = node.owners[:]
+        ships = node.ships[:]
+        key = node.key ^ zobrist.turn(node.turn) ^ zobrist.turn(turn)
+
+        for planet_id, growth_rate in enumerate(self.growth_rates):
+            if owners[planet_id] != 0 and growth_rate != 0:
+                key ^= zobrist.ships(planet_id, ships[planet_id])
+                ships[planet_id] += growth_rate
+                key ^= zobrist.ships(planet_id, ships[planet_id])
+
+        fleets = node.fleets
+        if turn in fleets:
+            fleets = dict(fleets)
+            forces = {}
+            for owner, num_ships, destination_planet in fleets.pop(turn):
+                key ^= zobrist.fleet(owner, num_ships, destination_planet, turn)
+                planet_forces = forces.get(destination_planet)
+                if planet_forces is None:
+                    planet_forces = forces[destination_planet] = {owners[destination_planet]:
+                                                                  ships[destination_planet]}
+                planet_forces[owner] = planet_forces.get(owner, 0) + num_ships
+
+            for planet_id, planet_forces in forces.items():
+                key ^= zobrist.owner_keys[planet_id][owners[planet_id]] ^ zobrist.ships(planet_id, ships[planet_id])
+                owners[planet_id], ships[planet_id] = _combat(owners[planet_id], planet_forces)
+                key ^= zobrist.owner_keys[planet_id][owners[planet_id]] ^ zobrist.ships(planet_id, ships[planet_id])
+
+        return Node(turn, owners, ships, fleets, key)
+
+    def evaluate(self, node: Node) -> int:
+        """
+        our final ships minus the opponent's, like `PlanetWars.time_result`,
+        once every fleet in flight has landed and nobody sends any more.
+        :param node: `Node` object
+        :return: `int` value, higher is better for us
+        """
+
+        owners = node.owners[:]
+        ships = node.ships[:]
+        settled = [node.turn] * self.num_planets
+        growth_rates = self.growth_rates
+
+        for turn in sorted(node.fleets):
+            forces = {}
+            for owner, num_ships, destination_planet in node.fleets[turn]:
+                planet_forces = forces.get(destination_planet)
+                if planet_forces is None:
+                    if owners[destination_planet] != 0:
+                        ships[destination_planet] += growth_rates[destination_planet] * \
+                                                     (turn - settled[destination_planet])
+                    settled[destination_planet] = turn
+                    planet_forces = forces[destination_planet] = {owners[destination_planet]:
+                                                                  ships[destination_planet]}
+                planet_forces[owner] = planet_forces.get(owner, 0) + num_ships
+            for planet_id, planet_forces in forces.items():
+                owners[planet_id], ships[planet_id] = _combat(owners[planet_id], planet_forces)
+
+        value = 0
+        for planet_id, owner in enumerate(owners):
+            if owner == 0:
+                continue
+            final_ships = ships[planet_id] + \
+                growth_rates[planet_id] * max(0, planet_wars.TOTAL_TURNS - settled[planet_id])
+            value += final_ships if owner == 1 else -final_ships
+        return value
+
+    def candidates(self, node: Node, player: int) -> typing.List[ORDER_LIST]:
+        """
+        not moving, and taking each of the `CANDIDATE_TARGETS` planets that pay
+        back the most with the closest planet that has enough ships, ignoring
+        the fleets in flight.
+        :param node: `Node` object
+        :param player: `int` 1 or 2
+        :return: `list` of order sets
+        """
+
+        owners = node.owners
+        ships = node.ships
+        sources = [planet_id for planet_id, owner in enumerate(owners) if owner == player and ships[planet_id] > 0]
+        if not sources:
+            return [[]]
+
+        turns_remaining = planet_wars.TOTAL_TURNS - node.turn
+        targets = []
+        for planet_id, owner in enumerate(owners):
+            if owner == player:
+                continue
+            growth_rate = self.growth_rates[planet_id]
+            best = None
+            for source_planet in sources:
+                distance = self.distance_rows[source_planet][planet_id]
+                needed = ships[planet_id] + 1 + (growth_rate * distance if owner != 0 else 0)
+                if ships[source_planet] >= needed and (best is None or distance < best[0]):
+                    best = (distance, source_planet, needed)
+            if best is None:
+                continue
+            distance, source_planet, needed = best
+            # ships gained by taking it, and lost by the opponent if it's theirs
+            gain = growth_rate * (turns_remaining - distance) * (1 if owner == 0 else 2) - needed
+            if gain > 0:
+                targets.append((gain, source_planet, planet_id, needed))
+
+        targets.sort(reverse=True)
+        return [[]] + [[(source_planet, planet_id, needed)]
+                       for _, source_planet, planet_id, needed in targets[:CANDIDATE_TARGETS]]
+
+    def alternatives(self, orders: ORDER_LIST) -> typing.List[ORDER_LIST]:
+        """
+        `orders` and the order sets that differ from it by a single change:
+        one of its orders left out, or one more of the `candidates()` that the
+        ships it leaves behind can still make.
+        :param orders: `list` of (source, destination, num_ships) orders, e.g.
+        the ones the rest of the turn decided on
+        :return: `list` of order sets, starting with `orders`
+        """
+
+        orders = list(orders)
+        alternatives = [orders]
+        for index in range(len(orders)):
+            alternatives.append(orders[:index] + orders[index + 1:])
+        for candidate in self.candidates(self.launch(self.root, orders, 1), 1)[1:]:
+            alternatives.append(orders + candidate)
+
+        unique = []
+        for alternative in alternatives:
+            if alternative not in unique:
+                unique.append(alternative)
+        return unique
+
+    def _check_time(self) -> None:
+        self.nodes += 1
+        if self.nodes % CHECK_TIME_EVERY == 0 and time.perf_counter() > self._stop:
+            raise _TimeUp
+
+    def _our_move(self, node: Node, depth: int, alpha: float, beta: float) -> float:
+        self._check_time()
+        if depth == 0 or node.turn >= planet_wars.TOTAL_TURNS:
+            return self.evaluate(node)
+
+        original_alpha = alpha
+        entry = self.table.get(node.key)
+        first = 0
+        if entry is not None:
+            if entry[1] >= depth:
+                if entry[3] == EXACT:
+                    return entry[2]
+                if entry[3] == LOWER:
+                    alpha = max(alpha, entry[2])
+                else:
+                    beta = min(beta, entry[2])
+                if alpha >= beta:
+                    return entry[2]
+            first = entry[4]
+
+        candidates = self.candidates(node, 1)
+        if first >= len(candidates):
+            first = 0
+        order = [first] + [i for i in range(len(candidates)) if i != first]
+
+        best_value = -float("inf")
+        best_index = first
+        for index in order:
+            value = self._their_move(self.launch(node, candidates[index], 1), depth, alpha, beta)
+            if value > best_value:
+                best_value = value
+                best_index = index
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        bound = UPPER if best_value <= original_alpha else LOWER if best_value >= beta else EXACT
+        self.table.put(node.key, depth, best_value, bound, best_index)
+        return best_value
+
+    def _their_move(self, node: Node, depth: int, alpha: float, beta: float) -> float:
+        self._check_time()
+
+        original_alpha = alpha
+        original_beta = beta
+        entry = self.table.get(node.key)
+        first = 0
+        if entry is not None:
+            if entry[1] >= depth:
+                if entry[3] == EXACT:
+                    return entry[2]
+                if entry[3] == LOWER:
+                    alpha = max(alpha, entry[2])
+                else:
+                    beta = min(beta, entry[2])
+                if alpha >= beta:
+                    return entry[2]
+            first = entry[4]
+
+        candidates = self.candidates(node, 2)
+        if first >= len(candidates):
+            first = 0
+        order = [first] + [i for i in range(len(candidates)) if i != first]
+
+        best_value = float("inf")
+        best_index = first
+        for index in order:
+            value = self._our_move(self.advance(self.launch(node, candidates[index], 2)), depth - 1, alpha, beta)
+            if value < best_value:
+                best_value = value
+                best_index = index
+            beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        bound = LOWER if best_value >= original_beta else UPPER if best_value <= original_alpha else EXACT
+        self.table.put(node.key, depth, best_value, bound, best_index)
+        return best_value
+
+    def best_orders(self, orders: ORDER_LIST, stop: float = float("inf"),
+                    maximum_depth: int = MAXIMUM_DEPTH) -> ORDER_LIST:
+        """
+        iterative deepening from the root over the `alternatives()` of
+        `orders`. `orders` are searched first, so they are kept unless another
+        order set is strictly better.
+        :param orders: `list` of (source, destination, num_ships) orders, e.g.
+        the ones the rest of the turn decided on
+        :param stop: `float` `time.perf_counter()` to stop searching at
+        :param maximum_depth: `int` turns to search at most
+        :return: `list` of orders of the deepest finished search
+        """
+
+        self._stop = stop
+        self.table.generation += 1
+
+        candidates = self.alternatives(orders)
+        best = candidates[0]
+        for depth in range(1, maximum_depth + 1):
+            try:
+                alpha = -float("inf")
+                best_index = 0
+                for index, candidate in enumerate(candidates):
+                    value = self._their_move(self.launch(self.root, candidate, 1), depth, alpha, float("inf"))
+                    if value > alpha:
+                        alpha = value
+                        best_index = index
+            except _TimeUp:
+                break
+            self.depth = depth
+            best = candidates[best_index]
+            # the best order set is searched first at the next depth
+            candidates.insert(0, candidates.pop(best_index))
+        return best
+
+
+def _combat(owner: int, forces: typing.Dict[int, int]) -> typing.Tuple[int, int]:
+    """
+    :param owner: `int` owner of the planet before the combat
+    :param forces: `dict` of owner: ships, including the planet's
+    :return: (owner, num_ships) after the combat, a tie keeps the owner
+    """
+
+    if len(forces) == 1:
+        (winner, num_ships), = forces.items()
+        return winner, num_ships
+    ordered = sorted(forces.values(), reverse=True)
+    winner_ships, second_ships = ordered[0], ordered[1]
+    if winner_ships == second_ships:
+        return owner, 0
+    for winner, num_ships in forces.items():
+        if num_ships == winner_ships:
+            return winner, winner_ships - second_ships
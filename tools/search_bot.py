@@ -0,0 +1,96 @@
+"""
+file: search_bot.py
+
+description: `MyBot` with the orders of every turn checked afterwards against
+their alternatives (see `Search.alternatives()`), by the alpha-beta search of
+`search.py` and/or by playing them out on the workers of `rollout.py`. neither
+makes the bot stronger yet: on generated maps, playing both seats against the
+plain bot, the search won 6 of 24 games and the rollouts 2 of 12 (with 0.5
+seconds a turn and one worker). so they are kept out of the bot and played
+from here until they do. it's a python bot like any other, for `engine.py` and
+`tournament.py`.
+
+usage: python engine.py maps/map1.txt search_bot.py ../src/MyBot.py
+"""
+
+import os
+import typing
+
+import engine
+
+import deadline
+import planet_wars
+import profiler
+import rollout
+import search
+
+# search configs
+SEARCH: bool = True  # whether the orders are checked by the alpha-beta search
+ROLLOUTS: bool = False  # whether they are then checked by rollouts
+
+# a copy of the bot of its own for every copy of this module, see `engine.load_bot()`
+bot_do_turn = engine.load_bot(os.path.join(engine.SOURCE_DIRECTORY, "MyBot.py"))
+
+ROLLOUT_POOL: typing.Optional[rollout.RolloutPool] = None  # forked on the first turn if `ROLLOUTS` is set
+
+
+def replace_orders(pw, orders):
+    pw.clear_orders()
+    for source_planet, destination_planet, num_ships in orders:
+        pw.issue_order(source_planet, destination_planet, num_ships, proxy=False)
+
+
+@profiler.phase
+def search_orders(pw, root: search.Search, turn_deadline: deadline.Deadline):
+    """
+    replaces the orders of the turn if the search finds better ones in the time that's left.
+    :param pw: `PlanetWars` object
+    :param root: `Search` object created before any orders were issued
+    :param turn_deadline: `Deadline` object
+    """
+
+    orders = pw.issued_orders()
+    best_orders = root.best_orders(orders, turn_deadline.end)
+    if best_orders != orders:
+        replace_orders(pw, best_orders)
+
+
+@profiler.phase
+def rollout_orders(pw, root: search.Search, turn_deadline: deadline.Deadline):
+    """
+    replaces the orders of the turn if one of their alternatives does better when both are played out.
+    :param pw: `PlanetWars` object
+    :param root: `Search` object created before any orders were issued
+    :param turn_deadline: `Deadline` object
+    """
+
+    orders = pw.issued_orders()
+    plans = root.alternatives(orders)
+    values = ROLLOUT_POOL.evaluate(root, plans, turn_deadline.remaining())
+    if values[0] is None:
+        return
+
+    best_index = max(filter(lambda i: values[i] is not None, range(len(plans))), key=lambda i: values[i])
+    if values[best_index] > values[0]:
+        replace_orders(pw, plans[best_index])
+
+
+def do_turn(pw, turn_deadline: typing.Optional[deadline.Deadline] = None):
+    global ROLLOUT_POOL
+    if ROLLOUTS and ROLLOUT_POOL is None:
+        ROLLOUT_POOL = rollout.RolloutPool()
+    if turn_deadline is None:
+        turn_deadline = deadline.Deadline()
+    if planet_wars.PlanetWars.turn == 0:
+        search.reset()
+
+    root = search.Search.from_planet_wars(pw)
+    bot_do_turn(pw, turn_deadline)
+    if not pw.my_planets() or not pw.enemy_planets():
+        return
+
+    # both always have orders ready when the time runs out
+    if SEARCH and not turn_deadline.expired():
+        search_orders(pw, root, turn_deadline)
+    if ROLLOUTS and not turn_deadline.expired():
+        rollout_orders(pw, root, turn_deadline)
@@ -0,0 +1,94 @@
+"""
+file: sprt.py
+
+description: sequential probability ratio test for match series. decides
+between "the bot is `elo0` stronger" (H0) and "the bot is `elo1` stronger" (H1)
+as soon as the results allow it, using the usual normal approximation of the
+trinomial (win/draw/loss) log-likelihood ratio.
+"""
+
+import math
+import typing
+
+H0: str = "H0"
+H1: str = "H1"
+
+
+def elo_to_score(elo: float) -> float:
+    """
+    expected score of a player that is `elo` stronger than its opponent.
+    :param elo: `float` elo difference
+    :return: `float` expected score in [0, 1]
+    """
+
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+class SPRT:
+    def __init__(self, elo0: float = 0, elo1: float = 5, alpha: float = 0.05, beta: float = 0.05):
+        if elo0 >= elo1:
+            raise ValueError("elo0 must be smaller than elo1")
+
+        self.elo0: float = elo0
+        self.elo1: float = elo1
+        self.alpha: float = alpha
+        self.beta: float = beta
+
+        self.lower_bound: float = math.log(beta / (1 - alpha))
+        self.upper_bound: float = math.log((1 - beta) / alpha)
+
+        self.wins: int = 0
+        self.draws: int = 0
+        self.losses: int = 0
+
+    def add(self, result: str) -> None:
+        """
+        :param result: `str` one of "win", "draw" or "loss"
+        """
+
+        if result == "win":
+            self.wins += 1
+        elif result == "draw":
+            self.draws += 1
+        elif result == "loss":
+            self.losses += 1
+        else:
+            raise ValueError("unknown result: {!r}".format(result))
+
+    def llr(self) -> float:
+        """
+        log-likelihood ratio of H1 against H0 for the results so far.
+        :return: `float` llr, 0 while there isn't enough data
+        """
+
+        if self.wins + self.draws + self.losses == 0:
+            return 0.0
+
+        # half a pseudo win and loss keep the variance non-zero for one-sided results
+        wins, draws, losses = self.wins + 0.5, self.draws, self.losses + 0.5
+        games = wins + draws + losses
+
+        score = (wins + draws / 2) / games
+        variance = (wins * (1 - score) ** 2 +
+                    draws * (0.5 - score) ** 2 +
+                    losses * score ** 2) / games
+
+        score0, score1 = elo_to_score(self.elo0), elo_to_score(self.elo1)
+        return games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+    def verdict(self) -> typing.Optional[str]:
+        """
+        :return: `H0`, `H1`, or `None` if more games are needed
+        """
+
+        llr = self.llr()
+        if llr >= self.upper_bound:
+            return H1
+        if llr <= self.lower_bound:
+            return H0
+        return None
+
+    def __str__(self) -> str:
+        return "sprt elo0={} elo1={} alpha={} beta={}: llr {:.3f} [{:.3f}, {:.3f}] -> {}".format(
+            self.elo0, self.elo1, self.alpha, self.beta, self.llr(), self.lower_bound, self.upper_bound,
+            self.verdict() or "undecided")
@@ -0,0 +1,383 @@
+"""
+file: tournament.py
+
+description: plays a bot against a set of opponents over many maps, on every
+seat, using all cores. jobs can also be farmed out to `tournament.py --connect`
+workers over a tcp socket so that several machines can share one run. results
+are streamed to disk (one json object per line) as games finish.
+
+usage: python tournament.py [--bot ../src/MyBot.py] [--maps 100] [--workers 8] [--output results.jsonl]
+       python tournament.py ... --listen 0.0.0.0:7777           (coordinator, also accepts remote workers)
+       python tournament.py --connect coordinator:7777           (remote worker)
+       python tournament.py ... --sprt 0 5 [--alpha 0.05] [--beta 0.05]  (stop as soon as the sprt decides)
+"""
+
+import argparse
+import collections
+import json
+import math
+import multiprocessing
+import multiprocessing.connection
+import multiprocessing.pool
+import os
+import queue
+import random
+import threading
+import typing
+
+import engine
+import map_generator_v2
+import sprt
+
+ROOT_DIRECTORY: str = os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+DEFAULT_BOT: str = "src/MyBot.py"
+DEFAULT_OPPONENTS: typing.List[str] = [
+    "example_bots/BullyBot.py",
+    "example_bots/RageBot.py",
+    "example_bots/ProspectorBot.py",
+    "example_bots/DualBot.py",
+    "example_bots/RandomBot.py",
+]
+DEFAULT_AUTHKEY: bytes = b"planet-wars"
+
+RESULTS = ("win", "draw", "loss")
+
+_warm_bots: typing.Dict[typing.Tuple[str, str], engine.BOT_FUNCTION] = {}
+
+
+class Job:
+    def __init__(self, job_id: int, map_id: str, map_string: str, bot: str, opponent: str, seat: int,
+                 max_turns: int = engine.planet_wars.TOTAL_TURNS, warm: bool = False):
+        self.job_id: int = job_id
+        self.map_id: str = map_id
+        self.map_string: str = map_string
+        self.bot: str = bot
+        self.opponent: str = opponent
+        self.seat: int = seat
+        self.max_turns: int = max_turns
+        self.warm: bool = warm
+
+
+def bot_name(bot: str) -> str:
+    """
+    short display name for a bot spec, e.g. "java -jar example_bots/BullyBot.jar" -> "BullyBot".
+    """
+
+    return os.path.splitext(os.path.basename(bot.split()[-1]))[0]
+
+
+def get_bot(bot: str, role: str, warm: bool) -> engine.BOT_FUNCTION:
+    """
+    warm command bots are kept running in each worker process (one per role, so
+    that a bot can play itself) and reset between games.
+    """
+
+    if not warm:
+        return engine.load_bot(bot, ROOT_DIRECTORY)
+    try:
+        return _warm_bots[(bot, role)]
+    except KeyError:
+        _warm_bots[(bot, role)] = engine.load_bot(bot, ROOT_DIRECTORY, warm=True)
+        return _warm_bots[(bot, role)]
+
+
+def run_job(job: Job) -> typing.Dict[str, typing.Any]:
+    """
+    plays one game. bots are loaded fresh for every game (or reset, if warm) so
+    that no state leaks between games. paths are resolved from the repository
+    root so that remote workers only need the same checkout.
+    :param job: `Job` object
+    :return: `dict` result, from the perspective of `job.bot`
+    """
+
+    bot = get_bot(job.bot, "bot", job.warm)
+    opponent = get_bot(job.opponent, "opponent", job.warm)
+    players = (bot, opponent) if job.seat == 1 else (opponent, bot)
+    game = engine.play_game(job.map_string, players[0], players[1], job.max_turns)
+
+    if game.winner == engine.DRAW:
+        result = "draw"
+    else:
+        result = "win" if game.winner == job.seat else "loss"
+
+    return {
+        "job": job.job_id,
+        "map": job.map_id,
+        "opponent": bot_name(job.opponent),
+        "seat": job.seat,
+        "result": result,
+        "turns": game.turns,
+        "errors": {str(k): v for k, v in game.errors.items()},
+    }
+
+
+def elo_difference(wins: int, draws: int, losses: int) -> float:
+    """
+    elo difference implied by a score, +-infinity on a perfect or zero score.
+    :return: `float` elo difference
+    """
+
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0
+    score = (wins + draws / 2) / games
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return 400 * math.log10(score / (1 - score))
+
+
+def generate_maps(number: int, seed: int) -> typing.List[typing.Tuple[str, str]]:
+    maps = []
+    for index in range(number):
+        random.seed(seed + index)
+        maps.append(("seed-{}".format(seed + index), map_generator_v2.generate_map()))
+    return maps
+
+
+def read_maps(directory: str) -> typing.List[typing.Tuple[str, str]]:
+    maps = []
+    for file_name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, file_name)) as map_file:
+            maps.append((file_name, map_file.read()))
+    return maps
+
+
+class Tournament:
+    """
+    hands out jobs from one queue to local pool slots and remote socket workers
+    alike, and collects their results. with an `SPRT`, the tournament stops as
+    soon as the test reaches a verdict: queued jobs are dropped and games that
+    are still being played are cancelled.
+    """
+
+    def __init__(self, jobs: typing.List[Job], output: typing.TextIO, test: typing.Optional[sprt.SPRT] = None):
+        self._jobs: queue.Queue = queue.Queue()
+        for job in jobs:
+            self._jobs.put(job)
+        self._remaining: int = len(jobs)
+
+        self._output: typing.TextIO = output
+        self._lock: threading.Lock = threading.Lock()
+        self._done: threading.Event = threading.Event()
+        if self._remaining == 0:
+            self._done.set()
+
+        self.sprt: typing.Optional[sprt.SPRT] = test
+        self.results: typing.List[typing.Dict[str, typing.Any]] = []
+        self.error: typing.Optional[BaseException] = None
+
+    def next_job(self) -> typing.Optional[Job]:
+        """
+        waits for a job, since a failed remote worker may still hand one back.
+        :return: `Job` object, or `None` once the tournament is over
+        """
+
+        while not self._done.is_set():
+            try:
+                return self._jobs.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def requeue(self, job: Job) -> None:
+        self._jobs.put(job)
+
+    def record(self, result: typing.Dict[str, typing.Any]) -> None:
+        with self._lock:
+            if self._done.is_set():
+                # a game that finished after the verdict doesn't count
+                return
+
+            self.results.append(result)
+            self._output.write(json.dumps(result) + "\n")
+            self._output.flush()
+
+            self._remaining -= 1
+            if self.sprt is not None:
+                self.sprt.add(result["result"])
+            if self._remaining == 0 or (self.sprt is not None and self.sprt.verdict() is not None):
+                self._done.set()
+
+    def local_slot(self, pool: multiprocessing.pool.Pool) -> None:
+        job = self.next_job()
+        while job is not None:
+            game = pool.apply_async(run_job, (job,))
+            while not game.ready():
+                if self._done.is_set():
+                    return
+                game.wait(0.1)
+
+            try:
+                self.record(game.get())
+            except Exception as e:
+                # a bot that can't even be loaded is a configuration error, not a lost game
+                self.error = e
+                self._done.set()
+                return
+            job = self.next_job()
+
+    def remote_slot(self, connection: multiprocessing.connection.Connection) -> None:
+        job = None
+        try:
+            job = self.next_job()
+            while job is not None:
+                connection.send(job)
+                while not connection.poll(0.1):
+                    if self._done.is_set():
+                        # tells the worker to abandon the game
+                        connection.send(None)
+                        return
+                result = connection.recv()
+                job = None
+                self.record(result)
+                job = self.next_job()
+            connection.send(None)
+        except (EOFError, OSError):
+            # the worker went away; give its game to someone else
+            if job is not None:
+                self.requeue(job)
+        finally:
+            connection.close()
+
+    def listen(self, address: typing.Tuple[str, int], authkey: bytes) -> None:
+        listener = multiprocessing.connection.Listener(address, authkey=authkey)
+        while not self._done.is_set():
+            try:
+                connection = listener.accept()
+            except (OSError, multiprocessing.AuthenticationError):
+                continue
+            threading.Thread(target=self.remote_slot, args=(connection,), daemon=True).start()
+
+    def run(self, workers: int, address: typing.Optional[typing.Tuple[str, int]] = None,
+            authkey: bytes = DEFAULT_AUTHKEY) -> typing.List[typing.Dict[str, typing.Any]]:
+        if workers <= 0 and address is None:
+            # nothing would ever take a job
+            raise ValueError("a tournament needs local workers or an address for remote workers")
+        if address is not None:
+            threading.Thread(target=self.listen, args=(address, authkey), daemon=True).start()
+
+        if workers > 0:
+            pool = multiprocessing.Pool(workers)
+            slots = [threading.Thread(target=self.local_slot, args=(pool,), daemon=True) for _ in range(workers)]
+            for slot in slots:
+                slot.start()
+            for slot in slots:
+                slot.join()
+            # kills games that are still in flight after an early stop
+            pool.terminate()
+            pool.join()
+        self._done.wait()
+
+        if self.error is not None:
+            raise self.error
+        return self.results
+
+
+def work_slot(connection: multiprocessing.connection.Connection, pool: multiprocessing.pool.Pool) -> None:
+    try:
+        job = connection.recv()
+        while job is not None:
+            game = pool.apply_async(run_job, (job,))
+            while not game.ready():
+                if connection.poll(0.1):
+                    # the coordinator has stopped, the result isn't needed anymore
+                    return
+            connection.send(game.get())
+            job = connection.recv()
+    except (EOFError, OSError):
+        pass
+    finally:
+        connection.close()
+
+
+def work(address: typing.Tuple[str, int], authkey: bytes = DEFAULT_AUTHKEY, workers: int = 1) -> None:
+    """
+    remote worker: opens `workers` connections to the coordinator and plays the
+    jobs it hands out until it says stop.
+    """
+
+    pool = multiprocessing.Pool(workers)
+    slots = [threading.Thread(target=work_slot, args=(multiprocessing.connection.Client(address, authkey=authkey),
+                                                      pool), daemon=True)
+             for _ in range(workers)]
+    for slot in slots:
+        slot.start()
+    for slot in slots:
+        slot.join()
+    pool.terminate()
+    pool.join()
+
+
+def summarise(results: typing.List[typing.Dict[str, typing.Any]]) -> str:
+    table = collections.OrderedDict()
+    for result in sorted(results, key=lambda r: r["opponent"]):
+        table.setdefault(result["opponent"], collections.Counter())[result["result"]] += 1
+    table["total"] = sum(table.values(), collections.Counter())
+
+    lines = ["{:<16} {:>6} {:>6} {:>6} {:>8}".format("opponent", *RESULTS, "elo")]
+    for opponent, counts in table.items():
+        elo = elo_difference(counts["win"], counts["draw"], counts["loss"])
+        lines.append("{:<16} {:>6} {:>6} {:>6} {:>8.1f}".format(opponent, *(counts[r] for r in RESULTS), elo))
+    return "\n".join(lines)
+
+
+def parse_address(address: str) -> typing.Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[1],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bot", default=DEFAULT_BOT, help="bot under test (relative to the repository root)")
+    parser.add_argument("--opponents", nargs="+", default=DEFAULT_OPPONENTS, help="opponent bots")
+    parser.add_argument("--maps", type=int, default=100, help="number of maps to generate")
+    parser.add_argument("--map-dir", help="play the maps in this directory instead of generating them")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first generated map")
+    parser.add_argument("--turns", type=int, default=engine.planet_wars.TOTAL_TURNS, help="turn limit")
+    parser.add_argument("--warm", action="store_true",
+                        help="keep command bots running between games (they must support the reset command)")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="local worker processes")
+    parser.add_argument("--output", default="results.jsonl", help="file that results are streamed to")
+    parser.add_argument("--listen", help="host:port to accept remote workers on")
+    parser.add_argument("--connect", help="run as a remote worker of the coordinator at host:port")
+    parser.add_argument("--authkey", default=DEFAULT_AUTHKEY.decode(), help="shared secret for socket workers")
+    parser.add_argument("--sprt", nargs=2, type=float, metavar=("ELO0", "ELO1"),
+                        help="stop early once a sequential probability ratio test decides between elo0 and elo1")
+    parser.add_argument("--alpha", type=float, default=0.05, help="sprt false positive rate")
+    parser.add_argument("--beta", type=float, default=0.05, help="sprt false negative rate")
+    args = parser.parse_args()
+
+    if args.workers < 0:
+        parser.error("--workers can't be negative")
+    if args.workers == 0 and (args.connect or not args.listen):
+        parser.error("--workers 0 only works with --listen, the games would never be played")
+
+    authkey = args.authkey.encode()
+    if args.connect:
+        work(parse_address(args.connect), authkey, args.workers)
+        return
+
+    maps = read_maps(args.map_dir) if args.map_dir else generate_maps(args.maps, args.seed)
+    jobs = []
+    for map_id, map_string in maps:
+        for opponent in args.opponents:
+            for seat in (1, 2):
+                jobs.append(Job(len(jobs), map_id, map_string, args.bot, opponent, seat, args.turns, args.warm))
+
+    with open(args.output, "w") as output:
+        test = sprt.SPRT(args.sprt[0], args.sprt[1], args.alpha, args.beta) if args.sprt else None
+        tournament = Tournament(jobs, output, test)
+        address = parse_address(args.listen) if args.listen else None
+        results = tournament.run(args.workers, address, authkey)
+
+    print(summarise(results))
+    if test is not None:
+        print(test)
+
+
+if __name__ == '__main__':
+    main()